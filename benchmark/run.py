@@ -0,0 +1,380 @@
+"""Ingestion and matching benchmark against a local pgvector Postgres.
+
+Writes synthetic candidates and jobs into the database configured in .env
+(use a dedicated one, created from ddl.sql), then measures ingestion rate
+and match latency percentiles. Results are written as JSON; pass an
+earlier result as --baseline to fail on regressions.
+
+    python -m benchmark.run --candidates 100000 --jobs 200 --output bench.json
+    python -m benchmark.run --skip-ingest --baseline bench.json
+
+Cursor pagination is checked on the way: pages past hnsw.ef_search must
+stay full while eligible candidates remain, otherwise the run fails.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+
+from benchmark.stubs import (
+    HashEmbeddingModel,
+    LocalEmbeddingModel,
+    StubJobService,
+)
+from benchmark.synthetic import generate_candidates, generate_jobs
+from config import (
+    BINARY_RESCORE_FACTOR,
+    DB_CONFIG,
+    RERANK_RECALL,
+    VECTOR_INDEX_TYPE,
+    VECTOR_ITERATIVE_SCAN,
+    VECTOR_METRIC,
+    VECTOR_STORAGE,
+)
+from models.candidate_matching_model import CandidateMatchingModel
+from models.job_model import JobModel
+from services.candidate_service import CandidateService
+from utils.candidate_match import CandidateMatch
+from utils.database import Database
+from utils.hybrid_match import HybridMatch
+from utils.vector_index import VectorIndex
+
+# Metrics compared against a baseline and whether higher is better
+TRACKED_METRICS = {
+    ("ingest", "candidates", "rows_per_second"): True,
+    ("ingest", "jobs", "rows_per_second"): True,
+    ("match", "vector", "p50_ms"): False,
+    ("match", "vector", "p99_ms"): False,
+    ("match", "rerank", "p50_ms"): False,
+    ("match", "rerank", "p99_ms"): False,
+    ("match", "hybrid", "p50_ms"): False,
+    ("match", "hybrid", "p99_ms"): False,
+}
+
+
+def latency_summary(latencies: List[float]) -> Dict:
+    """Percentiles of latencies given in seconds, reported in ms."""
+    values = np.asarray(latencies) * 1000
+    return {
+        "queries": len(values),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def ingest_candidates(
+    candidate_service: CandidateService, count: int, batch_size: int, seed: int
+) -> Dict:
+    """Insert synthetic candidates batch by batch through the service."""
+    candidates = generate_candidates(count, seed=seed)
+    inserted = 0
+    batch_latencies = []
+    started = time.perf_counter()
+    while True:
+        batch = list(itertools.islice(candidates, batch_size))
+        if not batch:
+            break
+        batch_started = time.perf_counter()
+        inserted += candidate_service.insert_candidate_batch(batch)
+        batch_latencies.append(time.perf_counter() - batch_started)
+    seconds = time.perf_counter() - started
+
+    return {
+        "rows": inserted,
+        "seconds": seconds,
+        "rows_per_second": inserted / seconds if seconds else 0.0,
+        "batch_size": batch_size,
+        "batch": latency_summary(batch_latencies) if batch_latencies else None,
+    }
+
+
+def ingest_jobs(job_service: StubJobService, count: int, seed: int) -> Dict:
+    """Insert synthetic jobs one by one, as the ingestion worker does."""
+    inserted = 0
+    started = time.perf_counter()
+    for job_id, job_data in generate_jobs(count, seed=seed):
+        job_service.process_job(job_id=job_id, job_data=job_data)
+        inserted += 1
+    seconds = time.perf_counter() - started
+
+    return {
+        "rows": inserted,
+        "seconds": seconds,
+        "rows_per_second": inserted / seconds if seconds else 0.0,
+    }
+
+
+def measure(match, job_ids: List, queries: int, seed: int) -> Dict:
+    """Latency of `match(job_id)` over randomly picked jobs."""
+    rng = random.Random(seed)
+    latencies = []
+    returned = 0
+    for _ in range(queries):
+        job_id = rng.choice(job_ids)
+        started = time.perf_counter()
+        returned += len(match(job_id))
+        latencies.append(time.perf_counter() - started)
+
+    summary = latency_summary(latencies)
+    summary["mean_rows"] = returned / queries
+    return summary
+
+
+def eligible_candidates(connection, job) -> int:
+    """Candidates passing the tenure and degree filters of a job."""
+    query = select(func.count()).select_from(CandidateMatchingModel)
+    if job.tenure:
+        query = query.where(
+            CandidateMatchingModel.candidate_tenure >= job.tenure
+        )
+    if job.is_bachelor:
+        query = query.where(CandidateMatchingModel.has_bachelor.is_(True))
+    if job.is_master:
+        query = query.where(CandidateMatchingModel.has_master.is_(True))
+    return connection.execute(query).scalar()
+
+
+def check_pages(
+    candidate_match: CandidateMatch, job_id, page_size: int, pages: int
+) -> Dict:
+    """Walk cursor pages of one job and report the first short page.
+
+    A page is short when it holds fewer rows than remain eligible, e.g.
+    an ANN scan that stopped at ef_search rows before the cursor.
+    """
+    with candidate_match.database.get_connection() as connection:
+        job = candidate_match.load_job(connection, job_id)
+        eligible = eligible_candidates(connection, job)
+
+    cursor = None
+    returned = 0
+    latencies = []
+    short_page = None
+    for number in range(1, pages + 1):
+        expected = min(page_size, eligible - returned)
+        started = time.perf_counter()
+        page = candidate_match.get_candidates_page(
+            job_id, page_size, cursor=cursor
+        )
+        latencies.append(time.perf_counter() - started)
+        returned += len(page["candidates"])
+
+        if len(page["candidates"]) < expected:
+            short_page = number
+            break
+        if page["next_cursor"] is None:
+            break
+        cursor = candidate_match.decode_cursor(page["next_cursor"])
+
+    summary = latency_summary(latencies)
+    summary.update(
+        {
+            "job_id": str(job_id),
+            "page_size": page_size,
+            "eligible": eligible,
+            "returned": returned,
+            "short_page": short_page,
+        }
+    )
+    return summary
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Tracked metrics worse than the baseline by more than tolerance."""
+    regressions = []
+    for path, higher_is_better in TRACKED_METRICS.items():
+        current, previous = result, baseline
+        for key in path:
+            current = (current or {}).get(key)
+            previous = (previous or {}).get(key)
+        if not current or not previous:
+            continue
+
+        change = (current - previous) / previous
+        if (higher_is_better and change < -tolerance) or (
+            not higher_is_better and change > tolerance
+        ):
+            regressions.append(
+                f"{'.'.join(path)}: {previous:.2f} -> {current:.2f} "
+                f"({change:+.0%})"
+            )
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark ingestion and matching"
+    )
+    parser.add_argument("--candidates", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--model",
+        default="hash",
+        help='"hash" for pseudo-random embeddings or a small '
+        "SentenceTransformer name, e.g. all-MiniLM-L6-v2",
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=3,
+        help="Cursor pages to walk for the pagination check, 0 skips it",
+    )
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rerank", action="store_true")
+    parser.add_argument("--hybrid", action="store_true")
+    parser.add_argument(
+        "--skip-ingest",
+        action="store_true",
+        help="Only measure matching on data already in the database",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output", help="Result JSON path, stdout if omitted")
+    parser.add_argument("--baseline", help="Earlier result JSON to compare to")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    database = Database(**DB_CONFIG)
+    model = (
+        HashEmbeddingModel()
+        if args.model == "hash"
+        else LocalEmbeddingModel(args.model)
+    )
+    vector_index = VectorIndex(
+        index_type=VECTOR_INDEX_TYPE,
+        metric=VECTOR_METRIC,
+        storage=VECTOR_STORAGE,
+        rescore_factor=BINARY_RESCORE_FACTOR,
+        iterative_scan=VECTOR_ITERATIVE_SCAN,
+    )
+    # No match cache, every query is ranked
+    candidate_match = CandidateMatch(
+        database, vector_index, rerank_recall=RERANK_RECALL
+    )
+
+    result = {
+        "label": args.label,
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "config": {
+            "candidates": args.candidates,
+            "jobs": args.jobs,
+            "batch_size": args.batch_size,
+            "queries": args.queries,
+            "k": args.k,
+            "model": args.model,
+            "vector_index_type": VECTOR_INDEX_TYPE,
+            "vector_metric": VECTOR_METRIC,
+            "vector_storage": VECTOR_STORAGE,
+        },
+        "ingest": {},
+        "match": {},
+    }
+
+    if not args.skip_ingest:
+        print(f"Ingesting {args.candidates} candidates", file=sys.stderr)
+        result["ingest"]["candidates"] = ingest_candidates(
+            CandidateService(database, model),
+            args.candidates,
+            args.batch_size,
+            args.seed,
+        )
+        print(f"Ingesting {args.jobs} jobs", file=sys.stderr)
+        result["ingest"]["jobs"] = ingest_jobs(
+            StubJobService(database, model), args.jobs, args.seed
+        )
+
+    with database.get_connection() as connection:
+        job_ids = connection.execute(
+            select(JobModel.job_id).where(JobModel.status == "active")
+        ).scalars().all()
+    if not job_ids:
+        parser.error("No active jobs to match, run without --skip-ingest")
+
+    print(f"Running {args.queries} matches per mode", file=sys.stderr)
+    result["match"]["vector"] = measure(
+        lambda job_id: candidate_match.get_candidates_by_job(job_id, args.k),
+        job_ids,
+        args.queries,
+        args.seed,
+    )
+    if args.rerank:
+        result["match"]["rerank"] = measure(
+            lambda job_id: candidate_match.get_candidates_by_job(
+                job_id, args.k, rerank=True
+            ),
+            job_ids,
+            args.queries,
+            args.seed,
+        )
+    if args.hybrid:
+        hybrid_match = HybridMatch(database, candidate_match, vector_index)
+        result["match"]["hybrid"] = measure(
+            lambda job_id: hybrid_match.get_candidates_by_job(job_id, args.k),
+            job_ids,
+            args.queries,
+            args.seed,
+        )
+
+    regressions = []
+    if args.pages:
+        paging = check_pages(
+            candidate_match, job_ids[0], args.page_size, args.pages
+        )
+        result["match"]["paging"] = paging
+        if paging["short_page"] is not None:
+            regressions.append(
+                f"match.paging: page {paging['short_page']} of job "
+                f"{paging['job_id']} is short, {paging['returned']} rows "
+                f"returned of {paging['eligible']} eligible"
+            )
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions += compare(
+                result, json.load(baseline_file), args.tolerance
+            )
+    if regressions or args.baseline:
+        result["regressions"] = regressions
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Stand-ins for the LLM and the embedding model during benchmarks.
+
+They keep the services' code paths intact while removing the cost of an
+Ollama call per job and, by default, of a transformer forward pass, so
+results measure this repo's own overhead: text building, batching, SQL
+and indexes.
+"""
+
+import hashlib
+import re
+from typing import Dict, Optional
+
+import numpy as np
+
+from services.job_service import JobService
+
+
+class HashEmbeddingModel:
+    """Deterministic pseudo-random unit vectors seeded by the text hash.
+
+    Same text, same vector, so caches and re-runs behave like a real model.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def is_ready(self) -> bool:
+        return True
+
+    def load(self):
+        return self
+
+    def embed(self, text: str, truncate_dim: Optional[int]) -> np.ndarray:
+        seed = int.from_bytes(
+            hashlib.sha256(text.encode("utf-8")).digest()[:8], "little"
+        )
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        vector = vector[: truncate_dim or self.dim].astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def encode(
+        self,
+        sentences,
+        task: Optional[str] = None,
+        truncate_dim: Optional[int] = None,
+        **kwargs,
+    ):
+        if isinstance(sentences, str):
+            return self.embed(sentences, truncate_dim)
+        return np.stack(
+            [self.embed(sentence, truncate_dim) for sentence in sentences]
+        )
+
+
+class LocalEmbeddingModel:
+    """Small SentenceTransformer, e.g. all-MiniLM-L6-v2 (384 dims).
+
+    Generic models don't take jina's `task` argument, so it is dropped.
+    The model must have at least FULL_EMBEDDING_DIM dimensions.
+    """
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def is_ready(self) -> bool:
+        return True
+
+    def load(self):
+        return self.model
+
+    def encode(self, sentences, task: Optional[str] = None, **kwargs):
+        return self.model.encode(sentences, **kwargs)
+
+
+class StubJobService(JobService):
+    """JobService with the LLM extraction replaced by phrase matching.
+
+    Understands the descriptions written by benchmark.synthetic.
+    """
+
+    def extract_job_description(self, job_description: str) -> Dict:
+        tenure = re.search(r"(\d+) years", job_description)
+        program = re.search(r"degree in ([\w ]+)\.", job_description)
+        master = "master's degree" in job_description
+        bachelor = "bachelor's degree" in job_description
+        return {
+            "is_required_master": master,
+            "is_required_bachelor": bachelor,
+            "bachelor_program": [program.group(1)] if bachelor else [],
+            "master_program": [program.group(1)] if master else [],
+            "tenure": int(tenure.group(1)) if tenure else 0,
+        }
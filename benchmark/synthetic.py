@@ -0,0 +1,147 @@
+"""Synthetic candidates and jobs shaped like CandidateCreate / JobCreate.
+
+Generators are seeded and lazy, so 10M candidates never sit in memory and
+two runs with the same seed produce the same data.
+"""
+
+import random
+import uuid
+from datetime import date, timedelta
+from typing import Dict, Iterator, Tuple
+
+FIRST_NAMES = [
+    "Ava", "Ben", "Chen", "Dara", "Eli", "Fatima", "Gus", "Hana", "Ivan",
+    "Jae", "Kofi", "Lena", "Mateo", "Nia", "Omar", "Priya", "Quinn", "Rosa",
+    "Sam", "Tariq", "Uma", "Viktor", "Wen", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Abbott", "Baker", "Costa", "Dubois", "Evans", "Fischer", "Garcia",
+    "Haddad", "Ito", "Jensen", "Kim", "Lopez", "Muller", "Nguyen", "Okafor",
+    "Patel", "Rossi", "Silva", "Tanaka", "Weber",
+]
+ROLES = [
+    "Software Engineer", "Data Scientist", "Data Engineer",
+    "Machine Learning Engineer", "Backend Developer", "Frontend Developer",
+    "DevOps Engineer", "Product Analyst", "QA Engineer",
+    "Site Reliability Engineer",
+]
+COMPANIES = [
+    "Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries",
+    "Wayne Enterprises", "Tyrell", "Soylent", "Cyberdyne",
+]
+SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "Go", "Rust", "SQL",
+    "PostgreSQL", "Docker", "Kubernetes", "AWS", "GCP", "React", "Node.js",
+    "Machine Learning", "Statistics", "Data Visualization", "Spark",
+    "Airflow", "Terraform", "PyTorch", "scikit-learn", "Kafka", "Redis",
+]
+PROGRAMS = [
+    "Computer Science", "Statistics", "Mathematics", "Physics",
+    "Information Systems", "Electrical Engineering",
+]
+LOCATIONS = [
+    "San Francisco, CA", "New York, NY", "Austin, TX", "Berlin", "London",
+    "Singapore", "Jakarta", "Remote",
+]
+
+
+def generate_candidate(rng: random.Random) -> Dict:
+    """One candidate in the /insert-candidate request format."""
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    birth_year = rng.randint(1960, 2002)
+    email = f"{first_name}.{last_name}.{rng.getrandbits(32):x}@example.com"
+
+    # Consecutive experiences ending today-ish
+    experiences = []
+    start = date(birth_year + 22, rng.randint(1, 12), 1)
+    for _ in range(rng.randint(1, 3)):
+        end = start + timedelta(days=rng.randint(180, 2500))
+        experiences.append(
+            {
+                "company": rng.choice(COMPANIES),
+                "role": rng.choice(ROLES),
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+            }
+        )
+        start = end + timedelta(days=1)
+
+    education = []
+    if rng.random() < 0.8:
+        education.append(
+            {
+                "institution": f"University of {rng.choice(LOCATIONS)}",
+                "degree": f"B.Sc. in {rng.choice(PROGRAMS)}",
+                "year_of_graduation": birth_year + 22,
+            }
+        )
+        if rng.random() < 0.3:
+            education.append(
+                {
+                    "institution": f"University of {rng.choice(LOCATIONS)}",
+                    "degree": f"M.Sc. in {rng.choice(PROGRAMS)}",
+                    "year_of_graduation": birth_year + 24,
+                }
+            )
+
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "birthdate": date(birth_year, rng.randint(1, 12), 1).isoformat(),
+        "email": email.lower(),
+        "phone": f"+1{rng.randint(2000000000, 9999999999)}",
+        "address": f"{rng.randint(1, 999)} Main St, {rng.choice(LOCATIONS)}",
+        "skills": rng.sample(SKILLS, rng.randint(2, 8)),
+        "experiences": experiences,
+        "education": education,
+    }
+
+
+def generate_job(rng: random.Random) -> Dict:
+    """One job in the /insert-job request format."""
+    role = rng.choice(ROLES)
+    tenure = rng.choice([0, 0, 1, 2, 3, 5, 8])
+    degree = rng.choice(["", "", "a bachelor's degree", "a master's degree"])
+    program = rng.choice(PROGRAMS)
+
+    description = f"We are hiring a {role} to build and run our platform."
+    if tenure:
+        description += f" At least {tenure} years of experience required."
+    if degree:
+        description += f" Candidates need {degree} in {program}."
+
+    budget_min = rng.randrange(40000, 150000, 5000)
+    return {
+        "job_title": role,
+        "job_description": description,
+        "budget": {
+            "min": budget_min,
+            "max": budget_min + rng.randrange(10000, 60000, 5000),
+            "currency": "USD",
+        },
+        "location": rng.choice(LOCATIONS),
+        "company_name": rng.choice(COMPANIES),
+        "employment_type": rng.choice(["Full-time", "Part-time", "Contract"]),
+        "required_skills": rng.sample(SKILLS, rng.randint(2, 6)),
+    }
+
+
+def generate_candidates(
+    count: int, seed: int = 0
+) -> Iterator[Tuple[uuid.UUID, Dict]]:
+    """(candidate_id, candidate_data) pairs, generated lazily."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        candidate_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        yield candidate_id, generate_candidate(rng)
+
+
+def generate_jobs(
+    count: int, seed: int = 0
+) -> Iterator[Tuple[uuid.UUID, Dict]]:
+    """(job_id, job_data) pairs, generated lazily."""
+    rng = random.Random(seed + 1)
+    for _ in range(count):
+        job_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        yield job_id, generate_job(rng)
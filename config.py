@@ -1,6 +1,5 @@
 import os
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
 
 load_dotenv()
 
@@ -10,6 +9,82 @@ DB_CONFIG = {
     "host": os.getenv("URL_DB"),
     "port": os.getenv("PORT_DB"),
     "db": os.getenv("DATABASE_NAME_DB"),
+    "pool_size": int(os.getenv("POOL_SIZE_DB", 10)),
+    "max_overflow": int(os.getenv("POOL_MAX_OVERFLOW_DB", 20)),
+    "pool_pre_ping": os.getenv("POOL_PRE_PING_DB", "true") == "true",
+    "pool_recycle": int(os.getenv("POOL_RECYCLE_DB", 1800)),
+    "echo": os.getenv("ECHO_DB", "false") == "true",
 }
 
-MODEL = SentenceTransformer("jinaai/jina-embeddings-v3", trust_remote_code=True)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 64))
+# Rows per chunk of importer.py, and its text and embedding processes
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", 2))
+
+# Must match the index built in ddl.sql (index type and operator class)
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "hnsw")
+# 32-dim recall embeddings are stored L2-normalized for every metric, so
+# "ip" ranks like "cosine"; normalize rows stored before (see ddl.sql)
+VECTOR_METRIC = os.getenv("VECTOR_METRIC", "cosine")
+# Candidate embedding storage: "vector", "halfvec" or "binary", must match
+# the column types and index in ddl.sql
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "vector")
+# Binary storage reads this many index rows per returned row to rescore
+BINARY_RESCORE_FACTOR = int(os.getenv("BINARY_RESCORE_FACTOR", 10))
+# Cursor pages keep scanning the index past rows before the cursor
+# (hnsw/ivfflat.iterative_scan), needs pgvector >= 0.8. When false, short
+# pages fall back to an exact scan
+VECTOR_ITERATIVE_SCAN = os.getenv("VECTOR_ITERATIVE_SCAN", "true") == "true"
+
+# "postgres" ranks candidates in the database, "memory" in process
+MATCH_BACKEND = os.getenv("MATCH_BACKEND", "postgres")
+
+# Cached first pages of /match-candidates, 0 disables the cache
+MATCH_CACHE_SIZE = int(os.getenv("MATCH_CACHE_SIZE", 1024))
+
+# Rows recalled on the 32-dim index before a full-dim re-rank
+RERANK_RECALL = int(os.getenv("RERANK_RECALL", 300))
+
+# Weight of skill overlap against vector similarity in hybrid matching
+HYBRID_SKILL_WEIGHT = float(os.getenv("HYBRID_SKILL_WEIGHT", 0.3))
+# Candidates with the most shared skills scored by the hybrid lexical stage
+HYBRID_LEXICAL_RECALL = int(os.getenv("HYBRID_LEXICAL_RECALL", 1000))
+
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3.2:1b")
+# Concurrent LLM requests per worker when extracting a batch of jobs
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 4))
+# Job descriptions the rules parse with at least this confidence skip the
+# LLM, above 1 every description goes to the LLM
+RULE_EXTRACTION_MIN_CONFIDENCE = float(
+    os.getenv("RULE_EXTRACTION_MIN_CONFIDENCE", 0.8)
+)
+# Maximum cached LLM extractions, 0 disables the cache
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", 100000))
+
+EMBEDDING_MODEL_NAME = os.getenv(
+    "EMBEDDING_MODEL_NAME", "jinaai/jina-embeddings-v3"
+)
+# In-memory embedding cache entries, 0 disables the cache
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 50000))
+# Also keep embeddings in the embedding_cache table across restarts
+EMBEDDING_CACHE_PERSIST = os.getenv("EMBEDDING_CACHE_PERSIST", "false") == "true"
+# Micro-batching of encode calls in the embedding worker
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", 10))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", 1))
+# Ingestion tasks are retried with backoff up to this many attempts
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", 3))
+# How often the API reloads the memory index with worker writes
+MEMORY_INDEX_REFRESH_SECONDS = float(
+    os.getenv("MEMORY_INDEX_REFRESH_SECONDS", 5)
+)
+# Encode through a shared embedding server instead of an in-process model
+EMBEDDING_SERVER_URL = os.getenv("EMBEDDING_SERVER_URL")
+# Load the model when an ingestion worker starts instead of on its first
+# encode, its metrics server reports /ready once loaded
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "false") == "true"
+# Return stage timings of every request in a Server-Timing header, otherwise
+# only for requests sent with an X-Trace header
+TRACE_REQUESTS = os.getenv("TRACE_REQUESTS", "false") == "true"
+# Port of the ingestion worker's /metrics server, 0 disables it
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 0))
@@ -3,6 +3,8 @@ CREATE EXTENSION vector;
 CREATE TABLE jobs (
     job_id UUID PRIMARY KEY,
     previous_version_id UUID,
+    -- Source system (e.g. ATS) id of imported jobs, kept by later versions
+    external_id TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     status TEXT NOT NULL DEFAULT 'active',
@@ -15,14 +17,25 @@ CREATE TABLE jobs (
     company_name TEXT,
     employment_type TEXT,
     required_skills TEXT NOT NULL,
+    skill_terms TEXT[] NOT NULL DEFAULT '{}',
     is_bachelor BOOLEAN DEFAULT FALSE,
     is_master BOOLEAN DEFAULT FALSE,
     tenure INTEGER,
     bachelor_program TEXT,
     master_program TEXT,
-    job_embedding vector(32)
+    job_embedding vector(32),
+    -- Re-ranking embedding (FULL_EMBEDDING_DIM), never indexed
+    job_embedding_full vector(256)
 );
-CREATE INDEX ON jobs USING ivfflat (job_embedding vector_cosine_ops) WITH (lists = 100);
+-- Reverse matching only ranks active jobs, see candidates_embedding_idx for
+-- choosing the index type and operator class
+CREATE INDEX jobs_active_embedding_idx ON jobs USING hnsw (job_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64) WHERE status = 'active';
+-- Active jobs only, for scans over all open postings
+CREATE INDEX jobs_active_idx ON jobs (job_id) WHERE status = 'active';
+-- Forward hops of the version chain (next version of a job)
+CREATE INDEX jobs_previous_version_idx ON jobs (previous_version_id) WHERE previous_version_id IS NOT NULL;
+-- One active version per imported job, re-imports retire it by external_id
+CREATE UNIQUE INDEX jobs_active_external_idx ON jobs (external_id) WHERE status = 'active' AND external_id IS NOT NULL;
 
 
 CREATE TABLE candidates (
@@ -36,6 +49,7 @@ CREATE TABLE candidates (
     phone TEXT,
     address TEXT,
     skills TEXT NOT NULL,
+    skill_terms TEXT[] NOT NULL DEFAULT '{}',
     
     -- Current Experience
     current_company TEXT,
@@ -61,7 +75,122 @@ CREATE TABLE candidates (
     has_master BOOLEAN DEFAULT FALSE,
     
     candidate_tenure INTEGER,
-    candidate_embedding vector(32)
+    candidate_embedding vector(32),
+    -- Re-ranking embedding (FULL_EMBEDDING_DIM), never indexed
+    candidate_embedding_full vector(256),
+    -- SHA-256 of the text both embeddings were computed from
+    candidate_text_hash TEXT,
+    -- match_versions 'candidates' version of the last write
+    change_version BIGINT NOT NULL DEFAULT 0
 );
 
-CREATE INDEX ON candidates USING ivfflat (candidate_embedding vector_cosine_ops) WITH (lists = 100);
\ No newline at end of file
+-- Narrow projection of the columns matching filters and ranks on, written
+-- with every candidate by CandidateService. ANN scans walk these small rows
+-- and profile columns are read from candidates for the final top-k only.
+CREATE TABLE candidate_matching (
+    candidate_id UUID PRIMARY KEY REFERENCES candidates (candidate_id) ON DELETE CASCADE,
+    candidate_tenure INTEGER,
+    has_bachelor BOOLEAN DEFAULT FALSE,
+    has_master BOOLEAN DEFAULT FALSE,
+    skill_terms TEXT[] NOT NULL DEFAULT '{}',
+    change_version BIGINT NOT NULL DEFAULT 0,
+    candidate_embedding vector(32) NOT NULL
+);
+
+-- The operator class must match VECTOR_METRIC (cosine -> vector_cosine_ops,
+-- ip -> vector_ip_ops, l2 -> vector_l2_ops) and the index type must match
+-- VECTOR_INDEX_TYPE. For ivfflat, use instead:
+-- CREATE INDEX candidate_matching_embedding_idx ON candidate_matching USING ivfflat (candidate_embedding vector_cosine_ops) WITH (lists = 1000);
+CREATE INDEX candidate_matching_embedding_idx ON candidate_matching USING hnsw (candidate_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- Partial ANN indexes per education bucket, used when a job requires a degree
+CREATE INDEX candidate_matching_bachelor_embedding_idx ON candidate_matching USING hnsw (candidate_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64) WHERE has_bachelor = true;
+CREATE INDEX candidate_matching_master_embedding_idx ON candidate_matching USING hnsw (candidate_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64) WHERE has_master = true;
+
+-- 32-dim recall embeddings are stored L2-normalized for every metric (see
+-- utils.vector_index.truncate_embedding). Rows written by the earlier
+-- encode(truncate_dim=32) path are not, normalize them once with the API and
+-- workers stopped, so ip and l2 scores agree between old and new rows:
+-- UPDATE candidates SET candidate_embedding = l2_normalize(candidate_embedding);
+-- UPDATE candidate_matching SET candidate_embedding = l2_normalize(candidate_embedding);
+-- UPDATE jobs SET job_embedding = l2_normalize(job_embedding);
+--
+-- Full re-rank embeddings are L2-normalized the same way. Normalize rows
+-- written before, and re-embed candidates whose candidate_embedding_full is
+-- NULL by re-importing them (importer.py), re-ranking leaves them out until
+-- then:
+-- UPDATE candidates SET candidate_embedding_full = l2_normalize(candidate_embedding_full) WHERE candidate_embedding_full IS NOT NULL;
+-- UPDATE jobs SET job_embedding_full = l2_normalize(job_embedding_full) WHERE job_embedding_full IS NOT NULL;
+
+-- Quantized storage, set VECTOR_STORAGE to match and build the three
+-- embedding indexes above this way instead (same WHERE for the partial ones).
+--
+-- VECTOR_STORAGE=halfvec halves the tables and index: declare every
+-- candidate_embedding halfvec(32) and candidate_embedding_full halfvec(256), then
+-- CREATE INDEX candidate_matching_embedding_idx ON candidate_matching USING hnsw (candidate_embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+--
+-- VECTOR_STORAGE=binary keeps vector(32) columns and indexes the sign bits,
+-- 4 bytes per row, matches are rescored on the exact distance:
+-- CREATE INDEX candidate_matching_embedding_idx ON candidate_matching USING hnsw ((binary_quantize(candidate_embedding)::bit(32)) bit_hamming_ops) WITH (m = 16, ef_construction = 64);
+
+-- Exact scans for selective filters start from the tenure index
+CREATE INDEX candidate_matching_tenure_idx ON candidate_matching (candidate_tenure);
+
+-- Candidates written since a cached match result was computed
+CREATE INDEX candidate_matching_change_version_idx ON candidate_matching (change_version);
+
+-- Candidates changed since an in-memory index last refreshed
+CREATE INDEX candidates_change_version_idx ON candidates (change_version);
+
+-- Lexical stage of hybrid matching, candidates sharing a job skill (&&)
+CREATE INDEX candidate_matching_skill_terms_idx ON candidate_matching USING gin (skill_terms);
+
+
+-- LLM job description extractions keyed by description/prompt/model hash
+CREATE TABLE llm_extraction_cache (
+    cache_key TEXT PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX llm_extraction_cache_last_used_idx ON llm_extraction_cache (last_used_at);
+
+
+-- Versions bumped by candidate writes and job updates, compared against
+-- the versions cached match results were computed at
+CREATE TABLE match_versions (
+    scope TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO match_versions (scope, version) VALUES ('candidates', 0), ('jobs', 0);
+
+
+-- Optional persistent tier of the embedding cache (EMBEDDING_CACHE_PERSIST)
+CREATE TABLE embedding_cache (
+    cache_key TEXT PRIMARY KEY,
+    model_id TEXT NOT NULL,
+    task TEXT,
+    truncate_dim INTEGER,
+    embedding REAL[] NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+
+-- Durable ingestion work queue, claimed with FOR UPDATE SKIP LOCKED
+CREATE TABLE ingestion_tasks (
+    task_id UUID PRIMARY KEY,
+    operation TEXT NOT NULL,
+    entity_id UUID,
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    last_error TEXT,
+    available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    claimed_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX ingestion_tasks_pending_idx ON ingestion_tasks (created_at) WHERE status IN ('queued', 'processing');
+CREATE INDEX ingestion_tasks_entity_idx ON ingestion_tasks (entity_id, created_at);
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""Shared construction of the database, caches and services.
+
+Imported by the API (main.py) and the ingestion worker (worker.py) so both
+run the same pipelines with the same configuration. Matchers are built by
+matching.py, in the API only.
+"""
+
+from config import (
+    DB_CONFIG,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_PERSIST,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_MAX_WAIT_MS,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_SERVER_URL,
+    EMBEDDING_WORKERS,
+    EXTRACTION_CACHE_SIZE,
+    INGEST_MAX_ATTEMPTS,
+    LLM_CONCURRENCY,
+    LLM_MODEL,
+    RULE_EXTRACTION_MIN_CONFIDENCE,
+)
+from services.candidate_service import CandidateService
+from services.job_service import JobService
+from utils.database import Database
+from utils.embedding_cache import CachedEmbeddingModel, EmbeddingCache
+from utils.embedding_model import LazyEmbeddingModel, RemoteEmbeddingModel
+from utils.embedding_worker import EmbeddingWorker
+from utils.extraction_cache import ExtractionCache
+from utils.metrics import registry
+from utils.task_queue import TaskQueue
+
+# Initialize services
+database = Database(**DB_CONFIG)
+extraction_cache = (
+    ExtractionCache(database, max_entries=EXTRACTION_CACHE_SIZE)
+    if EXTRACTION_CACHE_SIZE > 0
+    else None
+)
+# The model loads on first use, or lives in a shared embedding server
+model = (
+    RemoteEmbeddingModel(EMBEDDING_SERVER_URL)
+    if EMBEDDING_SERVER_URL
+    else LazyEmbeddingModel(EMBEDDING_MODEL_NAME)
+)
+# Encode calls are micro-batched on dedicated worker threads, and both
+# services share one embedding cache in front of them
+embedding_worker = EmbeddingWorker(
+    model,
+    max_batch_size=EMBEDDING_BATCH_SIZE,
+    max_wait_ms=EMBEDDING_MAX_WAIT_MS,
+    num_workers=EMBEDDING_WORKERS,
+)
+embedding_model = (
+    CachedEmbeddingModel(
+        embedding_worker,
+        EmbeddingCache(
+            EMBEDDING_MODEL_NAME,
+            max_entries=EMBEDDING_CACHE_SIZE,
+            database=database if EMBEDDING_CACHE_PERSIST else None,
+        ),
+    )
+    if EMBEDDING_CACHE_SIZE > 0
+    else embedding_worker
+)
+job_service = JobService(
+    database,
+    embedding_model,
+    llm_model=LLM_MODEL,
+    extraction_cache=extraction_cache,
+    llm_concurrency=LLM_CONCURRENCY,
+    min_rule_confidence=RULE_EXTRACTION_MIN_CONFIDENCE,
+)
+# Workers hold no in-memory index, the API's picks their writes up on
+# refresh
+candidate_service = CandidateService(database, embedding_model)
+task_queue = TaskQueue(database, max_attempts=INGEST_MAX_ATTEMPTS)
+
+
+# Caches reported by the gauges below, matching.py adds the match cache
+caches = {
+    "embedding": getattr(embedding_model, "cache", None),
+    "extraction": extraction_cache,
+}
+
+
+def cache_stats(field: str) -> dict:
+    """One stats() field of every enabled cache, keyed by cache name."""
+    stats = {
+        name: cache.stats()
+        for name, cache in caches.items()
+        if cache is not None
+    }
+    return {
+        name: values[field]
+        for name, values in stats.items()
+        if field in values
+    }
+
+
+# Read at scrape time by /metrics and the worker's metrics server
+registry.gauge(
+    "talent_cache_hit_ratio",
+    "Lookups served from the cache since start",
+    lambda: cache_stats("hit_ratio"),
+    ("cache",),
+)
+registry.gauge(
+    "talent_cache_entries",
+    "Entries held in memory by the cache",
+    lambda: cache_stats("entries"),
+    ("cache",),
+)
+registry.gauge(
+    "talent_embedding_queue_depth",
+    "Texts waiting for the embedding worker",
+    embedding_worker.queue_depth,
+)
+registry.gauge(
+    "talent_ingestion_tasks",
+    "Ingestion tasks not finished yet",
+    task_queue.pending_counts,
+    ("status",),
+)
+registry.gauge(
+    "talent_db_pool_connections",
+    "Connections of the database pool",
+    database.pool_stats,
+    ("state",),
+)
@@ -0,0 +1,67 @@
+"""Local embedding server sharing one loaded model between processes.
+
+Run with `uvicorn embedding_server:app --port 8001` and point the API and
+workers at it with EMBEDDING_SERVER_URL=http://localhost:8001.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_WAIT_MS,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_WORKERS,
+)
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+from utils.embedding_model import LazyEmbeddingModel
+from utils.embedding_worker import EmbeddingWorker
+
+model = LazyEmbeddingModel(EMBEDDING_MODEL_NAME)
+embedding_worker = EmbeddingWorker(
+    model,
+    max_batch_size=EMBEDDING_BATCH_SIZE,
+    max_wait_ms=EMBEDDING_MAX_WAIT_MS,
+    num_workers=EMBEDDING_WORKERS,
+)
+
+
+class EncodeRequest(BaseModel):
+    sentences: List[str]
+    task: Optional[str] = None
+    truncate_dim: Optional[int] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(model.load)
+    embedding_worker.start()
+    yield
+    embedding_worker.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.get("/ready")
+def ready() -> dict:
+    if not model.is_ready():
+        raise HTTPException(status_code=503, detail="Model is loading")
+    return {"ready": True}
+
+
+@app.post("/encode")
+async def encode(request: EncodeRequest) -> dict:
+    # Requests from all clients are micro-batched by the embedding worker
+    futures = [
+        asyncio.wrap_future(
+            embedding_worker.submit(
+                sentence, task=request.task, truncate_dim=request.truncate_dim
+            )
+        )
+        for sentence in request.sentences
+    ]
+    embeddings = await asyncio.gather(*futures)
+    return {"embeddings": [embedding.tolist() for embedding in embeddings]}
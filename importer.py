@@ -0,0 +1,99 @@
+"""Bulk import candidates or jobs from NDJSON or CSV files.
+
+Rows use the /insert-candidate and /insert-job request formats. CSV
+files hold nested fields (experiences, education, budget) as JSON and
+lists as JSON or ";"-separated values. Rows without a candidate_id or
+job_id need an external_id (e.g. the ATS id), or for candidates an
+email, which their id is derived from. A re-imported candidate is
+updated in place, an edited job becomes a new version of the active one
+with the same external_id. An interrupted import resumes from its
+checkpoint when run again.
+
+    python importer.py candidates candidates.ndjson --workers 4
+    python importer.py jobs jobs.csv --chunk-size 200
+"""
+
+import argparse
+import json
+
+from config import (
+    DB_CONFIG,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_SERVER_URL,
+    EXTRACTION_CACHE_SIZE,
+    IMPORT_CHUNK_SIZE,
+    IMPORT_WORKERS,
+    LLM_CONCURRENCY,
+    LLM_MODEL,
+    RULE_EXTRACTION_MIN_CONFIDENCE,
+)
+from utils.bulk_import import CANDIDATES, JOBS, BulkImporter
+from utils.database import Database
+from utils.extraction_cache import ExtractionCache
+from utils.job_extraction import JobExtractor
+
+
+def main():
+    # Not built from dependencies, pool processes re-import this module
+    # and must not open connections or load models of their own
+    parser = argparse.ArgumentParser(
+        description="Import candidates or jobs from NDJSON or CSV"
+    )
+    parser.add_argument("kind", choices=[CANDIDATES, JOBS])
+    parser.add_argument("path")
+    parser.add_argument(
+        "--format",
+        choices=["ndjson", "csv"],
+        help="Detected from the extension if omitted",
+    )
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=IMPORT_WORKERS,
+        help="Text and embedding processes, 0 runs them in this process",
+    )
+    parser.add_argument(
+        "--checkpoint", help="Defaults to <path>.checkpoint.json"
+    )
+    parser.add_argument("--rejects", help="Defaults to <path>.rejects.ndjson")
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint and import from the first row",
+    )
+    args = parser.parse_args()
+
+    database = Database(**DB_CONFIG)
+    extraction_cache = (
+        ExtractionCache(database, max_entries=EXTRACTION_CACHE_SIZE)
+        if EXTRACTION_CACHE_SIZE > 0
+        else None
+    )
+    job_extractor = JobExtractor(
+        LLM_MODEL,
+        max_concurrency=LLM_CONCURRENCY,
+        extraction_cache=extraction_cache,
+        min_rule_confidence=RULE_EXTRACTION_MIN_CONFIDENCE,
+    )
+    importer = BulkImporter(
+        database,
+        job_extractor,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        embedding_server_url=EMBEDDING_SERVER_URL,
+        embedding_model_name=EMBEDDING_MODEL_NAME,
+    )
+    summary = importer.run(
+        args.kind,
+        args.path,
+        file_format=args.format,
+        checkpoint_path=args.checkpoint,
+        rejects_path=args.rejects,
+        restart=args.restart,
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,122 +1,208 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
 from uuid import UUID, uuid4
 
-from config import DB_CONFIG, MODEL
-from fastapi import BackgroundTasks, FastAPI, HTTPException
+from config import MEMORY_INDEX_REFRESH_SECONDS, TRACE_REQUESTS
+from dependencies import database, job_service, task_queue
+from matching import (
+    batch_match,
+    candidate_match,
+    hybrid_match,
+    job_match,
+    memory_index,
+)
+from utils.candidate_match import MAX_ANN_FETCH, CandidateMatch
+from utils.metrics import CONTENT_TYPE, registry, request_seconds, start_trace
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from schemas.candidate_schema import CandidateCreate
 from schemas.job_schema import JobCreate
-from services.candidate_service import CandidateService
-from services.job_service import JobService
+from sqlalchemy import select, text
 from sqlalchemy.exc import SQLAlchemyError
-from utils.database import Database
-from models.job_model import JobModel
 from models.candidate_model import CandidateModel
-from utils.candidate_match import CandidateMatch
 
-app = FastAPI()
 
-# Initialize services
-database = Database(**DB_CONFIG)
-job_service = JobService(database, MODEL)
-candidate_service = CandidateService(database, MODEL)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Encoding happens in the ingestion workers, the API never loads the
+    # model. The in-memory index is loaded before requests are served
+    refresh = None
+    if memory_index is not None:
+        memory_index.load(database)
+        refresh = asyncio.create_task(refresh_memory_index())
+    yield
+    if refresh is not None:
+        refresh.cancel()
+
+
+async def refresh_memory_index() -> None:
+    """Pick up candidates written by ingestion workers in other processes."""
+    while True:
+        await asyncio.sleep(MEMORY_INDEX_REFRESH_SECONDS)
+        try:
+            await asyncio.to_thread(memory_index.load, database)
+        except Exception as e:
+            print(f"Error refreshing memory index: {str(e)}")
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    """Time every request and return its spans when tracing is on."""
+    started = time.perf_counter()
+    with start_trace() as trace:
+        response = await call_next(request)
+        if TRACE_REQUESTS or "x-trace" in request.headers:
+            trace.add("request", time.perf_counter() - started)
+            response.headers["Server-Timing"] = trace.server_timing()
+
+    # Label by route template so ids don't create a series each
+    route = request.scope.get("route")
+    request_seconds.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=response.status_code,
+    )
+    return response
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    """Metrics of this API process in the Prometheus text format."""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/ready")
+def ready() -> dict:
+    """Report whether the database answers, the API's only dependency.
+
+    The in-memory index, when enabled, is loaded before the API starts
+    serving. Model readiness is reported by the ingestion worker.
+    """
+    try:
+        with database.get_connection() as connection:
+            connection.execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Database unreachable")
+    return {"ready": True}
 
 
 @app.post("/insert-job")
-async def insert_job(
-    job_data: JobCreate, background_tasks: BackgroundTasks
-) -> dict:
+def insert_job(job_data: JobCreate) -> dict:
     job_id = uuid4()
 
-    background_tasks.add_task(
-        job_service.process_job, job_id=job_id, job_data=job_data.dict()
-    )
+    task_queue.enqueue("insert_job", job_id, jsonable_encoder(job_data))
 
     return {
         "success": True,
         "job_id": str(job_id),
-        "message": "Job processing started",
+        "message": "Job processing queued",
     }
 
 
 @app.post("/update-job/{previous_job_id}")
-async def update_job(
-    previous_job_id: UUID,
-    job_data: JobCreate,
-    background_tasks: BackgroundTasks,
-) -> dict:
+def update_job(previous_job_id: UUID, job_data: JobCreate) -> dict:
     new_job_id = uuid4()
 
-    background_tasks.add_task(
-        job_service.update_job,
-        new_job_id=new_job_id,
-        previous_job_id=previous_job_id,
-        job_data=job_data.dict(),
+    task_queue.enqueue(
+        "update_job",
+        new_job_id,
+        {
+            "previous_job_id": str(previous_job_id),
+            "job_data": jsonable_encoder(job_data),
+        },
     )
 
     return {
         "success": True,
         "previous_job_id": str(previous_job_id),
         "new_job_id": str(new_job_id),
-        "message": "Job update started",
+        "message": "Job update queued",
     }
 
 
 @app.post("/insert-candidate")
-async def insert_candidate(
-    candidate_data: CandidateCreate, background_tasks: BackgroundTasks
-) -> dict:
+def insert_candidate(candidate_data: CandidateCreate) -> dict:
     candidate_id = uuid4()
 
-    background_tasks.add_task(
-        candidate_service.process_candidate,
-        candidate_id=candidate_id,
-        candidate_data=CandidateCreate.dict(),
+    task_queue.enqueue(
+        "insert_candidate", candidate_id, jsonable_encoder(candidate_data)
     )
 
     return {
         "success": True,
         "candidate_id": str(candidate_id),
-        "message": "Job processing started",
+        "message": "Candidate processing queued",
+    }
+
+
+@app.post("/insert-candidates")
+def insert_candidates(candidates_data: List[CandidateCreate]) -> dict:
+    candidates = [
+        (uuid4(), jsonable_encoder(candidate_data))
+        for candidate_data in candidates_data
+    ]
+
+    # One task per candidate, workers claim them in batches
+    task_queue.enqueue_many("insert_candidate", candidates)
+
+    return {
+        "success": True,
+        "candidate_ids": [str(candidate_id) for candidate_id, _ in candidates],
+        "message": "Candidate batch processing queued",
     }
 
 
 @app.post("/update-candidate/{candidate_id}")
-async def update_candidate(
-    candidate_id: UUID,
-    candidate_data: CandidateCreate,
-    background_tasks: BackgroundTasks,
+def update_candidate(
+    candidate_id: UUID, candidate_data: CandidateCreate
 ) -> dict:
-
-    background_tasks.add_task(
-        candidate_service.update_candidate,
-        candidate_id=candidate_id,
-        candidate_data=candidate_data.dict(),
+    task_queue.enqueue(
+        "update_candidate",
+        candidate_id,
+        jsonable_encoder(candidate_data, exclude_none=True),
     )
 
     return {
         "success": True,
-        "message": "Candidate update started",
+        "message": "Candidate update queued",
     }
 
 
 @app.get("/check-job/{job_id}")
-def check_job_status(job_id: UUID) -> dict:
+async def check_job_status(job_id: UUID) -> dict:
     """Check job status and version history."""
     try:
-        with database.get_session() as session:
-            # Get job by id
-            job = (
-                session.query(JobModel)
-                .filter(JobModel.job_id == job_id)
-                .first()
+        async with database.get_async_connection() as connection:
+            # Whole version chain of the job, oldest first
+            versions = await connection.run_sync(
+                job_service.get_version_chain, job_id
             )
 
-            if not job:
+            ingestion = await task_queue.get_status_async(job_id, connection)
+
+            if not versions:
+                if ingestion:
+                    # Queued, still processing or failed
+                    return {"job_id": str(job_id), "ingestion": ingestion}
                 raise HTTPException(
                     status_code=404, detail=f"Job with ID {job_id} not found"
                 )
 
+            current = next(
+                (job for job in versions if job.status == "active"), None
+            )
             return {
                 "job_id": str(job_id),
+                "ingestion": ingestion,
+                "current_version_id": str(current.job_id) if current else None,
                 "versions": [
                     {
                         "job_id": str(job.job_id),
@@ -129,6 +215,7 @@ def check_job_status(job_id: UUID) -> dict:
                         "created_at": job.created_at,
                         "updated_at": job.updated_at,
                     }
+                    for job in versions
                 ],
             }
 
@@ -137,17 +224,30 @@ def check_job_status(job_id: UUID) -> dict:
 
 
 @app.get("/check-candidate/{candidate_id}")
-def check_candidate_status(candidate_id: UUID) -> dict:
+async def check_candidate_status(candidate_id: UUID) -> dict:
     """Check if candidate exists in database."""
     try:
-        with database.get_session() as session:
+        async with database.get_async_connection() as connection:
             candidate = (
-                session.query(CandidateModel)
-                .filter(CandidateModel.candidate_id == candidate_id)
-                .first()
+                await connection.execute(
+                    select(
+                        CandidateModel.created_at, CandidateModel.updated_at
+                    ).where(CandidateModel.candidate_id == candidate_id)
+                )
+            ).first()
+
+            ingestion = await task_queue.get_status_async(
+                candidate_id, connection
             )
 
             if not candidate:
+                if ingestion:
+                    # Queued, still processing or failed
+                    return {
+                        "exists": False,
+                        "candidate_id": str(candidate_id),
+                        "ingestion": ingestion,
+                    }
                 raise HTTPException(
                     status_code=404,
                     detail=f"Candidate with ID {candidate_id} not found",
@@ -156,6 +256,7 @@ def check_candidate_status(candidate_id: UUID) -> dict:
             return {
                 "exists": True,
                 "candidate_id": str(candidate_id),
+                "ingestion": ingestion,
                 "created_at": candidate.created_at,
                 "updated_at": candidate.updated_at,
             }
@@ -165,19 +266,123 @@ def check_candidate_status(candidate_id: UUID) -> dict:
 
 
 @app.get("/match-candidates/{job_id}")
-def match_candidates(
-    job_id: UUID, total_candidate: int = 10  # default value
+async def match_candidates(
+    job_id: UUID,
+    total_candidate: int = 10,  # default value
+    cursor: Optional[str] = None,
+    ef_search: Optional[int] = Query(None, ge=1, le=MAX_ANN_FETCH),
+    probes: Optional[int] = Query(None, ge=1),
+    rerank: bool = False,
 ) -> dict:
     """Get matching candidates for a job.
 
     Args:
         job_id: Job to match candidates against
         total_candidate: Number of top candidates to return
+        cursor: next_cursor of the previous page to continue from
+        ef_search: HNSW search list size, higher is slower but more exact
+        probes: IVFFlat lists to probe, higher is slower but more exact
+        rerank: Re-rank the 32-dim recall on full-dim embeddings, returns
+            a single page
     """
+    if rerank and cursor:
+        raise HTTPException(
+            status_code=400, detail="rerank can't be combined with cursor"
+        )
+
     try:
-        matcher = CandidateMatch(database)
-        matches = matcher.get_candidates_by_job(
-            job_id=job_id, total_candidate=total_candidate
+        after = CandidateMatch.decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        page = await candidate_match.get_candidates_page_async(
+            job_id=job_id,
+            total_candidate=total_candidate,
+            cursor=after,
+            ef_search=ef_search,
+            probes=probes,
+            rerank=rerank,
+        )
+
+        return {
+            "job_id": str(job_id),
+            "total_candidates": len(page["candidates"]),
+            "candidates": page["candidates"],
+            "next_cursor": page["next_cursor"],
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error matching candidates: {str(e)}"
+        )
+
+
+@app.get("/match-candidates/{job_id}/stream")
+def stream_match_candidates(
+    job_id: UUID,
+    limit: Optional[int] = None,
+    page_size: int = 500,
+    ef_search: Optional[int] = Query(None, ge=1, le=MAX_ANN_FETCH),
+    probes: Optional[int] = Query(None, ge=1),
+) -> StreamingResponse:
+    """Stream matching candidates for a job as NDJSON, best first.
+
+    Args:
+        job_id: Job to match candidates against
+        limit: Maximum number of candidates, all matches when omitted
+        page_size: Candidates fetched per database round trip
+    """
+    candidates = candidate_match.stream_candidates_by_job(
+        job_id=job_id,
+        limit=limit,
+        page_size=page_size,
+        ef_search=ef_search,
+        probes=probes,
+    )
+
+    try:
+        # Fetch the first row eagerly so unknown jobs still return 404
+        first = next(candidates, None)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    def lines():
+        if first is None:
+            return
+        yield json.dumps(first) + "\n"
+        for candidate in candidates:
+            yield json.dumps(candidate) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/match-candidates/{job_id}/hybrid")
+async def match_candidates_hybrid(
+    job_id: UUID,
+    total_candidate: int = 10,
+    skill_weight: Optional[float] = None,
+) -> dict:
+    """Get matching candidates for a job ranked on embedding and skills.
+
+    Args:
+        job_id: Job to match candidates against
+        total_candidate: Number of top candidates to return
+        skill_weight: Weight of skill overlap in [0, 1], 0 ranks on
+            embeddings only
+    """
+    if skill_weight is not None and not 0 <= skill_weight <= 1:
+        raise HTTPException(
+            status_code=400, detail="skill_weight must be in [0, 1]"
+        )
+
+    try:
+        matches = await hybrid_match.get_candidates_by_job_async(
+            job_id=job_id,
+            total_candidate=total_candidate,
+            skill_weight=skill_weight,
         )
 
         return {
@@ -192,3 +397,64 @@ def match_candidates(
         raise HTTPException(
             status_code=500, detail=f"Error matching candidates: {str(e)}"
         )
+
+
+@app.get("/match-jobs/{candidate_id}")
+async def match_jobs(
+    candidate_id: UUID,
+    total_job: int = 10,
+    ef_search: Optional[int] = Query(None, ge=1, le=MAX_ANN_FETCH),
+    probes: Optional[int] = Query(None, ge=1),
+) -> dict:
+    """Get matching active jobs for a candidate.
+
+    Args:
+        candidate_id: Candidate to match jobs against
+        total_job: Number of top jobs to return
+        ef_search: HNSW search list size, higher is slower but more exact
+        probes: IVFFlat lists to probe, higher is slower but more exact
+    """
+    try:
+        matches = await job_match.get_jobs_by_candidate_async(
+            candidate_id=candidate_id,
+            total_job=total_job,
+            ef_search=ef_search,
+            probes=probes,
+        )
+
+        return {
+            "candidate_id": str(candidate_id),
+            "total_jobs": len(matches),
+            "jobs": matches,
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error matching jobs: {str(e)}"
+        )
+
+
+@app.get("/match-all-jobs")
+def match_all_jobs(total_candidate: int = 10) -> dict:
+    """Get matching candidates for every active job in one pass.
+
+    Args:
+        total_candidate: Number of top candidates to return per job
+    """
+    try:
+        matches = batch_match.match_all_jobs(total_candidate=total_candidate)
+
+        return {
+            "total_jobs": len(matches),
+            "jobs": [
+                {"job_id": job_id, "candidates": candidates}
+                for job_id, candidates in matches.items()
+            ],
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error matching candidates: {str(e)}"
+        )
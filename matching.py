@@ -0,0 +1,70 @@
+"""Construction of the matchers served by the API.
+
+Imported by main.py only, so ingestion workers never build or fill an
+in-memory candidate index.
+"""
+
+from config import (
+    BINARY_RESCORE_FACTOR,
+    HYBRID_LEXICAL_RECALL,
+    HYBRID_SKILL_WEIGHT,
+    MATCH_BACKEND,
+    MATCH_CACHE_SIZE,
+    RERANK_RECALL,
+    VECTOR_INDEX_TYPE,
+    VECTOR_ITERATIVE_SCAN,
+    VECTOR_METRIC,
+    VECTOR_STORAGE,
+)
+from dependencies import caches, database
+from utils.batch_match import BatchMatch
+from utils.candidate_match import CandidateMatch
+from utils.hybrid_match import HybridMatch
+from utils.job_match import JobMatch
+from utils.match_cache import MatchCache
+from utils.memory_index import InMemoryCandidateIndex
+from utils.metrics import registry
+from utils.vector_index import VectorIndex
+
+memory_index = (
+    InMemoryCandidateIndex(metric=VECTOR_METRIC)
+    if MATCH_BACKEND == "memory"
+    else None
+)
+vector_index = VectorIndex(
+    index_type=VECTOR_INDEX_TYPE,
+    metric=VECTOR_METRIC,
+    storage=VECTOR_STORAGE,
+    rescore_factor=BINARY_RESCORE_FACTOR,
+    iterative_scan=VECTOR_ITERATIVE_SCAN,
+)
+# Jobs are few and always stored as float32 vectors
+job_vector_index = VectorIndex(
+    index_type=VECTOR_INDEX_TYPE, metric=VECTOR_METRIC
+)
+candidate_match = CandidateMatch(
+    database,
+    vector_index,
+    memory_index=memory_index,
+    match_cache=MatchCache(MATCH_CACHE_SIZE) if MATCH_CACHE_SIZE > 0 else None,
+    rerank_recall=RERANK_RECALL,
+)
+hybrid_match = HybridMatch(
+    database,
+    candidate_match,
+    vector_index,
+    skill_weight=HYBRID_SKILL_WEIGHT,
+    lexical_recall=HYBRID_LEXICAL_RECALL,
+)
+job_match = JobMatch(database, job_vector_index)
+batch_match = BatchMatch(
+    database, metric=VECTOR_METRIC, memory_index=memory_index
+)
+caches["match"] = candidate_match.match_cache
+
+if memory_index is not None:
+    registry.gauge(
+        "talent_memory_index_candidates",
+        "Candidates held by the in-memory index",
+        lambda: len(memory_index),
+    )
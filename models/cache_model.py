@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import ARRAY, BigInteger, Column, DateTime, Float, Integer, Text
+from sqlalchemy.ext.declarative import declarative_base
+
+Base = declarative_base()
+
+
+class ExtractionCacheModel(Base):
+    __tablename__ = "llm_extraction_cache"
+
+    cache_key = Column(Text, primary_key=True)
+    model_name = Column(Text, nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+    last_used_at = Column(DateTime, default=datetime.now)
+
+
+class EmbeddingCacheModel(Base):
+    __tablename__ = "embedding_cache"
+
+    cache_key = Column(Text, primary_key=True)
+    model_id = Column(Text, nullable=False)
+    task = Column(Text)
+    truncate_dim = Column(Integer)
+    embedding = Column(ARRAY(Float(precision=24)), nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class MatchVersionModel(Base):
+    __tablename__ = "match_versions"
+
+    scope = Column(Text, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,25 @@
+from sqlalchemy import ARRAY, UUID, BigInteger, Boolean, Column, Integer, Text
+from sqlalchemy.ext.declarative import declarative_base
+
+from models.candidate_model import EmbeddingType
+
+Base = declarative_base()
+
+
+class CandidateMatchingModel(Base):
+    """Narrow copy of the candidate columns matching filters and ranks on.
+
+    Kept in sync with candidates by CandidateService, so ANN scans walk
+    small rows instead of the wide profile.
+    """
+
+    __tablename__ = "candidate_matching"
+
+    candidate_id = Column(UUID, primary_key=True)
+    candidate_tenure = Column(Integer)
+    has_bachelor = Column(Boolean, default=False)
+    has_master = Column(Boolean, default=False)
+    # Lexical stage of hybrid matching
+    skill_terms = Column(ARRAY(Text), nullable=False, default=list)
+    change_version = Column(BigInteger, nullable=False, default=0)
+    candidate_embedding = Column(EmbeddingType(32), nullable=False)
@@ -1,12 +1,17 @@
 import uuid
 from datetime import datetime
 
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import UUID, Boolean, Column, Date, DateTime, Integer, Text
+from pgvector.sqlalchemy import HALFVEC, Vector
+from sqlalchemy import ARRAY, UUID, BigInteger, Boolean, Column, Date, DateTime, Integer, Text
 from sqlalchemy.ext.declarative import declarative_base
 
+from config import VECTOR_STORAGE
+
 Base = declarative_base()
 
+# Column type of the candidate embeddings, must match ddl.sql
+EmbeddingType = HALFVEC if VECTOR_STORAGE == "halfvec" else Vector
+
 
 class CandidateModel(Base):
     __tablename__ = "candidates"
@@ -21,6 +26,8 @@ class CandidateModel(Base):
     phone = Column(Text)
     address = Column(Text)
     skills = Column(Text, nullable=False)
+    # Normalized skills, see utils.skills.normalize_skills
+    skill_terms = Column(ARRAY(Text), nullable=False, default=list)
 
     # Current Experience
     current_company = Column(Text)
@@ -46,4 +53,11 @@ class CandidateModel(Base):
     has_master = Column(Boolean, default=False)
 
     candidate_tenure = Column(Integer)
-    candidate_embedding = Column(Vector(32), nullable=False)
+    candidate_embedding = Column(EmbeddingType(32), nullable=False)
+    # Higher dimension embedding, only read to re-rank recalled rows
+    candidate_embedding_full = Column(EmbeddingType(256))
+    # SHA-256 of the embedded candidate text, NULL for rows stored before
+    # it was recorded (their next update re-embeds)
+    candidate_text_hash = Column(Text)
+    # match_versions "candidates" version of the write that last stored it
+    change_version = Column(BigInteger, nullable=False, default=0)
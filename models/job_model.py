@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import UUID, Boolean, Column, DateTime, Integer, Text
+from sqlalchemy import ARRAY, UUID, Boolean, Column, DateTime, Integer, Text
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -13,6 +13,8 @@ class JobModel(Base):
 
     job_id = Column(UUID, primary_key=True, default=uuid.uuid4)
     previous_version_id = Column(UUID)
+    # Source system (e.g. ATS) id of imported jobs, kept by later versions
+    external_id = Column(Text)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now)
     status = Column(Text, nullable=False, default="active")
@@ -25,9 +27,13 @@ class JobModel(Base):
     company_name = Column(Text)
     employment_type = Column(Text)
     required_skills = Column(Text, nullable=False)
+    # Normalized required skills, see utils.skills.normalize_skills
+    skill_terms = Column(ARRAY(Text), nullable=False, default=list)
     is_bachelor = Column(Boolean, default=False)
     is_master = Column(Boolean, default=False)
     bachelor_program = Column(Text)
     master_program = Column(Text)
     tenure = Column(Integer)
     job_embedding = Column(Vector(32), nullable=False)
+    # Higher dimension embedding, only read to re-rank recalled rows
+    job_embedding_full = Column(Vector(256))
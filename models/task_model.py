@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import UUID, Column, DateTime, Integer, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.declarative import declarative_base
+
+Base = declarative_base()
+
+
+class IngestionTaskModel(Base):
+    __tablename__ = "ingestion_tasks"
+
+    task_id = Column(UUID, primary_key=True, default=uuid.uuid4)
+    operation = Column(Text, nullable=False)
+    entity_id = Column(UUID)
+    payload = Column(JSONB, nullable=False)
+    # queued, processing, done or failed
+    status = Column(Text, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    last_error = Column(Text)
+    available_at = Column(DateTime, default=datetime.now)
+    claimed_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now)
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+import re
+from pydantic import BaseModel, field_validator
 from typing import List
 
 
@@ -16,3 +17,55 @@ class JobCreate(BaseModel):
     company_name: str
     employment_type: str
     required_skills: List[str]
+
+
+class JobRequirements(BaseModel):
+    """Requirements extracted from a job description by the LLM."""
+
+    is_required_master: bool = False
+    is_required_bachelor: bool = False
+    bachelor_program: List[str] = []
+    master_program: List[str] = []
+    tenure: int = 0
+
+    @field_validator(
+        "is_required_master", "is_required_bachelor", mode="before"
+    )
+    @classmethod
+    def parse_flag(cls, value):
+        # Small models answer "yes", "True" or null as often as true
+        if value is None:
+            return False
+        if isinstance(value, str):
+            return value.strip().lower() in ("true", "yes", "required", "1")
+        return value
+
+    @field_validator("bachelor_program", "master_program", mode="before")
+    @classmethod
+    def parse_programs(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = value.split(",")
+        programs = [str(program).strip() for program in value]
+        return [program for program in programs if program]
+
+    @field_validator("tenure", mode="before")
+    @classmethod
+    def parse_tenure(cls, value):
+        # "3+ years", 2.5 or null
+        if value is None:
+            return 0
+        if isinstance(value, str):
+            years = re.search(r"\d+", value)
+            return int(years.group()) if years else 0
+        if isinstance(value, float):
+            return int(value)
+        return value
+
+    @field_validator("tenure")
+    @classmethod
+    def check_tenure(cls, value):
+        if not 0 <= value <= 60:
+            raise ValueError(f"tenure out of range: {value}")
+        return value
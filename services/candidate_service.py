@@ -1,31 +1,87 @@
-from typing import Dict
+import hashlib
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from uuid import UUID
-from datetime import datetime
-from sentence_transformers import SentenceTransformer
+from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 
+from models.candidate_matching_model import CandidateMatchingModel
 from models.candidate_model import CandidateModel
+from utils.match_cache import CANDIDATES_SCOPE, bump_version
+from utils.metrics import timed
 
 from utils.prompt import TEXT_CANDIDATE
+from utils.skills import normalize_skills
+from utils.vector_index import FULL_EMBEDDING_DIM, truncate_embedding
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Updated in place, without touching the embedding
+CONTACT_FIELDS = (
+    "first_name",
+    "last_name",
+    "birthdate",
+    "email",
+    "phone",
+    "address",
+)
+# Part of TEXT_CANDIDATE, a change requires a new embedding
+EMBEDDED_FIELDS = ("skills", "experiences", "education")
+# Attempts of an update whose row keeps changing under it
+UPDATE_ATTEMPTS = 3
+# Columns copied to candidate_matching, a change requires a new version
+MATCHING_FIELDS = tuple(
+    column
+    for column in CandidateMatchingModel.__table__.columns.keys()
+    if column not in ("candidate_id", "change_version")
+)
 
 
 class CandidateService:
-    def __init__(self, database, model: SentenceTransformer):
+    def __init__(self, database, model: "SentenceTransformer", index=None):
         self.database = database
         self.model = model
+        # Optional InMemoryCandidateIndex kept in sync with every write
+        self.index = index
+
+    @staticmethod
+    def parse_date(value) -> date:
+        """Parse a date given as ISO string or date object."""
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(value, "%Y-%m-%d").date()
 
     def calculate_tenure(self, experiences: list) -> int:
         """Calculate total working experience in years."""
         total_months = 0
         for exp in experiences:
-            start_date = datetime.strptime(exp["start_date"], "%Y-%m-%d")
-            end_date = datetime.strptime(exp["end_date"], "%Y-%m-%d")
+            start_date = self.parse_date(exp["start_date"])
+            end_date = self.parse_date(exp["end_date"])
             diff = relativedelta(end_date, start_date)
             total_months += diff.years * 12 + diff.months
 
         return total_months // 12
 
-    def create_candidate_text(self, candidate_data: Dict) -> str:
+    @staticmethod
+    def comparable(value):
+        """JSON-like form of a value without None entries, for diffs."""
+        if isinstance(value, dict):
+            return {
+                key: CandidateService.comparable(item)
+                for key, item in value.items()
+                if item is not None
+            }
+        if isinstance(value, (list, tuple)):
+            return [CandidateService.comparable(item) for item in value]
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+    def create_candidate_text(
+        self, candidate_data: Dict, tenure: Optional[int] = None
+    ) -> str:
         """Create formatted candidate text for embedding."""
         current_exp = candidate_data["experiences"][-1]
         previous_exp = (
@@ -39,7 +95,11 @@ class CandidateService:
             education.append(f"{edu['degree']} from {edu['institution']}")
 
         candidate_text = TEXT_CANDIDATE.format(
-            years=self.calculate_tenure(candidate_data["experiences"]),
+            years=(
+                tenure
+                if tenure is not None
+                else self.calculate_tenure(candidate_data["experiences"])
+            ),
             current_role=current_exp["role"],
             current_company=current_exp["company"],
             previous_role=previous_exp["role"] if previous_exp else "None",
@@ -48,14 +108,40 @@ class CandidateService:
         )
         return candidate_text
 
+    @staticmethod
+    def text_hash(candidate_text: str) -> str:
+        """Hash of an embedded candidate text, stored to skip re-embeds."""
+        return hashlib.sha256(candidate_text.encode("utf-8")).hexdigest()
+
     def create_candidate_model(
         self,
         candidate_id: UUID,
         candidate_data: Dict,
         candidate_embedding: list,
         status: str = "active",
+        candidate_embedding_full: list = None,
+        candidate_text: Optional[str] = None,
     ) -> CandidateModel:
         """Create Candidate instance from data."""
+        return CandidateModel(
+            **self.create_candidate_record(
+                candidate_id=candidate_id,
+                candidate_data=candidate_data,
+                candidate_embedding=candidate_embedding,
+                candidate_embedding_full=candidate_embedding_full,
+                candidate_text=candidate_text,
+            )
+        )
+
+    def create_candidate_record(
+        self,
+        candidate_id: UUID,
+        candidate_data: Dict,
+        candidate_embedding: list,
+        candidate_embedding_full: list = None,
+        candidate_text: Optional[str] = None,
+    ) -> Dict:
+        """Create candidate column values from data."""
         # Get experiences
         current_exp = candidate_data["experiences"][-1]
         previous_exp = (
@@ -73,7 +159,7 @@ class CandidateService:
             elif "M.Sc." in edu["degree"]:
                 master_edu = edu
 
-        return CandidateModel(
+        return dict(
             candidate_id=candidate_id,
             first_name=candidate_data["first_name"],
             last_name=candidate_data["last_name"],
@@ -82,6 +168,7 @@ class CandidateService:
             phone=candidate_data["phone"],
             address=candidate_data["address"],
             skills=", ".join(candidate_data["skills"]),
+            skill_terms=normalize_skills(candidate_data["skills"]),
             current_company=current_exp["company"],
             current_job_role=current_exp["role"],
             current_start_date=current_exp["start_date"],
@@ -115,6 +202,72 @@ class CandidateService:
                 candidate_data["experiences"]
             ),
             candidate_embedding=candidate_embedding,
+            candidate_embedding_full=candidate_embedding_full,
+            candidate_text_hash=(
+                self.text_hash(candidate_text)
+                if candidate_text is not None
+                else None
+            ),
+        )
+
+    def embed(self, texts, **kwargs):
+        """Embed at full dimension and derive the 32-dim recall embedding.
+
+        Returns:
+            (recall embeddings, full embeddings) for a list of texts
+        """
+        full_embeddings = self.model.encode(
+            texts,
+            task="separation",
+            truncate_dim=FULL_EMBEDDING_DIM,
+            **kwargs,
+        )
+        return (
+            [truncate_embedding(embedding) for embedding in full_embeddings],
+            [
+                truncate_embedding(embedding, FULL_EMBEDDING_DIM)
+                for embedding in full_embeddings
+            ],
+        )
+
+    @staticmethod
+    def create_matching_record(record: Dict) -> Dict:
+        """Columns of a candidate record kept in candidate_matching."""
+        return {
+            column: record[column]
+            for column in CandidateMatchingModel.__table__.columns.keys()
+        }
+
+    def store_matching(self, session, records: List[Dict]) -> None:
+        """Insert or refresh the matching projection of stored candidates."""
+        statement = insert(CandidateMatchingModel)
+        columns = CandidateMatchingModel.__table__.columns.keys()
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CandidateMatchingModel.candidate_id],
+                set_={
+                    column: statement.excluded[column]
+                    for column in columns
+                    if column != "candidate_id"
+                },
+            ),
+            [self.create_matching_record(record) for record in records],
+        )
+
+    def index_candidate(self, record: Dict) -> None:
+        """Mirror a stored candidate into the in-memory index."""
+        if self.index is None:
+            return
+
+        self.index.upsert(
+            candidate_id=record["candidate_id"],
+            embedding=record["candidate_embedding"],
+            tenure=record["candidate_tenure"],
+            has_bachelor=record["has_bachelor"],
+            has_master=record["has_master"],
+            first_name=record["first_name"],
+            last_name=record["last_name"],
+            email=record["email"],
         )
 
     def process_candidate(
@@ -123,71 +276,350 @@ class CandidateService:
         """Process and insert new candidate data to database."""
         try:
             # Create text for embedding
-            candidate_text = self.create_candidate_text(candidate_data)
+            with timed("candidate", "text"):
+                candidate_text = self.create_candidate_text(candidate_data)
 
-            # Generate embedding
-            candidate_embedding = self.model.encode(
-                candidate_text, task="separation", truncate_dim=32
-            )
+            # Generate embeddings
+            with timed("candidate", "encode"):
+                embeddings, full_embeddings = self.embed([candidate_text])
 
             # Create candidate model
-            candidate_model = self.create_candidate_model(
+            candidate_record = self.create_candidate_record(
                 candidate_id=candidate_id,
                 candidate_data=candidate_data,
-                candidate_embedding=candidate_embedding,
+                candidate_embedding=embeddings[0],
+                candidate_embedding_full=full_embeddings[0],
+                candidate_text=candidate_text,
             )
 
-            # Store in database
-            with self.database.get_session() as session:
-                session.add(candidate_model)
-                session.commit()
+            # Store in database, stamped with a new candidates version so
+            # cached match results pick it up
+            with timed("candidate", "insert"):
+                with self.database.get_session() as session:
+                    candidate_record["change_version"] = bump_version(
+                        session, CANDIDATES_SCOPE
+                    )
+                    inserted = session.execute(
+                        insert(CandidateModel)
+                        .values(**candidate_record)
+                        .on_conflict_do_nothing()
+                        .returning(CandidateModel.candidate_id)
+                    ).scalar()
+                    if inserted is None:
+                        # Stored by an earlier attempt of this task, keep
+                        # the version unchanged
+                        session.rollback()
+                        return True
+                    self.store_matching(session, [candidate_record])
+                    session.commit()
+
+            self.index_candidate(candidate_record)
             return True
 
         except Exception as e:
             print(f"Error processing candidate: {str(e)}")
-            return False
+            raise
+
+    def insert_candidate_batch(self, batch: List[Tuple[UUID, Dict]]) -> int:
+        """Embed a batch in one encode call and store it in one insert."""
+        # Create texts for embedding
+        with timed("candidate_batch", "text"):
+            candidate_texts = [
+                self.create_candidate_text(candidate_data)
+                for _, candidate_data in batch
+            ]
+
+        # Generate embeddings in one forward pass
+        with timed("candidate_batch", "encode"):
+            embeddings, full_embeddings = self.embed(
+                candidate_texts, batch_size=len(batch)
+            )
+
+        records = [
+            self.create_candidate_record(
+                candidate_id=candidate_id,
+                candidate_data=candidate_data,
+                candidate_embedding=embedding,
+                candidate_embedding_full=full_embedding,
+                candidate_text=candidate_text,
+            )
+            for (
+                (candidate_id, candidate_data),
+                candidate_text,
+                embedding,
+                full_embedding,
+            ) in zip(batch, candidate_texts, embeddings, full_embeddings)
+        ]
+
+        # Store in database with a single multi-row insert, skipping rows
+        # already stored by an earlier attempt
+        with timed("candidate_batch", "insert"):
+            with self.database.get_session() as session:
+                change_version = bump_version(session, CANDIDATES_SCOPE)
+                for record in records:
+                    record["change_version"] = change_version
+                session.execute(
+                    insert(CandidateModel).on_conflict_do_nothing(), records
+                )
+                self.store_matching(session, records)
+                session.commit()
+
+        for record in records:
+            self.index_candidate(record)
+        return len(records)
+
+    def stored_candidate_data(self, candidate: CandidateModel) -> Dict:
+        """Candidate data in the request format, rebuilt from a stored row.
+
+        Only the two latest experiences and the bachelor and master
+        degrees are stored, so that is all this returns.
+        """
+        experiences = []
+        if candidate.previous_company or candidate.previous_job_role:
+            experiences.append(
+                {
+                    "company": candidate.previous_company,
+                    "role": candidate.previous_job_role,
+                    "start_date": candidate.previous_start_date,
+                    "end_date": candidate.previous_end_date,
+                }
+            )
+        experiences.append(
+            {
+                "company": candidate.current_company,
+                "role": candidate.current_job_role,
+                "start_date": candidate.current_start_date,
+                "end_date": candidate.current_end_date,
+            }
+        )
+
+        education = []
+        if candidate.has_bachelor:
+            education.append(
+                {
+                    "institution": candidate.bachelor_institution,
+                    "degree": candidate.bachelor_degree,
+                    "year_of_graduation": candidate.bachelor_graduation_year,
+                }
+            )
+        if candidate.has_master:
+            education.append(
+                {
+                    "institution": candidate.master_institution,
+                    "degree": candidate.master_degree,
+                    "year_of_graduation": candidate.master_graduation_year,
+                }
+            )
+
+        candidate_data = {
+            field: getattr(candidate, field) for field in CONTACT_FIELDS
+        }
+        candidate_data["skills"] = (
+            candidate.skills.split(", ") if candidate.skills else []
+        )
+        candidate_data["experiences"] = experiences
+        candidate_data["education"] = education
+        return candidate_data
+
+    def changed_fields(
+        self, candidate: CandidateModel, stored: Dict, update_data: Dict
+    ) -> List[str]:
+        """Request fields whose value may differ from the stored candidate.
+
+        Stored experiences and education are partial, so an embedded field
+        listed here can still yield the stored candidate text.
+        """
+        changed = []
+        for field in CONTACT_FIELDS + EMBEDDED_FIELDS:
+            value = update_data.get(field)
+            if value is None:
+                continue
+
+            if field == "experiences":
+                # Older experiences only count through the tenure
+                same = (
+                    self.comparable(value[-2:])
+                    == self.comparable(stored["experiences"])
+                    and self.calculate_tenure(value)
+                    == candidate.candidate_tenure
+                )
+            elif field == "education":
+                same = sorted(
+                    self.comparable(value), key=lambda edu: sorted(edu.items())
+                ) == sorted(
+                    self.comparable(stored["education"]),
+                    key=lambda edu: sorted(edu.items()),
+                )
+            else:
+                same = self.comparable(value) == self.comparable(
+                    stored[field]
+                )
+
+            if not same:
+                changed.append(field)
+        return changed
+
+    def candidate_changes(
+        self, candidate: CandidateModel, update_candidate_data: Dict
+    ) -> Dict:
+        """Column values of an update that differ from the stored row.
+
+        When skills, experiences or education are sent, the candidate text
+        is rebuilt and re-embedded only if its hash differs from the stored
+        one.
+        """
+        stored = self.stored_candidate_data(candidate)
+        changed = self.changed_fields(candidate, stored, update_candidate_data)
+
+        changes = {
+            field: (
+                self.parse_date(update_candidate_data[field])
+                if field == "birthdate"
+                else update_candidate_data[field]
+            )
+            for field in changed
+            if field in CONTACT_FIELDS
+        }
+        if not any(field in EMBEDDED_FIELDS for field in changed):
+            return changes
+
+        candidate_data = {**stored, **changes}
+        for field in EMBEDDED_FIELDS:
+            if field in changed:
+                candidate_data[field] = update_candidate_data[field]
+
+        # Stored experiences may be partial, keep the tenure computed from
+        # the full list unless it was resent
+        tenure = (
+            None if "experiences" in changed else candidate.candidate_tenure
+        )
+        candidate_text = self.create_candidate_text(candidate_data, tenure)
+        # The stored embeddings already encode this text
+        embeddings, full_embeddings = [None], [None]
+        if self.text_hash(candidate_text) != candidate.candidate_text_hash:
+            with timed("candidate_update", "encode"):
+                embeddings, full_embeddings = self.embed([candidate_text])
+        record = self.create_candidate_record(
+            candidate_id=candidate.candidate_id,
+            candidate_data=candidate_data,
+            candidate_embedding=embeddings[0],
+            candidate_embedding_full=full_embeddings[0],
+            candidate_text=candidate_text,
+        )
+        if tenure is not None:
+            record["candidate_tenure"] = tenure
+
+        for column, value in record.items():
+            if column in ("candidate_embedding", "candidate_embedding_full"):
+                if value is not None:
+                    changes[column] = value
+            elif column != "candidate_id" and self.comparable(
+                value
+            ) != self.comparable(getattr(candidate, column)):
+                changes[column] = value
+        return changes
 
     def update_candidate(
         self, candidate_id: UUID, update_candidate_data: Dict
     ) -> bool:
-        """Update existing candidate.
+        """Update existing candidate with only the fields that changed.
+
+        Changes, embeddings included, are computed from an unlocked read.
+        The row is then locked and written only if its change_version is
+        still the one read, otherwise the update starts over. Every change
+        bumps the candidates version, the matching projection is rewritten
+        only when one of its columns changed.
 
         Args:
             candidate_id: ID of candidate to update
-            candidate_data: New candidate information
+            update_candidate_data: New candidate information, None or
+                missing fields are kept
 
         Returns:
-            bool indicating success/failure
+            True on success, errors are raised
         """
-
         try:
-            with self.database.get_session() as session:
-                # Check if candidate exists
-                existing_candidate = (
-                    session.query(CandidateModel)
-                    .filter(CandidateModel.candidate_id == candidate_id)
-                    .first()
-                )
+            for _ in range(UPDATE_ATTEMPTS):
+                with self.database.get_session() as session:
+                    candidate = (
+                        session.execute(
+                            select(CandidateModel).where(
+                                CandidateModel.candidate_id == candidate_id
+                            )
+                        )
+                        .scalars()
+                        .first()
+                    )
+                    if candidate is not None:
+                        # Keep the loaded columns past the session commit
+                        session.expunge(candidate)
 
-                if not existing_candidate:
+                if not candidate:
                     raise ValueError(
                         f"No candidate found with ID: {candidate_id}"
                     )
 
-                # Convert to dict and update with new data
-                candidate_data = existing_candidate.__dict__
-                candidate_data.pop("_sa_instance_state", None)
+                # No row lock is held while the model runs
+                changes = self.candidate_changes(
+                    candidate, update_candidate_data
+                )
+                if not changes:
+                    return True
 
-                # Update provided fields
-                for field, value in update_candidate_data.items():
-                    if value is not None:
-                        candidate_data[field] = value
+                with self.database.get_session() as session:
+                    # Lock the row so concurrent updates apply one after
+                    # another, and start over if one landed since the read
+                    locked_version = session.execute(
+                        select(CandidateModel.change_version)
+                        .where(CandidateModel.candidate_id == candidate_id)
+                        .with_for_update()
+                    ).scalar()
+                    if locked_version != candidate.change_version:
+                        continue
 
-                # Process updated data
-                return self.process_candidate(
-                    candidate_id=candidate_id, candidate_data=candidate_data
-                )
+                    matching = any(
+                        field in changes for field in MATCHING_FIELDS
+                    )
+                    changes["updated_at"] = datetime.now()
+                    changes["change_version"] = bump_version(
+                        session, CANDIDATES_SCOPE
+                    )
+                    session.execute(
+                        update(CandidateModel)
+                        .where(CandidateModel.candidate_id == candidate_id)
+                        .values(**changes)
+                        .execution_options(synchronize_session=False)
+                    )
+
+                    # Every column the projection and the memory index need
+                    current = {
+                        column: changes.get(column, getattr(candidate, column))
+                        for column in (
+                            "candidate_id",
+                            "first_name",
+                            "last_name",
+                            "email",
+                            "candidate_tenure",
+                            "has_bachelor",
+                            "has_master",
+                            "skill_terms",
+                            "change_version",
+                            "candidate_embedding",
+                        )
+                    }
+                    # Profile-only changes reach cached matches through the
+                    # candidates row, the projection is left as it is
+                    if matching:
+                        self.store_matching(session, [current])
+                    session.commit()
+
+                self.index_candidate(current)
+                return True
+
+            raise RuntimeError(
+                f"Candidate {candidate_id} changed during every update attempt"
+            )
 
         except Exception as e:
             print(f"Error updating candidate: {str(e)}")
-            return False
+            raise
@@ -1,45 +1,67 @@
-from json.decoder import JSONDecodeError
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 from uuid import UUID
 
-import ollama
-from sentence_transformers import SentenceTransformer
+from sqlalchemy import select, text
 
 from models.job_model import JobModel
+from utils.extraction_cache import ExtractionCache
+from utils.job_extraction import JobExtractor
+from utils.match_cache import JOBS_SCOPE, bump_version
+from utils.metrics import timed
 from utils.prompt import (
     ADDITIONAL_EDUCATION_TEXT_JOB,
     ADDITIONAL_TENURE_TEXT_JOB,
-    PROMPT_JOB_DESCRIPTION,
     TEXT_JOB,
 )
+from utils.skills import normalize_skills
+from utils.vector_index import FULL_EMBEDDING_DIM, truncate_embedding
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Version chain hops followed in each direction, guards against cycles
+MAX_VERSION_DEPTH = 1000
 
 
 class JobService:
-    def __init__(self, database, model: SentenceTransformer):
+    def __init__(
+        self,
+        database,
+        model: "SentenceTransformer",
+        llm_model: str = "llama3.2:1b",
+        extraction_cache: Optional[ExtractionCache] = None,
+        llm_concurrency: int = 4,
+        min_rule_confidence: float = 0.8,
+    ):
         self.database = database
         self.model = model
+        self.llm_model = llm_model
+        self.extraction_cache = extraction_cache
+        self.extractor = JobExtractor(
+            llm_model,
+            max_concurrency=llm_concurrency,
+            extraction_cache=extraction_cache,
+            min_rule_confidence=min_rule_confidence,
+        )
 
     def extract_job_description(self, job_description: str) -> Dict:
         """Extract structured information from job description using LLM."""
-        try:
-            response = ollama.generate(
-                model="llama3.2:1b",
-                prompt=PROMPT_JOB_DESCRIPTION.format(
-                    job_description=job_description
-                ),
-            )
-            return response["response"]
-        except Exception as e:
-            raise JSONDecodeError(
-                f"Failed to parse job description: {str(e)}", "", 0
-            )
+        return self.extractor.extract(job_description)
+
+    def extract_job_descriptions(self, job_descriptions: List[str]) -> List:
+        """Extract many descriptions with concurrent LLM requests.
+
+        Returns:
+            One dict per description, or the exception it raised
+        """
+        return self.extractor.extract_many(job_descriptions)
 
     def create_job_text(self, job_data: Dict, job_desc_info: Dict) -> str:
         """Create formatted job text for embedding."""
         job_text = TEXT_JOB.format(
             role=job_data["job_title"],
             description=job_data["job_description"],
-            required_skills=", ".join(job_data["required_skills"]),
+            skills=", ".join(job_data["required_skills"]),
         )
 
         if job_desc_info["tenure"] != 0:
@@ -71,6 +93,7 @@ class JobService:
         job_embedding: list,
         previous_version_id: Optional[UUID] = None,
         status: str = "active",
+        job_embedding_full: list = None,
     ) -> JobModel:
         """Create JobModel instance from job data."""
         return JobModel(
@@ -84,12 +107,14 @@ class JobService:
             company_name=job_data["company_name"],
             employment_type=job_data["employment_type"],
             required_skills=", ".join(job_data["required_skills"]),
+            skill_terms=normalize_skills(job_data["required_skills"]),
             is_bachelor=job_desc_info["is_required_bachelor"],
             is_master=job_desc_info["is_required_master"],
             bachelor_program=", ".join(job_desc_info["bachelor_program"]),
             master_program=", ".join(job_desc_info["master_program"]),
             tenure=job_desc_info["tenure"],
             job_embedding=job_embedding,
+            job_embedding_full=job_embedding_full,
             previous_version_id=previous_version_id,
             status=status,
         )
@@ -101,71 +126,204 @@ class JobService:
         )
         return job_embedding
 
+    def embed(self, job_texts: List[str]):
+        """Embed at full dimension and derive the 32-dim recall embedding.
+
+        Returns:
+            (recall embeddings, full embeddings) for a list of texts, both
+            L2-normalized
+        """
+        full_embeddings = self.get_embedding(
+            job_texts, size=FULL_EMBEDDING_DIM
+        )
+        return (
+            [truncate_embedding(embedding) for embedding in full_embeddings],
+            [
+                truncate_embedding(embedding, FULL_EMBEDDING_DIM)
+                for embedding in full_embeddings
+            ],
+        )
+
+    def build_job_model(
+        self,
+        job_id: UUID,
+        job_data: Dict,
+        previous_version_id: Optional[UUID] = None,
+        job_desc_info: Optional[Dict] = None,
+    ) -> JobModel:
+        """Extract, embed and build a job version without storing it.
+
+        job_desc_info skips the extraction when it was done beforehand,
+        e.g. concurrently for a batch.
+        """
+        # Process job information
+        if job_desc_info is None:
+            with timed("job", "extract"):
+                job_desc_info = self.extract_job_description(
+                    job_data["job_description"]
+                )
+        with timed("job", "text"):
+            job_text = self.create_job_text(job_data, job_desc_info)
+        # One full dimension encode, the 32-dim prefix is the recall vector
+        with timed("job", "encode"):
+            embeddings, full_embeddings = self.embed([job_text])
+
+        # Create job model
+        return self.create_job_model(
+            job_id=job_id,
+            job_data=job_data,
+            job_desc_info=job_desc_info,
+            job_embedding=embeddings[0],
+            job_embedding_full=full_embeddings[0],
+            previous_version_id=previous_version_id,
+        )
+
+    def job_exists(self, job_id: UUID) -> bool:
+        with self.database.get_connection() as connection:
+            return (
+                connection.execute(
+                    select(JobModel.job_id).where(JobModel.job_id == job_id)
+                ).first()
+                is not None
+            )
+
     def process_job(
         self,
         job_id: UUID,
         job_data: Dict,
         previous_version_id: Optional[UUID] = None,
+        job_desc_info: Optional[Dict] = None,
     ) -> bool:
-        """Process job data and store in database."""
+        """Process job data and store in database.
+
+        A job already stored, e.g. by an earlier attempt of the same task,
+        is left as is.
+        """
         try:
-            # Process job information
-            job_desc_info = self.extract_job_description(
-                job_data["job_description"]
-            )
-            job_text = self.create_job_text(job_data, job_desc_info)
-            job_embedding = self.get_embedding(job_text)
+            if self.job_exists(job_id):
+                return True
 
-            # Create and store job model
-            job_model = self.create_job_model(
+            job_model = self.build_job_model(
                 job_id=job_id,
                 job_data=job_data,
-                job_desc_info=job_desc_info,
-                job_embedding=job_embedding,
                 previous_version_id=previous_version_id,
+                job_desc_info=job_desc_info,
             )
 
-            with self.database.get_session() as session:
-                session.add(job_model)
-                session.commit()
+            with timed("job", "insert"):
+                with self.database.get_session() as session:
+                    session.add(job_model)
+                    session.commit()
 
             return True
 
         except Exception as e:
             print(f"Error processing job: {str(e)}")
-            return False
+            raise
+
+    @staticmethod
+    def get_version_chain(connection, job_id: UUID) -> List:
+        """Every version of a job, oldest first, in one recursive query.
+
+        Walks back through previous_version_id (primary key hops) and
+        forward through jobs_previous_version_idx, so the cost is one
+        indexed lookup per version in the chain.
+
+        Returns:
+            Rows with a depth relative to job_id, empty if it doesn't exist
+        """
+        return connection.execute(
+            text(
+                """
+                WITH RECURSIVE older AS (
+                    SELECT
+                        job_id, previous_version_id, status, created_at,
+                        updated_at, 0 AS depth
+                    FROM jobs
+                    WHERE job_id = :job_id
+                    UNION ALL
+                    SELECT
+                        j.job_id, j.previous_version_id, j.status,
+                        j.created_at, j.updated_at, o.depth - 1
+                    FROM jobs j
+                    JOIN older o ON j.job_id = o.previous_version_id
+                    WHERE o.depth > -:max_depth
+                ),
+                newer AS (
+                    SELECT
+                        job_id, previous_version_id, status, created_at,
+                        updated_at, 0 AS depth
+                    FROM jobs
+                    WHERE job_id = :job_id
+                    UNION ALL
+                    SELECT
+                        j.job_id, j.previous_version_id, j.status,
+                        j.created_at, j.updated_at, n.depth + 1
+                    FROM jobs j
+                    JOIN newer n ON j.previous_version_id = n.job_id
+                    WHERE n.depth < :max_depth
+                )
+                SELECT * FROM older
+                UNION
+                SELECT * FROM newer
+                ORDER BY depth
+                """
+            ),
+            {"job_id": job_id, "max_depth": MAX_VERSION_DEPTH},
+        ).fetchall()
 
     def update_job(
-        self, new_job_id: UUID, previous_job_id: UUID, job_data: Dict
+        self,
+        new_job_id: UUID,
+        previous_job_id: UUID,
+        job_data: Dict,
+        job_desc_info: Optional[Dict] = None,
     ) -> bool:
-        """Update existing job by creating new version and marking old as inactive."""
+        """Update existing job by creating new version and marking old as inactive.
+
+        An update whose new version is already stored, e.g. by an earlier
+        attempt of the same task, is left as is.
+        """
         try:
-            with self.database.get_session() as session:
-                # Get and validate existing job
-                existing_job = (
-                    session.query(JobModel)
-                    .filter(
-                        JobModel.job_id == previous_job_id,
-                        JobModel.status == "active",
-                    )
-                    .first()
-                )
+            if self.job_exists(new_job_id):
+                return True
 
-                if not existing_job:
-                    raise ValueError(
-                        f"No active job found with ID: {previous_job_id}"
+            # Build the new version first so a failed extraction leaves the
+            # current version active and the update can be retried
+            job_model = self.build_job_model(
+                job_id=new_job_id,
+                job_data=job_data,
+                previous_version_id=previous_job_id,
+                job_desc_info=job_desc_info,
+            )
+
+            with timed("job", "swap"):
+                with self.database.get_session() as session:
+                    # Get and validate existing job
+                    existing_job = (
+                        session.query(JobModel)
+                        .filter(
+                            JobModel.job_id == previous_job_id,
+                            JobModel.status == "active",
+                        )
+                        .with_for_update()
+                        .first()
                     )
 
-                # Update status and create new version
-                existing_job.status = "inactive"
-                session.commit()
+                    if not existing_job:
+                        raise ValueError(
+                            f"No active job found with ID: {previous_job_id}"
+                        )
 
-                return self.process_job(
-                    job_id=new_job_id,
-                    job_data=job_data,
-                    previous_version_id=previous_job_id,
-                )
+                    # Swap versions in one transaction
+                    existing_job.status = "inactive"
+                    job_model.external_id = existing_job.external_id
+                    session.add(job_model)
+                    bump_version(session, JOBS_SCOPE)
+                    session.commit()
+
+            return True
 
         except Exception as e:
             print(f"Error updating job: {str(e)}")
-            return False
+            raise
@@ -0,0 +1,106 @@
+import pytest
+
+from utils.job_extraction import rule_based_extraction
+
+# JobExtractor's default min_rule_confidence, below it the LLM decides
+MIN_RULE_CONFIDENCE = 0.8
+
+
+@pytest.mark.parametrize(
+    "description, tenure",
+    [
+        ("5+ years of experience in Python.", 5),
+        ("3 years of professional Python experience.", 3),
+        ("3 years' experience with Go.", 3),
+        ("Experience: 2-4 years in backend development.", 2),
+        ("Minimum 7 yrs experience required.", 7),
+    ],
+)
+def test_tenure_in_experience_context(description, tenure):
+    requirements, confidence = rule_based_extraction(description)
+    assert requirements["tenure"] == tenure
+    assert confidence >= MIN_RULE_CONFIDENCE
+
+
+@pytest.mark.parametrize(
+    "description",
+    [
+        "Our company was founded 20 years ago. We need a Python developer.",
+        "Join a team that has shipped software for 15 years.",
+    ],
+)
+def test_years_outside_experience_are_not_tenure(description):
+    requirements, confidence = rule_based_extraction(description)
+    assert requirements["tenure"] == 0
+    assert confidence < MIN_RULE_CONFIDENCE
+
+
+def test_several_tenures_lower_confidence():
+    _, confidence = rule_based_extraction(
+        "3 years of Python experience and 5 years of experience overall."
+    )
+    assert confidence < MIN_RULE_CONFIDENCE
+
+
+@pytest.mark.parametrize(
+    "description",
+    [
+        "Bachelor's or Master's degree in Computer Science.",
+        "BSc or MSc in CS.",
+        "B.Sc. or M.Sc. in Physics.",
+        "BS/MS in Computer Science required.",
+        "MSc or PhD in Statistics.",
+    ],
+)
+def test_degree_alternatives_are_ambiguous(description):
+    _, confidence = rule_based_extraction(description)
+    assert confidence < MIN_RULE_CONFIDENCE
+
+
+@pytest.mark.parametrize(
+    "description, kind, program",
+    [
+        (
+            "Bachelor's degree in Computer Science and 3+ years of "
+            "experience.",
+            "bachelor",
+            "Computer Science",
+        ),
+        ("Master's degree in Physics.", "master", "Physics"),
+        (
+            "Master of Science in Mathematics required.",
+            "master",
+            "Mathematics",
+        ),
+        (
+            "B.Sc. in Electrical Engineering.",
+            "bachelor",
+            "Electrical Engineering",
+        ),
+    ],
+)
+def test_program_extracted(description, kind, program):
+    requirements, confidence = rule_based_extraction(description)
+    assert requirements[f"is_required_{kind}"]
+    assert requirements[f"{kind}_program"] == [program]
+    assert confidence >= MIN_RULE_CONFIDENCE
+
+
+@pytest.mark.parametrize(
+    "description",
+    [
+        "Master of Science required.",
+        "Bachelor's degree in computer science.",
+    ],
+)
+def test_unreadable_program_lowers_confidence(description):
+    _, confidence = rule_based_extraction(description)
+    assert confidence < MIN_RULE_CONFIDENCE
+
+
+def test_scrum_master_is_not_a_degree():
+    requirements, _ = rule_based_extraction(
+        "Scrum Master with 4 years of experience."
+    )
+    assert not requirements["is_required_master"]
+    assert requirements["tenure"] == 4
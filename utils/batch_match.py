@@ -0,0 +1,179 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from models.job_model import JobModel
+from utils.memory_index import InMemoryCandidateIndex
+from utils.vector_index import EMBEDDING_DIM
+
+
+class BatchMatch:
+    """Top-k candidates for every active job in one pass.
+
+    Job and candidate embeddings are scored block by block with matrix
+    multiplication, keeping a running top-k per job, so memory stays at
+    one job block x candidate block score matrix.
+    """
+
+    def __init__(
+        self,
+        database,
+        metric: str = "cosine",
+        memory_index: Optional[InMemoryCandidateIndex] = None,
+    ):
+        if metric not in ("cosine", "ip", "l2"):
+            raise ValueError(f"Unsupported vector metric: {metric}")
+
+        self.database = database
+        self.metric = metric
+        self.memory_index = memory_index
+
+    def load_candidates(
+        self, batch_size: int = 10000
+    ) -> InMemoryCandidateIndex:
+        """Candidate arrays, a snapshot of the in-memory index when set.
+
+        The pass scores a private copy, so online matches and refreshes of
+        the shared index are never blocked behind it.
+        """
+        if self.memory_index is not None:
+            return self.memory_index.snapshot()
+
+        index = InMemoryCandidateIndex(metric=self.metric)
+        index.load(self.database, batch_size=batch_size)
+        return index
+
+    def load_jobs(self) -> Dict:
+        """Active jobs with their embeddings and requirements."""
+        query = select(
+            JobModel.job_id,
+            JobModel.tenure,
+            JobModel.is_bachelor,
+            JobModel.is_master,
+            JobModel.job_embedding,
+        ).where(JobModel.status == "active")
+
+        with self.database.get_session() as session:
+            rows = session.execute(query).fetchall()
+
+        embeddings = np.array(
+            [row.job_embedding for row in rows], dtype=np.float32
+        ).reshape(len(rows), EMBEDDING_DIM)
+        if self.metric == "cosine" and len(rows):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.where(norms > 0, norms, 1)
+
+        return {
+            "job_ids": [str(row.job_id) for row in rows],
+            "embeddings": embeddings,
+            "tenure": np.array([row.tenure or 0 for row in rows]),
+            "is_bachelor": np.array([bool(row.is_bachelor) for row in rows]),
+            "is_master": np.array([bool(row.is_master) for row in rows]),
+        }
+
+    def match_all_jobs(
+        self,
+        total_candidate: int,
+        job_block_size: int = 256,
+        candidate_block_size: int = 65536,
+    ) -> Dict[str, List[Dict]]:
+        """Get matching candidates for every active job.
+
+        Args:
+            total_candidate: Number of top candidates per job
+            job_block_size: Jobs scored per matrix multiplication
+            candidate_block_size: Candidates scored per matrix multiplication
+
+        Returns:
+            Mapping of job ID to its candidates with similarity scores
+        """
+        if total_candidate <= 0:
+            return {}
+
+        jobs = self.load_jobs()
+        if not jobs["job_ids"]:
+            return {}
+        candidates = self.load_candidates()
+        matches = {}
+
+        size = candidates.size
+        for job_start in range(0, len(jobs["job_ids"]), job_block_size):
+            job_end = job_start + job_block_size
+            job_vectors = jobs["embeddings"][job_start:job_end]
+            job_tenure = jobs["tenure"][job_start:job_end, None]
+            job_bachelor = jobs["is_bachelor"][job_start:job_end, None]
+            job_master = jobs["is_master"][job_start:job_end, None]
+
+            # Running top-k scores and candidate slots per job
+            top_scores = np.full(
+                (len(job_vectors), 0), -np.inf, dtype=np.float32
+            )
+            top_slots = np.zeros((len(job_vectors), 0), dtype=np.int64)
+
+            for start in range(0, size, candidate_block_size):
+                end = min(start + candidate_block_size, size)
+                block = candidates.embeddings[start:end]
+
+                scores = job_vectors @ block.T
+                if self.metric == "l2":
+                    scores = -np.sqrt(
+                        np.maximum(
+                            (job_vectors**2).sum(axis=1, keepdims=True)
+                            - 2 * scores
+                            + candidates.norms[None, start:end] ** 2,
+                            0,
+                        )
+                    )
+
+                mask = candidates.tenure[None, start:end] >= job_tenure
+                mask &= ~job_bachelor | candidates.has_bachelor[
+                    None, start:end
+                ]
+                mask &= ~job_master | candidates.has_master[
+                    None, start:end
+                ]
+                scores = np.where(mask, scores, -np.inf)
+
+                # Merge the block into the running top-k
+                merged_scores = np.concatenate([top_scores, scores], axis=1)
+                merged_slots = np.concatenate(
+                    [
+                        top_slots,
+                        np.broadcast_to(
+                            np.arange(start, end), scores.shape
+                        ),
+                    ],
+                    axis=1,
+                )
+                k = min(total_candidate, merged_scores.shape[1])
+                keep = np.argpartition(-merged_scores, k - 1, axis=1)[
+                    :, :k
+                ]
+                top_scores = np.take_along_axis(merged_scores, keep, 1)
+                top_slots = np.take_along_axis(merged_slots, keep, 1)
+
+            order = np.argsort(-top_scores, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, 1)
+            top_slots = np.take_along_axis(top_slots, order, 1)
+
+            for row, job_id in enumerate(jobs["job_ids"][job_start:job_end]):
+                job_matches = []
+                for score, slot in zip(top_scores[row], top_slots[row]):
+                    if not np.isfinite(score):
+                        break
+                    first_name, last_name, email = candidates.profiles[
+                        slot
+                    ]
+                    job_matches.append(
+                        {
+                            "candidate_id": candidates.candidate_ids[slot],
+                            "first_name": first_name,
+                            "last_name": last_name,
+                            "email": email,
+                            "similarity_score": float(score),
+                        }
+                    )
+                matches[job_id] = job_matches
+
+        return matches
@@ -0,0 +1,690 @@
+import csv
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from sqlalchemy import ARRAY, text
+
+from models.candidate_matching_model import CandidateMatchingModel
+from models.candidate_model import CandidateModel
+from models.job_model import JobModel
+from schemas.candidate_schema import CandidateCreate
+from schemas.job_schema import JobCreate
+from services.candidate_service import CandidateService
+from services.job_service import JobService
+from utils.embedding_model import LazyEmbeddingModel, RemoteEmbeddingModel
+from utils.job_extraction import JobExtractor
+from utils.match_cache import CANDIDATES_SCOPE, JOBS_SCOPE, bump_version
+
+CANDIDATES = "candidates"
+JOBS = "jobs"
+
+# Ids of rows without one are derived from a stable external key, so an
+# edited candidate re-imported later updates the same record, and an edited
+# job becomes a new version of it
+IMPORT_NAMESPACE = uuid.UUID("e1abdabf-e546-4e4c-89f0-080e4605fe91")
+# Column holding the source system's (e.g. ATS) id of a row
+EXTERNAL_ID_FIELD = "external_id"
+
+# CSV columns holding JSON, and lists that may also be ";"-separated
+CSV_JSON_FIELDS = ("experiences", "education", "budget")
+CSV_LIST_FIELDS = ("skills", "required_skills")
+
+# Columns written by COPY, the rest come from table defaults
+CANDIDATE_COLUMNS = [
+    column
+    for column in CandidateModel.__table__.columns.keys()
+    if column not in ("created_at", "updated_at", "change_version")
+]
+JOB_COLUMNS = [
+    column
+    for column in JobModel.__table__.columns.keys()
+    if column not in ("created_at", "updated_at")
+]
+MATCHING_COLUMNS = [
+    column
+    for column in CandidateMatchingModel.__table__.columns.keys()
+    if column != "change_version"
+]
+
+
+def column_kinds(table, columns: List[str]) -> List[str]:
+    """"array", "vector" or "scalar" per column, for COPY formatting."""
+    kinds = []
+    for column in columns:
+        column_type = table.columns[column].type
+        if isinstance(column_type, ARRAY):
+            kinds.append("array")
+        elif hasattr(column_type, "dim"):
+            kinds.append("vector")
+        else:
+            kinds.append("scalar")
+    return kinds
+
+
+def required_columns(table, columns: List[str]) -> List[str]:
+    """NOT NULL columns, checked up front since one null fails a COPY."""
+    return [column for column in columns if not table.columns[column].nullable]
+
+
+CANDIDATE_KINDS = column_kinds(CandidateModel.__table__, CANDIDATE_COLUMNS)
+JOB_KINDS = column_kinds(JobModel.__table__, JOB_COLUMNS)
+# JobCreate already requires every NOT NULL job column, CandidateCreate
+# leaves e.g. email optional
+CANDIDATE_REQUIRED = required_columns(
+    CandidateModel.__table__, CANDIDATE_COLUMNS
+)
+
+
+def escape_copy(value: str) -> str:
+    """Escape a value for COPY's text format."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_value(value, kind: str) -> str:
+    if value is None:
+        return "\\N"
+    if kind == "vector":
+        return "[" + ",".join(str(float(x)) for x in value) + "]"
+    if kind == "array":
+        elements = (
+            '"' + str(element).replace("\\", "\\\\").replace('"', '\\"') + '"'
+            for element in value
+        )
+        return escape_copy("{" + ",".join(elements) + "}")
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return escape_copy(str(value))
+
+
+def check_required(values: Dict, required: List[str]) -> None:
+    missing = [column for column in required if values[column] is None]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+
+
+def copy_line(values, kinds: List[str]) -> str:
+    fields = (copy_value(value, kind) for value, kind in zip(values, kinds))
+    return "\t".join(fields) + "\n"
+
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def read_rows(path: str, file_format: str) -> Iterator[Tuple[int, object]]:
+    """(line number, raw row) pairs, streamed from the file."""
+    with open(path, newline="", encoding="utf-8") as source:
+        if file_format == "csv":
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(source, 1):
+                if line.strip():
+                    yield line_number, line
+
+
+def csv_record(row: Dict) -> Dict:
+    """Request-shaped record from a CSV row.
+
+    Nested fields are JSON, budget may also be split over budget_min,
+    budget_max and budget_currency columns.
+    """
+    record = {}
+    for key, value in row.items():
+        value = (value or "").strip() if isinstance(value, str) else value
+        if key is None or not value:
+            continue
+        if key in CSV_JSON_FIELDS:
+            record[key] = json.loads(value)
+        elif key in CSV_LIST_FIELDS:
+            record[key] = (
+                json.loads(value)
+                if value.startswith("[")
+                else [
+                    item.strip() for item in value.split(";") if item.strip()
+                ]
+            )
+        elif key.startswith("budget_"):
+            record.setdefault("budget", {})[key[len("budget_"):]] = value
+        else:
+            record[key] = value
+    return record
+
+
+def parse_row(kind: str, file_format: str, raw) -> Tuple[uuid.UUID, Dict]:
+    """Validated (id, data) of one row, data as the API would queue it.
+
+    Rows without an id get one derived from their external_id, or for
+    candidates their email. Job ids also cover the content, each edit of
+    a job is a version of its own, and job data keeps the external_id.
+
+    Raises:
+        ValueError: The row is malformed, fails request validation or has
+            no stable key
+    """
+    record = csv_record(raw) if file_format == "csv" else json.loads(raw)
+    if not isinstance(record, dict):
+        raise ValueError("Row is not an object")
+
+    id_field, schema = (
+        ("candidate_id", CandidateCreate)
+        if kind == CANDIDATES
+        else ("job_id", JobCreate)
+    )
+    row_id = record.pop(id_field, None)
+    external_id = record.pop(EXTERNAL_ID_FIELD, None)
+    try:
+        data = jsonable_encoder(schema.model_validate(record))
+    except ValidationError as e:
+        raise ValueError(str(e))
+
+    if external_id and kind == JOBS:
+        data[EXTERNAL_ID_FIELD] = str(external_id).strip()
+    if row_id:
+        return uuid.UUID(str(row_id)), data
+    if external_id and kind == JOBS:
+        content = json.dumps(data, sort_keys=True)
+        key = f"{kind}:{EXTERNAL_ID_FIELD}:{content}"
+    elif external_id:
+        key = f"{kind}:{EXTERNAL_ID_FIELD}:{str(external_id).strip()}"
+    elif kind == CANDIDATES and data.get("email"):
+        key = f"{kind}:email:{data['email'].strip().lower()}"
+    else:
+        raise ValueError(
+            f"Row has no {id_field} or {EXTERNAL_ID_FIELD}"
+            + (" or email" if kind == CANDIDATES else "")
+        )
+    return uuid.uuid5(IMPORT_NAMESPACE, key), data
+
+
+# Services of a pool process, built once by init_worker
+worker_services = {}
+
+
+def init_worker(embedding_server_url: Optional[str], model_name: str) -> None:
+    """Build services without a database, pool processes only embed."""
+    model = (
+        RemoteEmbeddingModel(embedding_server_url)
+        if embedding_server_url
+        else LazyEmbeddingModel(model_name)
+    )
+    worker_services[CANDIDATES] = CandidateService(None, model)
+    worker_services[JOBS] = JobService(None, model)
+
+
+def prepare_candidates(chunk: List) -> Tuple[str, int, List]:
+    """Build texts, embed and format a chunk of candidates for COPY.
+
+    Args:
+        chunk: (line number, candidate_id, candidate_data) triples
+
+    Returns:
+        COPY payload, its row count and (line number, error) rejects
+    """
+    service = worker_services[CANDIDATES]
+    texts, records, rejects = [], [], []
+    for line_number, candidate_id, candidate_data in chunk:
+        try:
+            candidate_text = service.create_candidate_text(candidate_data)
+            record = service.create_candidate_record(
+                candidate_id,
+                candidate_data,
+                None,
+                candidate_text=candidate_text,
+            )
+            # The embedding is added once the chunk is encoded
+            check_required(
+                record,
+                [
+                    column
+                    for column in CANDIDATE_REQUIRED
+                    if column != "candidate_embedding"
+                ],
+            )
+            texts.append(candidate_text)
+            records.append(record)
+        except Exception as e:
+            rejects.append((line_number, f"Invalid candidate: {str(e)}"))
+
+    if not records:
+        return "", 0, rejects
+
+    embeddings, full_embeddings = service.embed(texts, batch_size=len(texts))
+    lines = []
+    for record, embedding, full_embedding in zip(
+        records, embeddings, full_embeddings
+    ):
+        record["candidate_embedding"] = embedding
+        record["candidate_embedding_full"] = full_embedding
+        lines.append(
+            copy_line(
+                (record[column] for column in CANDIDATE_COLUMNS),
+                CANDIDATE_KINDS,
+            )
+        )
+    return "".join(lines), len(lines), rejects
+
+
+def prepare_jobs(chunk: List) -> Tuple[str, int, List]:
+    """Build texts, embed and format a chunk of extracted jobs for COPY.
+
+    Args:
+        chunk: (line number, job_id, job_data, job_desc_info) tuples
+
+    Returns:
+        COPY payload, its row count and (line number, error) rejects
+    """
+    service = worker_services[JOBS]
+    texts, kept, rejects = [], [], []
+    for line_number, job_id, job_data, job_desc_info in chunk:
+        try:
+            texts.append(service.create_job_text(job_data, job_desc_info))
+            kept.append((job_id, job_data, job_desc_info))
+        except Exception as e:
+            rejects.append((line_number, f"Invalid job: {str(e)}"))
+
+    if not kept:
+        return "", 0, rejects
+
+    embeddings, full_embeddings = service.embed(texts)
+    lines = []
+    for (job_id, job_data, job_desc_info), embedding, full_embedding in zip(
+        kept, embeddings, full_embeddings
+    ):
+        job = service.create_job_model(
+            job_id=job_id,
+            job_data=job_data,
+            job_desc_info=job_desc_info,
+            job_embedding=embedding,
+            job_embedding_full=full_embedding,
+        )
+        job.external_id = job_data.get(EXTERNAL_ID_FIELD)
+        lines.append(
+            copy_line(
+                (getattr(job, column) for column in JOB_COLUMNS), JOB_KINDS
+            )
+        )
+    return "".join(lines), len(lines), rejects
+
+
+PREPARE = {CANDIDATES: prepare_candidates, JOBS: prepare_jobs}
+
+
+class ImportCheckpoint:
+    """Rows of an input file already imported, kept in a JSON file.
+
+    The checkpoint only applies to the same file: a changed size or
+    modification time starts the import over.
+    """
+
+    def __init__(self, path: str, source: str, kind: str):
+        self.path = path
+        self.source = source
+        self.kind = kind
+
+    def fingerprint(self) -> Dict:
+        stat = os.stat(self.source)
+        return {
+            "source": os.path.abspath(self.source),
+            "kind": self.kind,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def load(self) -> Tuple[int, int]:
+        """Rows already imported and the size of the rejects file then.
+
+        Both are 0 without a matching checkpoint.
+        """
+        try:
+            with open(self.path) as checkpoint_file:
+                state = json.load(checkpoint_file)
+        except (OSError, ValueError):
+            return 0, 0
+        if state.get("file") != self.fingerprint():
+            return 0, 0
+        return state.get("rows", 0), state.get("rejects_offset", 0)
+
+    def save(
+        self, rows: int, rejects_offset: int, completed: bool = False
+    ) -> None:
+        # Write then rename, so a crash never leaves a torn checkpoint
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as checkpoint_file:
+            json.dump(
+                {
+                    "file": self.fingerprint(),
+                    "rows": rows,
+                    "rejects_offset": rejects_offset,
+                    "completed": completed,
+                },
+                checkpoint_file,
+            )
+        os.replace(temporary, self.path)
+
+
+class BulkImporter:
+    """Stream NDJSON or CSV files of candidates or jobs into Postgres.
+
+    Rows are read and validated chunk by chunk in this process, job
+    requirements are extracted here with concurrent LLM requests, and a
+    process pool builds texts and embeddings. Each finished chunk is
+    COPYed into a temporary table and upserted in one transaction, in
+    file order, then checkpointed. At most max_pending chunks are in
+    flight, which bounds memory whatever the file size.
+
+    Rows are written directly, not through the API services. Each
+    candidate chunk bumps the candidates version, so cached match results
+    pick it up on their next lookup, while the in-memory index of a
+    running API only sees it at its next refresh, every
+    MEMORY_INDEX_REFRESH_SECONDS.
+    """
+
+    def __init__(
+        self,
+        database,
+        job_extractor: JobExtractor,
+        chunk_size: int = 1000,
+        workers: int = 2,
+        max_pending: Optional[int] = None,
+        embedding_server_url: Optional[str] = None,
+        embedding_model_name: str = "jinaai/jina-embeddings-v3",
+    ):
+        self.database = database
+        self.job_extractor = job_extractor
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.max_pending = max_pending or max(2 * workers, 1)
+        self.embedding_server_url = embedding_server_url
+        self.embedding_model_name = embedding_model_name
+
+    def run(
+        self,
+        kind: str,
+        path: str,
+        file_format: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        rejects_path: Optional[str] = None,
+        restart: bool = False,
+    ) -> Dict:
+        """Import a file, resuming from its checkpoint unless restart.
+
+        Returns:
+            Rows read, imported, already stored unchanged and rejected by
+            this run
+        """
+        if kind not in PREPARE:
+            raise ValueError(f"Unknown import kind: {kind}")
+        file_format = file_format or detect_format(path)
+        checkpoint = ImportCheckpoint(
+            checkpoint_path or f"{path}.checkpoint.json", path, kind
+        )
+        rejects_path = rejects_path or f"{path}.rejects.ndjson"
+
+        skipped, rejects_offset = (0, 0) if restart else checkpoint.load()
+        rows = read_rows(path, file_format)
+        # Rows before the checkpoint were imported by an earlier run
+        deque(itertools.islice(rows, skipped), maxlen=0)
+
+        summary = {
+            "skipped": skipped,
+            "read": 0,
+            "imported": 0,
+            "unchanged": 0,
+            "rejected": 0,
+        }
+        consumed = skipped
+        executor = (
+            ProcessPoolExecutor(
+                max_workers=self.workers,
+                # Fresh processes, forking would share the engine's sockets
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(
+                    self.embedding_server_url,
+                    self.embedding_model_name,
+                ),
+            )
+            if self.workers > 0
+            else nullcontext()
+        )
+        if self.workers == 0:
+            init_worker(self.embedding_server_url, self.embedding_model_name)
+
+        with executor, open(rejects_path, "a") as rejects_file:
+            # Rejects past the checkpoint are found again by this run
+            rejects_file.truncate(min(rejects_offset, rejects_file.tell()))
+            pending = deque()
+            while True:
+                raw_chunk = list(itertools.islice(rows, self.chunk_size))
+                if not raw_chunk:
+                    break
+                consumed += len(raw_chunk)
+                summary["read"] += len(raw_chunk)
+
+                chunk, rejects = self.parse_chunk(kind, file_format, raw_chunk)
+                if kind == JOBS:
+                    chunk = self.extract_jobs(chunk)
+                pending.append(
+                    (consumed, rejects, self.submit(executor, kind, chunk))
+                )
+
+                while len(pending) >= self.max_pending:
+                    self.finish(
+                        kind,
+                        pending.popleft(),
+                        checkpoint,
+                        rejects_file,
+                        summary,
+                    )
+
+            while pending:
+                self.finish(
+                    kind, pending.popleft(), checkpoint, rejects_file, summary
+                )
+
+        checkpoint.save(
+            consumed, os.path.getsize(rejects_path), completed=True
+        )
+        return summary
+
+    def parse_chunk(
+        self, kind: str, file_format: str, raw_chunk: List
+    ) -> Tuple[List, List]:
+        """Validated rows of a chunk, the last row of a repeated id wins.
+
+        Jobs are keyed on their external_id, as every edit has its own id.
+        """
+        parsed = {}
+        rejects = []
+        for line_number, raw in raw_chunk:
+            try:
+                row_id, data = parse_row(kind, file_format, raw)
+            except ValueError as e:
+                rejects.append((line_number, str(e)))
+                continue
+            key = data.get(EXTERNAL_ID_FIELD) or row_id
+            parsed.pop(key, None)
+            parsed[key] = (line_number, row_id, data)
+        return list(parsed.values()), rejects
+
+    def extract_jobs(self, chunk: List) -> List:
+        """Add extracted requirements to every job of a chunk.
+
+        Raises:
+            Exception: An extraction failed, e.g. the LLM is unreachable,
+                the import stops and resumes from the checkpoint
+        """
+        extracted = self.job_extractor.extract_many(
+            [job_data["job_description"] for _, _, job_data in chunk]
+        )
+        for job_desc_info in extracted:
+            if isinstance(job_desc_info, Exception):
+                raise job_desc_info
+        return [
+            (line_number, job_id, job_data, job_desc_info)
+            for (line_number, job_id, job_data), job_desc_info in zip(
+                chunk, extracted
+            )
+        ]
+
+    def submit(self, executor, kind: str, chunk: List) -> Future:
+        if self.workers > 0:
+            return executor.submit(PREPARE[kind], chunk)
+        future = Future()
+        future.set_result(PREPARE[kind](chunk))
+        return future
+
+    def finish(
+        self, kind: str, item, checkpoint, rejects_file, summary: Dict
+    ) -> None:
+        """Store a prepared chunk, record its rejects and checkpoint."""
+        consumed, rejects, future = item
+        payload, count, prepare_rejects = future.result()
+        stored = self.store(kind, payload) if count else 0
+
+        for line_number, error in rejects + prepare_rejects:
+            rejects_file.write(
+                json.dumps({"line": line_number, "error": error}) + "\n"
+            )
+        rejects_file.flush()
+
+        summary["imported"] += stored
+        summary["unchanged"] += count - stored
+        summary["rejected"] += len(rejects) + len(prepare_rejects)
+        checkpoint.save(consumed, rejects_file.tell())
+        print(
+            f"Imported {summary['imported']} {kind}, "
+            f"unchanged {summary['unchanged']}, "
+            f"rejected {summary['rejected']}, at row {consumed}"
+        )
+
+    def store(self, kind: str, payload: str) -> int:
+        """COPY a chunk into a temporary table and upsert it from there.
+
+        Returns:
+            Rows written, jobs already stored with the same id are not
+        """
+        table, columns = (
+            ("candidates", CANDIDATE_COLUMNS)
+            if kind == CANDIDATES
+            else ("jobs", JOB_COLUMNS)
+        )
+        staging = f"import_{table}"
+
+        with self.database.engine.begin() as connection:
+            connection.execute(
+                text(
+                    f"CREATE TEMP TABLE {staging} "
+                    f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+            )
+            cursor = connection.connection.cursor()
+            cursor.copy_expert(
+                f"COPY {staging} ({', '.join(columns)}) FROM STDIN",
+                io.StringIO(payload),
+            )
+
+            if kind == JOBS:
+                # Job rows are immutable versions, existing ids are kept.
+                # A new version of an imported job retires its active one
+                connection.execute(
+                    text(
+                        f"""
+                        UPDATE {staging} s
+                        SET previous_version_id = j.job_id
+                        FROM jobs j
+                        WHERE
+                            j.external_id = s.external_id AND
+                            j.status = 'active' AND
+                            NOT EXISTS (
+                                SELECT 1 FROM jobs k WHERE k.job_id = s.job_id
+                            )
+                        """
+                    )
+                )
+                retired = connection.execute(
+                    text(
+                        f"""
+                        UPDATE jobs
+                        SET status = 'inactive', updated_at = now()
+                        WHERE
+                            status = 'active' AND
+                            job_id IN (
+                                SELECT previous_version_id FROM {staging}
+                            )
+                        """
+                    )
+                ).rowcount
+                inserted = connection.execute(
+                    text(
+                        f"""
+                        INSERT INTO jobs ({', '.join(columns)})
+                        SELECT {', '.join(columns)} FROM {staging}
+                        ON CONFLICT (job_id) DO NOTHING
+                        """
+                    )
+                ).rowcount
+                if retired:
+                    # Cached matches of the retired versions are dropped
+                    bump_version(connection, JOBS_SCOPE)
+                return inserted
+
+            # Re-synced candidates are updated in place, under one new
+            # candidates version so cached matches pick up the chunk
+            change_version = bump_version(connection, CANDIDATES_SCOPE)
+            updates = ", ".join(
+                f"{column} = EXCLUDED.{column}"
+                for column in columns
+                if column != "candidate_id"
+            )
+            imported = connection.execute(
+                text(
+                    f"""
+                    INSERT INTO candidates
+                        ({', '.join(columns)}, change_version)
+                    SELECT {', '.join(columns)}, :change_version FROM {staging}
+                    ON CONFLICT (candidate_id) DO UPDATE SET
+                        {updates},
+                        change_version = EXCLUDED.change_version,
+                        updated_at = now()
+                    """
+                ),
+                {"change_version": change_version},
+            ).rowcount
+            matching_updates = ", ".join(
+                f"{column} = EXCLUDED.{column}"
+                for column in MATCHING_COLUMNS
+                if column != "candidate_id"
+            )
+            connection.execute(
+                text(
+                    f"""
+                    INSERT INTO candidate_matching
+                        ({', '.join(MATCHING_COLUMNS)}, change_version)
+                    SELECT {', '.join(MATCHING_COLUMNS)}, :change_version
+                    FROM {staging}
+                    ON CONFLICT (candidate_id) DO UPDATE SET
+                        {matching_updates},
+                        change_version = EXCLUDED.change_version
+                    """
+                ),
+                {"change_version": change_version},
+            )
+            return imported
@@ -1,86 +1,931 @@
-from typing import List, Dict
+import base64
+import json
+import math
+import time
+from typing import Iterator, List, Dict, Optional, Tuple
 from uuid import UUID
-from sqlalchemy import text
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import bindparam, select, text
 from models.job_model import JobModel
+from utils.match_cache import (
+    CANDIDATES_SCOPE,
+    JOBS_SCOPE,
+    MatchCache,
+    MatchCacheEntry,
+)
+from utils.memory_index import InMemoryCandidateIndex
+from utils.metrics import counted, match_rows, timed
+from utils.vector_index import (
+    FULL_EMBEDDING_DIM,
+    HNSW_DEFAULT_EF_SEARCH,
+    VectorIndex,
+)
+
+# Matching strategies picked by MatchPlanner
+STRATEGY_INDEX = "index"
+STRATEGY_OVERFETCH = "overfetch"
+STRATEGY_EXACT = "exact"
+
+# Filtered sets at most this large are scanned exactly
+EXACT_SCAN_ROWS = 20000
+# Tenure selectivity above which the education bucket index is used directly
+INDEX_MIN_SELECTIVITY = 0.9
+# Over-fetch margin on top of the estimated 1 / selectivity factor
+OVERFETCH_MARGIN = 1.5
+# pgvector caps hnsw.ef_search at 1000, deeper over-fetch can't be served
+MAX_ANN_FETCH = 1000
+# Cached results with more changed candidates than this are recomputed
+MAX_DELTA_ROWS = 5000
+
+
+class TableStatistics:
+    """Planner statistics of the candidates table read from pg_stats."""
+
+    def __init__(self, table: str = "candidates", ttl: int = 300):
+        self.table = table
+        self.ttl = ttl
+        self.loaded_at = None
+        self.row_count = 0
+        self.columns = {}
+
+    def refresh(self, connection) -> None:
+        """Reload statistics when older than ttl seconds."""
+        if self.loaded_at and time.monotonic() - self.loaded_at < self.ttl:
+            return
+
+        self.row_count = max(
+            connection.execute(
+                text(
+                    "SELECT reltuples FROM pg_class "
+                    "WHERE oid = to_regclass(:table)"
+                ),
+                {"table": self.table},
+            ).scalar()
+            or 0,
+            0,
+        )
+
+        result = connection.execute(
+            text(
+                """
+                SELECT
+                    attname,
+                    null_frac,
+                    most_common_vals::text::text[] AS most_common_vals,
+                    most_common_freqs,
+                    histogram_bounds::text::text[] AS histogram_bounds
+                FROM
+                    pg_stats
+                WHERE
+                    schemaname = current_schema() AND
+                    tablename = :table AND
+                    attname IN ('candidate_tenure', 'has_bachelor', 'has_master')
+                """
+            ),
+            {"table": self.table},
+        )
+        self.columns = {row.attname: row for row in result}
+        self.loaded_at = time.monotonic()
+
+    def true_fraction(self, column: str) -> float:
+        """Fraction of rows where a boolean column is true."""
+        stats = self.columns.get(column)
+        if stats is None:
+            return 1.0
+
+        for value, freq in zip(
+            stats.most_common_vals or [], stats.most_common_freqs or []
+        ):
+            if value == "t":
+                return freq
+        return 0.0
+
+    def at_least_fraction(self, column: str, minimum: int) -> float:
+        """Fraction of rows where an integer column is >= minimum."""
+        stats = self.columns.get(column)
+        if stats is None or minimum <= 0:
+            return 1.0
+
+        values = stats.most_common_vals or []
+        freqs = stats.most_common_freqs or []
+        fraction = sum(
+            freq for value, freq in zip(values, freqs) if int(value) >= minimum
+        )
+
+        # Rows outside the most common values are spread over the histogram
+        bounds = [int(value) for value in stats.histogram_bounds or []]
+        if len(bounds) > 1:
+            remaining = 1.0 - stats.null_frac - sum(freqs)
+            buckets = len(bounds) - 1
+            above = sum(1 for bound in bounds[1:] if bound >= minimum)
+            fraction += remaining * above / buckets
+
+        return min(fraction, 1.0)
+
+
+class MatchPlan:
+    def __init__(
+        self, strategy: str, estimated_rows: float, fetch_size: int = 0
+    ):
+        self.strategy = strategy
+        self.estimated_rows = estimated_rows
+        self.fetch_size = fetch_size
+
+
+class MatchPlanner:
+    """Pick how a filtered top-k vector query should be executed.
+
+    - index: run the ANN scan on the index covering the education bucket
+      (partial index per degree) when the tenure filter barely cuts rows.
+    - overfetch: ANN scan for more rows than needed, then re-filter.
+    - exact: filter first and sort the survivors when few rows qualify.
+
+    Filtered index and overfetch scans that come back short of top-k are
+    retried deeper by CandidateMatch.rank, ending with an exact scan.
+    """
+
+    def __init__(self, statistics: TableStatistics):
+        self.statistics = statistics
+
+    def plan(
+        self,
+        total_candidate: int,
+        min_tenure: int,
+        req_bachelor: bool,
+        req_master: bool,
+    ) -> MatchPlan:
+        stats = self.statistics
+        education_selectivity = 1.0
+        if req_bachelor:
+            education_selectivity *= stats.true_fraction("has_bachelor")
+        if req_master:
+            education_selectivity *= stats.true_fraction("has_master")
+        tenure_selectivity = stats.at_least_fraction(
+            "candidate_tenure", min_tenure
+        )
+
+        bucket_rows = stats.row_count * education_selectivity
+        estimated_rows = bucket_rows * tenure_selectivity
+
+        if estimated_rows <= EXACT_SCAN_ROWS:
+            return MatchPlan(STRATEGY_EXACT, estimated_rows)
+
+        # The tenure filter is applied to the rows the index returns, so
+        # both ANN strategies read enough of them to keep top-k after it
+        fetch_size = total_candidate
+        if min_tenure > 0:
+            fetch_size = math.ceil(
+                total_candidate
+                * OVERFETCH_MARGIN
+                / max(tenure_selectivity, 1e-6)
+            )
+        if fetch_size > MAX_ANN_FETCH:
+            return MatchPlan(STRATEGY_EXACT, estimated_rows)
+
+        if tenure_selectivity >= INDEX_MIN_SELECTIVITY:
+            return MatchPlan(STRATEGY_INDEX, estimated_rows, fetch_size)
+
+        return MatchPlan(STRATEGY_OVERFETCH, estimated_rows, fetch_size)
 
 
 class CandidateMatch:
-    def __init__(self, database):
+    def __init__(
+        self,
+        database,
+        vector_index: Optional[VectorIndex] = None,
+        memory_index: Optional[InMemoryCandidateIndex] = None,
+        match_cache: Optional[MatchCache] = None,
+        rerank_recall: int = 300,
+    ):
         self.database = database
+        self.vector_index = vector_index or VectorIndex()
+        # When set, candidates are ranked in process instead of in Postgres
+        self.memory_index = memory_index
+        self.match_cache = match_cache
+        # Rows recalled on the 32-dim index before a full-dim re-rank
+        self.rerank_recall = rerank_recall
+        self.statistics = TableStatistics("candidate_matching")
+        self.planner = MatchPlanner(self.statistics)
+
+    @staticmethod
+    def encode_cursor(sort_key: float, candidate_id: str) -> str:
+        """Opaque continuation token after the given row."""
+        payload = json.dumps({"k": sort_key, "id": str(candidate_id)})
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[float, str]:
+        """Sort key and candidate ID of a continuation token."""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return float(payload["k"]), str(UUID(payload["id"]))
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    def build_query(
+        self,
+        strategy: str,
+        min_tenure: int,
+        req_bachelor: bool,
+        req_master: bool,
+        after_cursor: bool = False,
+    ):
+        """Build the top-k query for a strategy.
+
+        Education filters are written as literal predicates so the planner
+        can match them against the partial index of each degree bucket.
+        Pages after a cursor continue on (distance, candidate_id) keyset.
+        """
+        distance = self.vector_index.distance(
+            "c.candidate_embedding", "job_embedding"
+        )
+        # Differs from distance when the index is on quantized embeddings
+        index_distance = self.vector_index.index_distance(
+            "c.candidate_embedding", "job_embedding"
+        )
+
+        # Filters applied while scanning the index
+        education_filters = []
+        if req_bachelor:
+            education_filters.append("c.has_bachelor = true")
+        if req_master:
+            education_filters.append("c.has_master = true")
+        if after_cursor:
+            education_filters.append(
+                f"({distance}, c.candidate_id) > "
+                "(:cursor_distance, CAST(:cursor_id AS uuid))"
+            )
+        filters = list(education_filters)
+        if min_tenure > 0:
+            filters.append("c.candidate_tenure >= :min_tenure")
+        columns = f"""
+            c.candidate_id,
+            c.candidate_tenure,
+            c.has_bachelor,
+            c.has_master,
+            {distance} AS distance
+        """
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        if strategy == STRATEGY_OVERFETCH:
+            # Fetch extra neighbours from the bucket index, then re-filter
+            education_where = (
+                f"WHERE {' AND '.join(education_filters)}"
+                if education_filters
+                else ""
+            )
+            tenure_where = (
+                "WHERE c.candidate_tenure >= :min_tenure"
+                if min_tenure > 0
+                else ""
+            )
+            sql = f"""
+                SELECT * FROM (
+                    SELECT {columns}
+                    FROM candidate_matching c
+                    {education_where}
+                    ORDER BY {index_distance}, c.candidate_id
+                    LIMIT :fetch_size
+                ) c
+                {tenure_where}
+                ORDER BY distance, candidate_id
+                LIMIT :total_candidate
+            """
+        elif strategy == STRATEGY_EXACT:
+            # Materializing the filtered rows keeps the ANN index out
+            sql = f"""
+                WITH filtered AS MATERIALIZED (
+                    SELECT {columns}
+                    FROM candidate_matching c
+                    {where}
+                )
+                SELECT * FROM filtered
+                ORDER BY distance, candidate_id
+                LIMIT :total_candidate
+            """
+        elif index_distance != distance:
+            # Scan the quantized index deeper, rescore on exact distance
+            sql = f"""
+                SELECT * FROM (
+                    SELECT {columns}
+                    FROM candidate_matching c
+                    {where}
+                    ORDER BY {index_distance}, c.candidate_id
+                    LIMIT :rescore_size
+                ) c
+                ORDER BY distance, candidate_id
+                LIMIT :total_candidate
+            """
+        else:
+            sql = f"""
+                SELECT {columns}
+                FROM candidate_matching c
+                {where}
+                ORDER BY distance, c.candidate_id
+                LIMIT :total_candidate
+            """
+
+        # Rank on the narrow projection, read profiles of the top-k only
+        sql = f"""
+            SELECT
+                m.candidate_id,
+                p.first_name,
+                p.last_name,
+                p.email,
+                m.distance
+            FROM ({sql}) m
+            JOIN candidates p ON p.candidate_id = m.candidate_id
+            ORDER BY m.distance, m.candidate_id
+        """
+
+        return text(sql).bindparams(
+            bindparam("job_embedding", type_=Vector(32))
+        )
 
     def get_candidates_by_job(
-        self, job_id: UUID, total_candidate: int
+        self,
+        job_id: UUID,
+        total_candidate: int,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank: bool = False,
     ) -> List[Dict]:
         """Get matching candidates for a job.
 
         Args:
             job_id: UUID of the job
+            total_candidate: Number of top candidates to return
+            ef_search: HNSW candidate list size for this request
+            probes: IVFFlat lists to probe for this request
+            rerank: Re-rank the recalled rows on the full-dim embeddings
 
         Returns:
             List of candidates with similarity scores
         """
-        try:
-            with self.database.get_session() as session:
-                # Get job
-                job = (
-                    session.query(JobModel)
-                    .filter(
-                        JobModel.job_id == job_id, JobModel.status == "active"
-                    )
-                    .first()
+        return self.get_candidates_page(
+            job_id,
+            total_candidate,
+            ef_search=ef_search,
+            probes=probes,
+            rerank=rerank,
+        )["candidates"]
+
+    def get_candidates_page(
+        self,
+        job_id: UUID,
+        total_candidate: int,
+        cursor: Optional[Tuple[float, str]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank: bool = False,
+    ) -> Dict:
+        """Get one page of matching candidates for a job.
+
+        Args:
+            job_id: UUID of the job
+            total_candidate: Page size
+            cursor: Decoded cursor of the previous page, None for the first
+            ef_search: HNSW candidate list size for this request
+            probes: IVFFlat lists to probe for this request
+            rerank: Re-rank on the full-dim embeddings, single page only
+
+        Returns:
+            Candidates of the page and the cursor of the next one
+        """
+        with counted("match_candidates"):
+            return self.database.run(
+                self.match_on_connection,
+                job_id,
+                total_candidate,
+                cursor,
+                ef_search,
+                probes,
+                rerank,
+            )
+
+    async def get_candidates_page_async(
+        self,
+        job_id: UUID,
+        total_candidate: int,
+        cursor: Optional[Tuple[float, str]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank: bool = False,
+    ) -> Dict:
+        """get_candidates_page for async endpoints.
+
+        In-memory searches run in a worker thread, off the event loop.
+        """
+        with counted("match_candidates"):
+            return await self.database.run_async(
+                self.match_on_connection,
+                job_id,
+                total_candidate,
+                cursor,
+                ef_search,
+                probes,
+                rerank,
+                in_thread=self.memory_index is not None,
+            )
+
+    def stream_candidates_by_job(
+        self,
+        job_id: UUID,
+        limit: Optional[int] = None,
+        page_size: int = 500,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        """Yield matching candidates page by page, best first.
+
+        Only one page is held in memory, each page continues from the
+        cursor of the previous one.
+        """
+        cursor = None
+        returned = 0
+        while limit is None or returned < limit:
+            size = (
+                page_size if limit is None else min(page_size, limit - returned)
+            )
+            page = self.get_candidates_page(
+                job_id,
+                size,
+                cursor=cursor,
+                ef_search=ef_search,
+                probes=probes,
+            )
+            yield from page["candidates"]
+            returned += len(page["candidates"])
+
+            if page["next_cursor"] is None:
+                return
+            cursor = self.decode_cursor(page["next_cursor"])
+
+    def match_on_connection(
+        self,
+        connection,
+        job_id: UUID,
+        total_candidate: int,
+        cursor: Optional[Tuple[float, str]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank: bool = False,
+    ) -> Dict:
+        """Rank one page of candidates for the job on connection."""
+        if rerank and cursor is not None:
+            raise ValueError("Re-ranked matches can't continue from a cursor")
+
+        with timed("match_candidates", "total"):
+            # Only first pages of the database backend are cached, the
+            # memory index already ranks in process
+            if (
+                self.match_cache is not None
+                and cursor is None
+                and self.memory_index is None
+            ):
+                return self.cached_match(
+                    connection,
+                    job_id,
+                    total_candidate,
+                    ef_search,
+                    probes,
+                    rerank,
                 )
 
-                if not job:
-                    raise ValueError(f"No active job found with ID: {job_id}")
-
-                # Get candidates filtered by tenure
-                query = text(
-                    """
-                    WITH similarity_scores AS (
-                        SELECT
-                            candidate_id,
-                            first_name,
-                            last_name,
-                            email,
-                            1 - (job_embedding <#> candidate_embedding) as similarity_score
-                        FROM
-                            candidates c
-                        WHERE
-                            c.candidate_tenure >= :min_tenure AND
-                            CASE WHEN :req_bachelor THEN c.has_bachelor = true ELSE true END AND
-                            CASE WHEN :req_master THEN c.has_master = true ELSE true END
-                        ORDER BY
-                            similarity_score DESC
-                        LIMIT :total_candidate
-                    )
-                    SELECT * FROM similarity_scores;
-                    """
+            job = self.load_job(connection, job_id)
+            candidates, sort_keys = self.rank(
+                connection,
+                job,
+                total_candidate,
+                cursor,
+                ef_search,
+                probes,
+                rerank,
+            )
+            # The re-ranked order has no keyset to continue from
+            return self.page(
+                candidates, total_candidate, None if rerank else sort_keys
+            )
+
+    def load_job(self, connection, job_id: UUID):
+        """Embedding and requirements of an active job."""
+        job = connection.execute(
+            select(
+                JobModel.tenure,
+                JobModel.is_bachelor,
+                JobModel.is_master,
+                JobModel.job_embedding,
+                JobModel.job_embedding_full,
+            ).where(JobModel.job_id == job_id, JobModel.status == "active")
+        ).first()
+
+        if not job:
+            raise ValueError(f"No active job found with ID: {job_id}")
+        return job
+
+    def cached_match(
+        self,
+        connection,
+        job_id: UUID,
+        total_candidate: int,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank: bool = False,
+    ) -> Dict:
+        """First page served from the match cache when still valid."""
+        key = self.match_cache.make_key(
+            job_id, total_candidate, ef_search, probes, rerank
+        )
+        # Read versions before ranking so writes racing the ranking are
+        # picked up by the next delta
+        versions = self.match_cache.versions(connection)
+        candidates_version = versions.get(CANDIDATES_SCOPE, 0)
+        jobs_version = versions.get(JOBS_SCOPE, 0)
+
+        entry = self.match_cache.get(key)
+        if (
+            entry is not None
+            and entry.jobs_version == jobs_version
+            and entry.candidates_version == candidates_version
+        ):
+            self.match_cache.record("hit")
+            return self.page(
+                entry.candidates,
+                total_candidate,
+                None if rerank else entry.distances,
+            )
+
+        # Job versions only retire the old row, so after a job update the
+        # entry stays usable as long as this job is still active
+        job = self.load_job(connection, job_id)
+
+        merged = None
+        if entry is not None and entry.candidates_version == candidates_version:
+            self.match_cache.record("hit")
+            merged = entry.candidates, entry.distances
+        elif entry is not None and not rerank:
+            # Re-ranked entries hold full-dim distances, recompute instead
+            with timed("match_candidates", "delta"):
+                merged = self.merge_delta(
+                    connection, job, entry, total_candidate
                 )
+            if merged is not None:
+                self.match_cache.record("delta")
+
+        if merged is None:
+            self.match_cache.record("miss")
+            merged = self.rank(
+                connection,
+                job,
+                total_candidate,
+                None,
+                ef_search,
+                probes,
+                rerank,
+            )
+
+        candidates, distances = merged
+        self.match_cache.set(
+            key,
+            MatchCacheEntry(
+                candidates, distances, candidates_version, jobs_version
+            ),
+        )
+        return self.page(
+            candidates, total_candidate, None if rerank else distances
+        )
+
+    def merge_delta(
+        self, connection, job, entry: MatchCacheEntry, total_candidate: int
+    ) -> Optional[Tuple[List[Dict], List[float]]]:
+        """Merge candidates written since an entry was cached into it.
+
+        Ranked candidates whose profile alone changed keep their place and
+        get the new contact fields.
+
+        Returns:
+            Merged candidates and distances, or None when the whole ranking
+            must be recomputed: too many changes, or an already ranked
+            candidate changed and may have dropped out of the top-k
+        """
+        conditions = []
+        if job.tenure:
+            conditions.append("c.candidate_tenure >= :min_tenure")
+        if job.is_bachelor:
+            conditions.append("c.has_bachelor = true")
+        if job.is_master:
+            conditions.append("c.has_master = true")
+        eligible = " AND ".join(conditions) if conditions else "true"
+
+        query = text(
+            f"""
+            SELECT
+                c.candidate_id,
+                p.first_name,
+                p.last_name,
+                p.email,
+                {self.vector_index.distance("c.candidate_embedding", "job_embedding")} AS distance,
+                COALESCE({eligible}, false) AS eligible
+            FROM
+                candidate_matching c
+                JOIN candidates p ON p.candidate_id = c.candidate_id
+            WHERE
+                c.change_version > :since
+            LIMIT :max_delta
+            """
+        ).bindparams(bindparam("job_embedding", type_=Vector(32)))
+
+        rows = connection.execute(
+            query,
+            {
+                "job_embedding": job.job_embedding,
+                "min_tenure": job.tenure or 0,
+                "since": entry.candidates_version,
+                "max_delta": MAX_DELTA_ROWS,
+            },
+        ).fetchall()
+
+        # Profile edits bump candidates.change_version without rewriting
+        # the matching projection
+        profiles = connection.execute(
+            text(
+                """
+                SELECT candidate_id, first_name, last_name, email
+                FROM candidates
+                WHERE change_version > :since
+                LIMIT :max_delta
+                """
+            ),
+            {"since": entry.candidates_version, "max_delta": MAX_DELTA_ROWS},
+        ).fetchall()
+
+        if len(rows) >= MAX_DELTA_ROWS or len(profiles) >= MAX_DELTA_ROWS:
+            return None
+        ranked = {candidate["candidate_id"] for candidate in entry.candidates}
+        if any(str(row.candidate_id) in ranked for row in rows):
+            return None
+
+        profiles = {str(row.candidate_id): row for row in profiles}
+        candidates = []
+        for candidate in entry.candidates:
+            profile = profiles.get(candidate["candidate_id"])
+            if profile is not None:
+                candidate = {
+                    **candidate,
+                    "first_name": profile.first_name,
+                    "last_name": profile.last_name,
+                    "email": profile.email,
+                }
+            candidates.append(candidate)
+
+        # New or changed candidates can only push others out of the top-k
+        merged = list(zip(entry.distances, candidates))
+        merged.extend(
+            (float(row.distance), self.to_candidate(row))
+            for row in rows
+            if row.eligible
+        )
+        merged.sort(key=lambda item: (item[0], item[1]["candidate_id"]))
+        merged = merged[:total_candidate]
+
+        return (
+            [candidate for _, candidate in merged],
+            [distance for distance, _ in merged],
+        )
 
-                result = session.execute(
-                    query,
-                    {
-                        "min_tenure": job.tenure if job.tenure else 0,
-                        "req_bachelor": True if job.is_bachelor else False,
-                        "req_master": True if job.is_master else False,
-                        "total_candidate": total_candidate,
-                    },
+    def rank(
+        self,
+        connection,
+        job,
+        total_candidate: int,
+        cursor: Optional[Tuple[float, str]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank: bool = False,
+    ) -> Tuple[List[Dict], List[float]]:
+        """Top candidates for a job with the sort key of each one.
+
+        With rerank, the 32-dim query recalls rerank_recall rows and only
+        those are ordered on the full-dim embeddings. The in-memory index
+        holds 32-dim embeddings only and never re-ranks.
+        """
+        min_tenure = job.tenure if job.tenure else 0
+        req_bachelor = True if job.is_bachelor else False
+        req_master = True if job.is_master else False
+
+        if self.memory_index is not None:
+            with timed("match_candidates", "memory_search"):
+                candidates = self.memory_index.search(
+                    job.job_embedding,
+                    total_candidate,
+                    min_tenure=min_tenure,
+                    req_bachelor=req_bachelor,
+                    req_master=req_master,
+                    after=cursor,
                 )
+            match_rows.observe(
+                len(self.memory_index), strategy="memory", kind="scanned"
+            )
+            match_rows.observe(
+                len(candidates), strategy="memory", kind="returned"
+            )
+            # The in-memory index sorts on negated similarity
+            return candidates, [
+                -candidate["similarity_score"] for candidate in candidates
+            ]
+
+        rerank = rerank and job.job_embedding_full is not None
+        recall = (
+            max(self.rerank_recall, total_candidate)
+            if rerank
+            else total_candidate
+        )
+
+        with timed("match_candidates", "plan"):
+            self.statistics.refresh(connection)
+            plan = self.planner.plan(
+                recall, min_tenure, req_bachelor, req_master
+            )
+
+        self.vector_index.apply_tuning(
+            connection, ef_search=ef_search, probes=probes
+        )
+
+        params = {
+            "job_embedding": job.job_embedding,
+            "min_tenure": min_tenure,
+            "total_candidate": recall,
+            "fetch_size": self.scan_size(plan.fetch_size),
+            "rescore_size": self.scan_size(recall),
+        }
+        if cursor is not None:
+            params["cursor_distance"], params["cursor_id"] = cursor
+
+        # Filters, the keyset of cursor pages included, can leave an
+        # approximate scan short of top-k
+        filtered = (
+            min_tenure > 0 or req_bachelor or req_master or cursor is not None
+        )
+        # Past the first page, the nearest rows the index returns all sit
+        # before the cursor, so the scan must continue past them
+        iterative = cursor is not None and self.vector_index.iterative_scan
+        if iterative and plan.strategy != STRATEGY_EXACT:
+            self.vector_index.apply_tuning(connection, iterative=True)
+        # Index rows read, or filtered rows sorted by an exact scan
+        rows_scanned = 0
+        while True:
+            scanned = None
+            if plan.strategy != STRATEGY_EXACT:
+                scanned = params["fetch_size"]
+            rows_scanned += scanned or int(plan.estimated_rows)
+            if scanned and self.vector_index.index_type == "hnsw":
+                # HNSW returns at most ef_search rows per scan, never tune
+                # below the server default
+                self.vector_index.apply_tuning(
+                    connection,
+                    ef_search=max(
+                        ef_search or 0, HNSW_DEFAULT_EF_SEARCH, scanned
+                    ),
+                )
+
+            query = self.build_query(
+                plan.strategy,
+                min_tenure,
+                req_bachelor,
+                req_master,
+                after_cursor=cursor is not None,
+            )
+            with timed("match_candidates", "query"):
+                rows = connection.execute(query, params).fetchall()
+
+            if (
+                plan.strategy == STRATEGY_EXACT
+                or not filtered
+                or len(rows) >= recall
+            ):
+                break
+
+            # Not enough rows survived the filters, scan deeper. An
+            # iterative scan already went as deep as the index allows
+            plan.fetch_size *= 2
+            if iterative or plan.fetch_size > MAX_ANN_FETCH:
+                plan.strategy = STRATEGY_EXACT
+            params["fetch_size"] = self.scan_size(plan.fetch_size)
+            if self.vector_index.index_type == "ivfflat":
+                # IVFFlat scans only return rows of the probed lists
+                probes = (probes or 1) * 2
+                self.vector_index.apply_tuning(connection, probes=probes)
+
+        match_rows.observe(
+            rows_scanned, strategy=plan.strategy, kind="scanned"
+        )
+        match_rows.observe(
+            len(rows), strategy=plan.strategy, kind="returned"
+        )
 
-                candidates = []
-                for row in result:
-                    candidates.append(
-                        {
-                            "candidate_id": str(row.candidate_id),
-                            "first_name": row.first_name,
-                            "last_name": row.last_name,
-                            "email": row.email,
-                            "similarity_score": float(row.similarity_score),
-                        }
-                    )
-
-                return candidates
-
-        except Exception as e:
-            print(f"Error matching candidates: {str(e)}")
-            return []
+        if rerank:
+            with timed("match_candidates", "rerank"):
+                return self.rerank(connection, job, rows, total_candidate)
+
+        return (
+            [self.to_candidate(row) for row in rows],
+            [float(row.distance) for row in rows],
+        )
+
+    def scan_size(self, rows: int) -> int:
+        """Index rows to read so `rows` remain after rescoring."""
+        return max(
+            rows, min(rows * self.vector_index.rescore_factor, MAX_ANN_FETCH)
+        )
+
+    def rerank(
+        self, connection, job, rows, total_candidate: int
+    ) -> Tuple[List[Dict], List[float]]:
+        """Order recalled rows exactly on the full-dim embeddings.
+
+        Rows stored before full embeddings existed are left out rather
+        than ranked on their 32-dim distance, which isn't comparable;
+        re-embed them to bring them back (see ddl.sql).
+        """
+        if not rows:
+            return [], []
+
+        query = text(
+            f"""
+            SELECT
+                c.candidate_id,
+                {self.vector_index.distance("c.candidate_embedding_full", "job_embedding_full")} AS distance
+            FROM
+                candidates c
+            WHERE
+                c.candidate_id IN :candidate_ids
+                AND c.candidate_embedding_full IS NOT NULL
+            """
+        ).bindparams(
+            bindparam(
+                "job_embedding_full", type_=Vector(FULL_EMBEDDING_DIM)
+            ),
+            bindparam("candidate_ids", expanding=True),
+        )
+        distances = {
+            str(row.candidate_id): float(row.distance)
+            for row in connection.execute(
+                query,
+                {
+                    "job_embedding_full": job.job_embedding_full,
+                    "candidate_ids": [row.candidate_id for row in rows],
+                },
+            )
+        }
+
+        ranked = sorted(
+            (row for row in rows if str(row.candidate_id) in distances),
+            key=lambda row: (
+                distances[str(row.candidate_id)],
+                str(row.candidate_id),
+            ),
+        )[:total_candidate]
+
+        candidates = []
+        sort_keys = []
+        for row in ranked:
+            distance = distances[str(row.candidate_id)]
+            candidate = self.to_candidate(row)
+            candidate["similarity_score"] = self.vector_index.to_similarity(
+                distance
+            )
+            candidates.append(candidate)
+            sort_keys.append(distance)
+        return candidates, sort_keys
+
+    def to_candidate(self, row) -> Dict:
+        return {
+            "candidate_id": str(row.candidate_id),
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "email": row.email,
+            "similarity_score": self.vector_index.to_similarity(
+                float(row.distance)
+            ),
+        }
+
+    def page(
+        self,
+        candidates: List[Dict],
+        total_candidate: int,
+        sort_keys: Optional[List],
+    ) -> Dict:
+        """Wrap a result page with the cursor of the next page.
+
+        Without sort keys the page can't be continued.
+        """
+        next_cursor = None
+        if (
+            sort_keys is not None
+            and candidates
+            and len(candidates) >= total_candidate
+        ):
+            next_cursor = self.encode_cursor(
+                sort_keys[-1], candidates[-1]["candidate_id"]
+            )
+        return {"candidates": candidates, "next_cursor": next_cursor}
@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+import asyncio
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from sqlalchemy.exc import SQLAlchemyError
 
 
@@ -12,11 +14,29 @@ class Database:
         host,
         port,
         db,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        echo=False,
     ):
+        self.url = f"{user}:{password}@{host}:{port}/{db}"
+        self.pool_options = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_pre_ping": pool_pre_ping,
+            "pool_recycle": pool_recycle,
+            "echo": echo,
+        }
+        self._async_engine = None
 
         self.engine = create_engine(
-            f"postgresql://{user}:{password}@{host}:{port}/{db}",
-            echo=True,  # Set to False in production
+            f"postgresql://{self.url}",
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_pre_ping=pool_pre_ping,
+            pool_recycle=pool_recycle,
+            echo=echo,  # Logs every statement, keep off in production
         )
         try:
             with self.engine.connect() as conn:
@@ -36,3 +56,76 @@ class Database:
             raise e
         finally:
             session.close()
+
+    @contextmanager
+    def get_connection(self):
+        """Core connection for reads, without ORM session overhead.
+
+        The transaction is rolled back on exit, so settings made with
+        set_config(..., true) never leak to the next pool user.
+        """
+        with self.engine.connect() as connection:
+            yield connection
+
+    def run(self, function, *args, **kwargs):
+        """Call function(connection, ...) on a pooled connection."""
+        with self.get_connection() as connection:
+            return function(connection, *args, **kwargs)
+
+    async def run_async(
+        self, function, *args, in_thread: bool = False, **kwargs
+    ):
+        """Call function(connection, ...) without blocking the event loop.
+
+        The function runs on an asyncpg connection through run_sync, which
+        keeps its Python code on the loop. With in_thread it runs in a
+        worker thread on a pooled connection instead, for CPU-bound work
+        such as in-memory searches.
+        """
+        if in_thread:
+            return await asyncio.to_thread(self.run, function, *args, **kwargs)
+        async with self.get_async_connection() as connection:
+            return await connection.run_sync(function, *args, **kwargs)
+
+    def pool_stats(self) -> dict:
+        """Connections of the sync pool by state."""
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # Negative while the pool isn't full yet
+            "overflow": max(pool.overflow(), 0),
+        }
+
+    @property
+    def async_engine(self):
+        """asyncpg engine, created on first use so sync-only processes
+        don't need the driver."""
+        if self._async_engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            engine = create_async_engine(
+                f"postgresql+asyncpg://{self.url}", **self.pool_options
+            )
+
+            @event.listens_for(engine.sync_engine, "connect")
+            def register_vector(dbapi_connection, connection_record):
+                # Exchange vectors as text, matching pgvector's SQLAlchemy type
+                dbapi_connection.run_async(
+                    lambda connection: connection.set_type_codec(
+                        "vector",
+                        encoder=str,
+                        decoder=str,
+                        format="text",
+                    )
+                )
+
+            self._async_engine = engine
+        return self._async_engine
+
+    @asynccontextmanager
+    async def get_async_connection(self):
+        """Async Core connection for read paths of async endpoints."""
+        async with self.async_engine.connect() as connection:
+            yield connection
@@ -0,0 +1,164 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from models.cache_model import EmbeddingCacheModel
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: in-memory LRU, optionally backed by Postgres.
+
+    Keys cover the text, the encode task, the truncation dimension and the
+    model id, so the same text embedded differently never collides.
+    """
+
+    def __init__(
+        self, model_id: str, max_entries: int = 50000, database=None
+    ):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.database = database
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(
+        self, text: str, task: Optional[str], truncate_dim: Optional[int]
+    ) -> str:
+        payload = "\x1f".join(
+            [self.model_id, task or "", str(truncate_dim or ""), text]
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Cached embeddings for the keys that have one."""
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    found[key] = self.entries[key]
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.database is not None:
+            with self.database.get_session() as session:
+                rows = session.execute(
+                    select(
+                        EmbeddingCacheModel.cache_key,
+                        EmbeddingCacheModel.embedding,
+                    ).where(EmbeddingCacheModel.cache_key.in_(missing))
+                )
+                stored = {
+                    row.cache_key: np.asarray(row.embedding, dtype=np.float32)
+                    for row in rows
+                }
+            self._remember(stored)
+            found.update(stored)
+
+        with self.lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(
+        self,
+        embeddings: Dict[str, np.ndarray],
+        task: Optional[str],
+        truncate_dim: Optional[int],
+    ) -> None:
+        """Store freshly computed embeddings in every tier."""
+        self._remember(embeddings)
+
+        if self.database is not None and embeddings:
+            with self.database.get_session() as session:
+                session.execute(
+                    insert(EmbeddingCacheModel)
+                    .values(
+                        [
+                            {
+                                "cache_key": key,
+                                "model_id": self.model_id,
+                                "task": task,
+                                "truncate_dim": truncate_dim,
+                                "embedding": [float(x) for x in embedding],
+                            }
+                            for key, embedding in embeddings.items()
+                        ]
+                    )
+                    .on_conflict_do_nothing(
+                        index_elements=[EmbeddingCacheModel.cache_key]
+                    )
+                )
+
+    def _remember(self, embeddings: Dict[str, np.ndarray]) -> None:
+        with self.lock:
+            for key, embedding in embeddings.items():
+                self.entries[key] = embedding
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+class CachedEmbeddingModel:
+    """Wrap a SentenceTransformer so `encode` skips already seen texts.
+
+    Only texts missing from the cache are sent to the model, deduplicated
+    and in a single encode call.
+    """
+
+    def __init__(self, model, cache: EmbeddingCache):
+        self.model = model
+        self.cache = cache
+
+    def encode(
+        self,
+        sentences,
+        task: Optional[str] = None,
+        truncate_dim: Optional[int] = None,
+        **kwargs,
+    ):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        keys = [self.cache.make_key(text, task, truncate_dim) for text in texts]
+        embeddings = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        # Encode each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in embeddings:
+                missing.setdefault(key, text)
+
+        if missing:
+            encoded = self.model.encode(
+                list(missing.values()),
+                task=task,
+                truncate_dim=truncate_dim,
+                **kwargs,
+            )
+            computed = {
+                key: np.asarray(embedding, dtype=np.float32)
+                for key, embedding in zip(missing, encoded)
+            }
+            self.cache.set_many(computed, task, truncate_dim)
+            embeddings.update(computed)
+
+        if single:
+            return embeddings[keys[0]]
+        return np.stack([embeddings[key] for key in keys]) if keys else []
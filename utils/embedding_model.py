@@ -0,0 +1,81 @@
+import threading
+from typing import Optional
+
+import httpx
+import numpy as np
+
+
+class LazyEmbeddingModel:
+    """SentenceTransformer loaded on first encode or explicit warmup.
+
+    Importing sentence_transformers pulls in torch, so both the import and
+    the model load are deferred until embeddings are actually needed.
+    """
+
+    def __init__(self, model_name: str, trust_remote_code: bool = True):
+        self.model_name = model_name
+        self.trust_remote_code = trust_remote_code
+        self.model = None
+        self.lock = threading.Lock()
+
+    def is_ready(self) -> bool:
+        return self.model is not None
+
+    def load(self):
+        if self.model is None:
+            with self.lock:
+                if self.model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    self.model = SentenceTransformer(
+                        self.model_name,
+                        trust_remote_code=self.trust_remote_code,
+                    )
+        return self.model
+
+    def encode(self, sentences, **kwargs):
+        return self.load().encode(sentences, **kwargs)
+
+
+class RemoteEmbeddingModel:
+    """Encode through a local embedding server (see embedding_server.py).
+
+    Lets several API and worker processes share one loaded model instead
+    of each holding its own copy.
+    """
+
+    def __init__(self, url: str, timeout: float = 60):
+        self.url = url.rstrip("/")
+        self.client = httpx.Client(timeout=timeout)
+
+    def is_ready(self) -> bool:
+        try:
+            return self.client.get(f"{self.url}/ready").status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def load(self):
+        return self
+
+    def encode(
+        self,
+        sentences,
+        task: Optional[str] = None,
+        truncate_dim: Optional[int] = None,
+        **kwargs,
+    ):
+        single = isinstance(sentences, str)
+        response = self.client.post(
+            f"{self.url}/encode",
+            json={
+                "sentences": [sentences] if single else list(sentences),
+                "task": task,
+                "truncate_dim": truncate_dim,
+            },
+        )
+        response.raise_for_status()
+
+        embeddings = np.asarray(
+            response.json()["embeddings"], dtype=np.float32
+        )
+        return embeddings[0] if single else embeddings
@@ -0,0 +1,199 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from utils.metrics import encode_batch_size, stage_seconds, timed
+
+
+class EmbeddingRequest:
+    def __init__(
+        self,
+        text: str,
+        task: Optional[str],
+        truncate_dim: Optional[int],
+        options: Tuple = (),
+    ):
+        self.text = text
+        self.task = task
+        self.truncate_dim = truncate_dim
+        # Other encode keyword arguments, as sorted (name, value) pairs
+        self.options = options
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class EmbeddingWorker:
+    """Run model.encode on dedicated threads with dynamic micro-batching.
+
+    Callers enqueue texts and get futures back. A worker thread waits at
+    most max_wait_ms to gather up to max_batch_size requests, encodes them
+    in one call per (task, truncate_dim, options) group and resolves the
+    futures. Exposes `encode` with the SentenceTransformer signature so
+    services can use it in place of the model.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 10,
+        num_workers: int = 1,
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.num_workers = num_workers
+        self.requests = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        with self.lock:
+            if self.threads:
+                return
+            for number in range(self.num_workers):
+                thread = threading.Thread(
+                    target=self._run,
+                    name=f"embedding-worker-{number}",
+                    daemon=True,
+                )
+                thread.start()
+                self.threads.append(thread)
+
+    def stop(self) -> None:
+        with self.lock:
+            for _ in self.threads:
+                self.requests.put(None)
+            for thread in self.threads:
+                thread.join()
+            self.threads = []
+
+    def queue_depth(self) -> int:
+        return self.requests.qsize()
+
+    def submit(
+        self,
+        text: str,
+        task: Optional[str] = None,
+        truncate_dim: Optional[int] = None,
+        **kwargs,
+    ) -> Future:
+        """Queue one text and return a future of its embedding.
+
+        Keyword arguments are forwarded to model.encode, requests are only
+        batched with others passing the same ones.
+
+        Raises:
+            TypeError: A keyword argument value is not hashable
+        """
+        options = tuple(sorted(kwargs.items()))
+        try:
+            hash(options)
+        except TypeError as e:
+            raise TypeError(f"Unsupported encode arguments: {kwargs}") from e
+
+        self.start()
+        request = EmbeddingRequest(text, task, truncate_dim, options)
+        self.requests.put(request)
+        return request.future
+
+    def encode(
+        self,
+        sentences,
+        task: Optional[str] = None,
+        truncate_dim: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        **kwargs,
+    ):
+        """SentenceTransformer.encode through the micro-batching queue.
+
+        batch_size is ignored, the worker sizes batches across callers.
+        Other keyword arguments are forwarded to the model.
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        futures = [
+            self.submit(text, task, truncate_dim, **kwargs) for text in texts
+        ]
+        embeddings = [future.result() for future in futures]
+
+        if single:
+            return embeddings[0]
+        return np.stack(embeddings) if embeddings else []
+
+    def _collect(self, first: EmbeddingRequest) -> List[EmbeddingRequest]:
+        """Gather requests until the batch is full or max wait passes."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # Put the stop signal back for after this batch
+                self.requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self.requests.get()
+            if first is None:
+                return
+
+            batch = [first]
+            try:
+                batch = self._collect(first)
+                self._encode_batch(batch)
+            except Exception as e:
+                # Never leave callers waiting, and keep the thread alive
+                print(f"Error in embedding worker: {str(e)}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _encode_batch(self, batch: List[EmbeddingRequest]) -> None:
+        groups = {}
+        started = time.perf_counter()
+        for request in batch:
+            stage_seconds.observe(
+                started - request.queued_at,
+                operation="embedding",
+                stage="queue_wait",
+            )
+            groups.setdefault(
+                (request.task, request.truncate_dim, request.options), []
+            ).append(request)
+
+        for (task, truncate_dim, options), requests in groups.items():
+            encode_batch_size.observe(len(requests), task=task or "")
+            try:
+                with timed("embedding", "encode"):
+                    embeddings = self.model.encode(
+                        [request.text for request in requests],
+                        task=task,
+                        truncate_dim=truncate_dim,
+                        batch_size=len(requests),
+                        **dict(options),
+                    )
+                if len(embeddings) != len(requests):
+                    raise ValueError(
+                        f"Model returned {len(embeddings)} embeddings "
+                        f"for {len(requests)} texts"
+                    )
+                for request, embedding in zip(requests, embeddings):
+                    request.future.set_result(embedding)
+            except Exception as e:
+                for request in requests:
+                    if not request.future.done():
+                        request.future.set_exception(e)
@@ -0,0 +1,112 @@
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from models.cache_model import ExtractionCacheModel
+
+
+class ExtractionCache:
+    """Postgres-backed cache of LLM job description extractions.
+
+    Entries are keyed by a hash of the normalized description, the prompt
+    template and the model name, so changing either invalidates them.
+    The least recently used entries beyond max_entries are evicted.
+    """
+
+    def __init__(
+        self, database, max_entries: int = 100000, prune_interval: int = 100
+    ):
+        self.database = database
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def normalize(description: str) -> str:
+        """Collapse whitespace so formatting-only edits share an entry."""
+        return " ".join(description.split())
+
+    def make_key(
+        self, description: str, prompt_template: str, model_name: str
+    ) -> str:
+        payload = "\x1f".join(
+            [self.normalize(description), prompt_template, model_name]
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """Cached response for a key, or None."""
+        with self.database.get_session() as session:
+            response = session.execute(
+                select(ExtractionCacheModel.response).where(
+                    ExtractionCacheModel.cache_key == cache_key
+                )
+            ).scalar()
+
+            if response is not None:
+                session.execute(
+                    update(ExtractionCacheModel)
+                    .where(ExtractionCacheModel.cache_key == cache_key)
+                    .values(last_used_at=datetime.now())
+                )
+
+        with self.lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def set(self, cache_key: str, model_name: str, response: str) -> None:
+        """Store a response, evicting old entries every prune_interval writes."""
+        now = datetime.now()
+        statement = insert(ExtractionCacheModel).values(
+            cache_key=cache_key,
+            model_name=model_name,
+            response=response,
+            created_at=now,
+            last_used_at=now,
+        )
+        with self.database.get_session() as session:
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[ExtractionCacheModel.cache_key],
+                    set_={"response": response, "last_used_at": now},
+                )
+            )
+
+        with self.lock:
+            self.writes += 1
+            should_prune = self.writes % self.prune_interval == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self) -> None:
+        """Delete least recently used entries beyond max_entries."""
+        stale = (
+            select(ExtractionCacheModel.cache_key)
+            .order_by(ExtractionCacheModel.last_used_at.desc())
+            .offset(self.max_entries)
+        )
+        with self.database.get_session() as session:
+            session.execute(
+                delete(ExtractionCacheModel).where(
+                    ExtractionCacheModel.cache_key.in_(stale)
+                )
+            )
+
+    def stats(self) -> Dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,253 @@
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import ARRAY, Text, bindparam, select, text
+
+from models.job_model import JobModel
+from utils.candidate_match import CandidateMatch
+from utils.metrics import counted, timed
+from utils.vector_index import VectorIndex
+
+
+class HybridMatch:
+    """Rank candidates on vector similarity fused with skill overlap.
+
+    The lexical stage keeps the lexical_recall candidates sharing the most
+    required skills, found through the GIN index on
+    candidate_matching.skill_terms, and only those are scored against the
+    job embedding. Profiles are read for the final top-k only. When fewer
+    than k candidates share a skill, the rest is filled from the
+    vector-only match with zero overlap.
+
+    hybrid_score = (1 - skill_weight) * similarity + skill_weight * overlap
+    where overlap is the fraction of the job's skills the candidate has.
+    """
+
+    def __init__(
+        self,
+        database,
+        candidate_match: CandidateMatch,
+        vector_index: Optional[VectorIndex] = None,
+        skill_weight: float = 0.3,
+        lexical_recall: int = 1000,
+    ):
+        if not 0 <= skill_weight <= 1:
+            raise ValueError(f"skill_weight must be in [0, 1]: {skill_weight}")
+
+        self.database = database
+        self.candidate_match = candidate_match
+        self.vector_index = vector_index or VectorIndex()
+        self.skill_weight = skill_weight
+        self.lexical_recall = lexical_recall
+
+    def get_candidates_by_job(
+        self,
+        job_id: UUID,
+        total_candidate: int,
+        skill_weight: Optional[float] = None,
+    ) -> List[Dict]:
+        """Get candidates for a job ranked by hybrid score.
+
+        Args:
+            job_id: UUID of the job
+            total_candidate: Number of top candidates to return
+            skill_weight: Weight of skill overlap, None for the default
+
+        Returns:
+            List of candidates with similarity, overlap and hybrid scores
+        """
+        with counted("match_hybrid"):
+            return self.database.run(
+                self.match_on_connection, job_id, total_candidate, skill_weight
+            )
+
+    async def get_candidates_by_job_async(
+        self,
+        job_id: UUID,
+        total_candidate: int,
+        skill_weight: Optional[float] = None,
+    ) -> List[Dict]:
+        """get_candidates_by_job for async endpoints.
+
+        The embedding fill-up searches the in-memory index when there is
+        one, so it then runs in a worker thread, off the event loop.
+        """
+        with counted("match_hybrid"):
+            return await self.database.run_async(
+                self.match_on_connection,
+                job_id,
+                total_candidate,
+                skill_weight,
+                in_thread=self.candidate_match.memory_index is not None,
+            )
+
+    def match_on_connection(
+        self,
+        connection,
+        job_id: UUID,
+        total_candidate: int,
+        skill_weight: Optional[float] = None,
+    ) -> List[Dict]:
+        """Blend skill overlap and similarity for the job on connection."""
+        if skill_weight is None:
+            skill_weight = self.skill_weight
+        if not 0 <= skill_weight <= 1:
+            raise ValueError(f"skill_weight must be in [0, 1]: {skill_weight}")
+
+        job = connection.execute(
+            select(
+                JobModel.tenure,
+                JobModel.is_bachelor,
+                JobModel.is_master,
+                JobModel.job_embedding,
+                JobModel.skill_terms,
+            ).where(JobModel.job_id == job_id, JobModel.status == "active")
+        ).first()
+
+        if not job:
+            raise ValueError(f"No active job found with ID: {job_id}")
+
+        candidates = []
+        if job.skill_terms:
+            with timed("match_hybrid", "lexical"):
+                candidates = self.lexical_candidates(
+                    connection, job, total_candidate, skill_weight
+                )
+
+        if len(candidates) < total_candidate:
+            # Too few skill matches, fill up with the closest embeddings
+            found = {candidate["candidate_id"] for candidate in candidates}
+            page = self.candidate_match.match_on_connection(
+                connection, job_id, total_candidate
+            )
+            for candidate in page["candidates"]:
+                if candidate["candidate_id"] in found:
+                    continue
+                candidates.append(
+                    {
+                        **candidate,
+                        "skill_overlap": 0.0,
+                        "hybrid_score": (1 - skill_weight)
+                        * candidate["similarity_score"],
+                    }
+                )
+
+        candidates.sort(
+            key=lambda candidate: (
+                -candidate["hybrid_score"],
+                candidate["candidate_id"],
+            )
+        )
+        return candidates[:total_candidate]
+
+    def lexical_candidates(
+        self, connection, job, total_candidate: int, skill_weight: float
+    ) -> List[Dict]:
+        """Top candidates sharing at least one skill with the job."""
+        filters = ["c.skill_terms && :skill_terms"]
+        if job.tenure:
+            filters.append("c.candidate_tenure >= :min_tenure")
+        if job.is_bachelor:
+            filters.append("c.has_bachelor = true")
+        if job.is_master:
+            filters.append("c.has_master = true")
+
+        similarity = self.vector_index.similarity(
+            "c.candidate_embedding", "job_embedding"
+        )
+        # Scored on the narrow projection, capped to the largest overlaps,
+        # profiles are read for the top-k only
+        query = text(
+            f"""
+            WITH lexical AS (
+                SELECT
+                    c.candidate_id,
+                    c.candidate_embedding,
+                    cardinality(
+                        ARRAY(
+                            SELECT unnest(c.skill_terms)
+                            INTERSECT
+                            SELECT unnest(:skill_terms)
+                        )
+                    )::float / CAST(:total_skills AS float) AS overlap
+                FROM
+                    candidate_matching c
+                WHERE
+                    {" AND ".join(filters)}
+                ORDER BY
+                    overlap DESC,
+                    c.candidate_id
+                LIMIT :lexical_recall
+            ),
+            scored AS (
+                SELECT
+                    c.candidate_id,
+                    c.overlap,
+                    {similarity} AS similarity
+                FROM
+                    lexical c
+            ),
+            ranked AS (
+                SELECT
+                    candidate_id,
+                    similarity,
+                    overlap,
+                    CAST(:vector_weight AS float) * similarity
+                        + CAST(:skill_weight AS float) * overlap
+                        AS hybrid_score
+                FROM
+                    scored
+                ORDER BY
+                    hybrid_score DESC,
+                    candidate_id
+                LIMIT :total_candidate
+            )
+            SELECT
+                r.candidate_id,
+                p.first_name,
+                p.last_name,
+                p.email,
+                r.similarity,
+                r.overlap,
+                r.hybrid_score
+            FROM
+                ranked r
+                JOIN candidates p ON p.candidate_id = r.candidate_id
+            ORDER BY
+                r.hybrid_score DESC,
+                r.candidate_id
+            """
+        ).bindparams(
+            bindparam("job_embedding", type_=Vector(32)),
+            bindparam("skill_terms", type_=ARRAY(Text)),
+        )
+
+        result = connection.execute(
+            query,
+            {
+                "job_embedding": job.job_embedding,
+                "skill_terms": list(job.skill_terms),
+                "total_skills": len(job.skill_terms),
+                "min_tenure": job.tenure or 0,
+                "vector_weight": 1 - skill_weight,
+                "skill_weight": skill_weight,
+                "lexical_recall": max(self.lexical_recall, total_candidate),
+                "total_candidate": total_candidate,
+            },
+        )
+
+        candidates = []
+        for row in result:
+            candidates.append(
+                {
+                    "candidate_id": str(row.candidate_id),
+                    "first_name": row.first_name,
+                    "last_name": row.last_name,
+                    "email": row.email,
+                    "similarity_score": float(row.similarity),
+                    "skill_overlap": float(row.overlap),
+                    "hybrid_score": float(row.hybrid_score),
+                }
+            )
+        return candidates
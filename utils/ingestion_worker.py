@@ -0,0 +1,121 @@
+import time
+from typing import Dict, Optional
+from uuid import UUID
+
+from utils.metrics import errors_total, timed
+from utils.task_queue import TaskQueue
+
+# Operations that run the job description through the LLM
+JOB_OPERATIONS = ("insert_job", "update_job")
+
+
+class IngestionWorker:
+    """Claim ingestion tasks from the queue and run them through services."""
+
+    def __init__(
+        self,
+        task_queue: TaskQueue,
+        job_service,
+        candidate_service,
+        batch_size: int = 64,
+        poll_interval: float = 1.0,
+    ):
+        self.task_queue = task_queue
+        self.job_service = job_service
+        self.candidate_service = candidate_service
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def run_forever(self) -> None:
+        while True:
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+
+    def run_once(self) -> int:
+        """Process one claimed batch and return how many tasks it held."""
+        tasks = self.task_queue.claim(limit=self.batch_size)
+
+        # New candidates share one encode call and one insert
+        inserts = [task for task in tasks if task.operation == "insert_candidate"]
+        if inserts:
+            self.run_candidate_batch(inserts)
+
+        # Job descriptions are sent to the LLM concurrently
+        jobs = [task for task in tasks if task.operation in JOB_OPERATIONS]
+        if jobs:
+            self.run_job_batch(jobs)
+
+        for task in tasks:
+            if task.operation not in ("insert_candidate", *JOB_OPERATIONS):
+                self.run_task(task)
+
+        return len(tasks)
+
+    def run_candidate_batch(self, tasks) -> None:
+        try:
+            with timed("insert_candidate_batch", "total"):
+                self.candidate_service.insert_candidate_batch(
+                    [(task.entity_id, task.payload) for task in tasks]
+                )
+            self.task_queue.complete([task.task_id for task in tasks])
+        except Exception:
+            errors_total.inc(operation="insert_candidate_batch")
+            # Retry one by one so a single bad record fails alone
+            for task in tasks:
+                self.run_task(task)
+
+    def run_job_batch(self, tasks) -> None:
+        """Extract every description at once, then store job by job."""
+        job_data = [
+            task.payload["job_data"]
+            if task.operation == "update_job"
+            else task.payload
+            for task in tasks
+        ]
+        with timed("job_batch", "extract"):
+            extracted = self.job_service.extract_job_descriptions(
+                [data["job_description"] for data in job_data]
+            )
+
+        for task, job_desc_info in zip(tasks, extracted):
+            if isinstance(job_desc_info, Exception):
+                errors_total.inc(operation=task.operation)
+                self.task_queue.fail(task, str(job_desc_info))
+            else:
+                self.run_task(task, job_desc_info)
+
+    def run_task(self, task, job_desc_info: Optional[Dict] = None) -> None:
+        try:
+            with timed(task.operation, "total"):
+                self.dispatch(task, job_desc_info)
+            self.task_queue.complete([task.task_id])
+
+        except Exception as e:
+            errors_total.inc(operation=task.operation)
+            self.task_queue.fail(task, str(e))
+
+    def dispatch(self, task, job_desc_info: Optional[Dict] = None) -> None:
+        if task.operation == "insert_job":
+            self.job_service.process_job(
+                job_id=task.entity_id,
+                job_data=task.payload,
+                job_desc_info=job_desc_info,
+            )
+        elif task.operation == "update_job":
+            self.job_service.update_job(
+                new_job_id=task.entity_id,
+                previous_job_id=UUID(task.payload["previous_job_id"]),
+                job_data=task.payload["job_data"],
+                job_desc_info=job_desc_info,
+            )
+        elif task.operation == "insert_candidate":
+            self.candidate_service.process_candidate(
+                candidate_id=task.entity_id, candidate_data=task.payload
+            )
+        elif task.operation == "update_candidate":
+            self.candidate_service.update_candidate(
+                candidate_id=task.entity_id,
+                update_candidate_data=task.payload,
+            )
+        else:
+            raise ValueError(f"Unknown operation: {task.operation}")
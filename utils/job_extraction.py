@@ -0,0 +1,333 @@
+import asyncio
+import json
+import re
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import ollama
+from pydantic import ValidationError
+
+from schemas.job_schema import JobRequirements
+from utils.extraction_cache import ExtractionCache
+from utils.metrics import registry, timed
+from utils.prompt import PROMPT_JOB_DESCRIPTION
+
+# "3 years", "5+ yrs", "2-4 years": the lower bound is the requirement
+YEARS = r"(\d+)\s*\+?\s*(?:(?:-|to)\s*\d+\s*)?(?:years?|yrs?)\b"
+# Year counts of experience only: "5+ years of Python experience",
+# "Experience: 3 years", not "founded 20 years ago"
+TENURE_PATTERN = re.compile(
+    rf"{YEARS}'?\s+(?:of\s+)?(?:[\w+#./-]+\s+){{0,3}}?experience\b"
+    rf"|\bexperience\b[^.\d]{{0,30}}?{YEARS}",
+    re.IGNORECASE,
+)
+# Any year count, ones outside an experience context are left to the LLM
+YEARS_PATTERN = re.compile(rf"\b{YEARS}", re.IGNORECASE)
+# Degree mentions the rules resolve: "master's degree", "Bachelor in",
+# "B.Sc.", but not "Scrum Master"
+MASTER_PATTERN = re.compile(
+    r"\bmaster(?:'?s)?(?:\s+degree\b|\s+(?:in|of)\b)|\bm\.?\s?sc\b|\bmba\b",
+    re.IGNORECASE,
+)
+BACHELOR_PATTERN = re.compile(
+    r"\bbachelor(?:'?s)?(?:\s+degree\b|\s+(?:in|of)\b)|\bb\.?\s?sc\b"
+    r"|\bundergraduate degree\b",
+    re.IGNORECASE,
+)
+# Any degree wording, left over once the resolved mentions are removed
+DEGREE_WORD_PATTERN = re.compile(
+    r"\b(?:master|bachelor|degree|diploma|ph\.?\s?d|doctorate)", re.IGNORECASE
+)
+# "master's degree in Computer Science", "B.Sc. in Physics",
+# "Master of Science in Mathematics"
+PROGRAM_PATTERN = re.compile(
+    r"(?i:\b(?P<kind>bachelor|master|b\.?\s?sc|m\.?\s?sc))"
+    r"(?i:'?s)?\.?(?i:\s+degree)?"
+    r"(?i:\s+of\s+(?:science|arts|engineering))?\s+in\s+"
+    r"(?P<program>[A-Z][\w&-]*(?:\s+(?:of\s+)?[A-Z][\w&-]*)*)"
+)
+# Degrees naming a field, each should yield a program
+PROGRAM_HINT_PATTERN = re.compile(
+    r"\b(?P<kind>bachelor|master|b\.?\s?sc|m\.?\s?sc)\S*"
+    r"(?:\s+degree)?\s+(?:in|of)\b",
+    re.IGNORECASE,
+)
+# Same with lowercase programs, which the rules can't delimit
+LOOSE_PROGRAM_PATTERN = re.compile(PROGRAM_PATTERN.pattern, re.IGNORECASE)
+# Phrasings the rules can't resolve, each lowers the confidence
+AMBIGUOUS_PATTERNS = [
+    # Optional requirements read as required
+    (
+        re.compile(
+            r"\b(?:preferred|nice to have|a plus|bonus|ideally|desirable"
+            r"|or equivalent|equivalent experience)\b",
+            re.IGNORECASE,
+        ),
+        0.5,
+    ),
+    # Alternatives, either degree is enough: "Bachelor or Master",
+    # "BSc or MSc", "BS/MS"
+    (
+        re.compile(
+            r"\b(?:bachelor\S*|master\S*|b\.?\s?sc\.?|m\.?\s?sc\.?|b\.?s\.?"
+            r"|m\.?s\.?|ph\.?\s?d\.?|mba)(?:\s+or\s+|\s*/\s*)",
+            re.IGNORECASE,
+        ),
+        0.5,
+    ),
+    # Tenure the digit pattern doesn't read
+    (
+        re.compile(
+            r"\b(?:one|two|three|four|five|six|seven|eight|nine|ten"
+            r"|several|few|many)\s+(?:\+\s*)?years?\b",
+            re.IGNORECASE,
+        ),
+        0.5,
+    ),
+    (re.compile(r"\bmonths?\b", re.IGNORECASE), 0.3),
+]
+# Long descriptions phrase requirements in more ways than the rules know
+LONG_DESCRIPTION_CHARS = 2000
+
+extractions_total = registry.counter(
+    "talent_extractions_total",
+    "Job requirement extractions by source: rules, cache, llm or fallback",
+    ("source",),
+)
+
+
+def rule_based_extraction(description: str) -> Tuple[Dict, float]:
+    """Deterministic extraction of tenure and degree requirements.
+
+    Returns:
+        Requirements and a confidence in [0, 1] that they match what the
+        LLM would extract, lowered by every phrasing the rules can't
+        resolve
+    """
+    penalty = 0.0
+    for pattern, weight in AMBIGUOUS_PATTERNS:
+        if pattern.search(description):
+            penalty += weight
+
+    stated = TENURE_PATTERN.findall(description)
+    tenures = {int(before or after) for before, after in stated}
+    if len(tenures) > 1:
+        # e.g. "3 years of Python experience, 5 years of experience overall"
+        penalty += 0.4
+    if len(YEARS_PATTERN.findall(description)) > len(stated):
+        # Years of something else, or experience the rules can't tie them to
+        penalty += 0.5
+
+    residual = MASTER_PATTERN.sub("", BACHELOR_PATTERN.sub("", description))
+    if DEGREE_WORD_PATTERN.search(residual):
+        penalty += 0.5
+
+    programs = {"bachelor": [], "master": []}
+    matches = list(PROGRAM_PATTERN.finditer(description))
+    for match in matches:
+        kind = "bachelor" if match["kind"][0] in "bB" else "master"
+        if match["program"] not in programs[kind]:
+            programs[kind].append(match["program"])
+    if len(LOOSE_PROGRAM_PATTERN.findall(description)) > len(matches):
+        penalty += 0.3
+    for match in PROGRAM_HINT_PATTERN.finditer(description):
+        kind = "bachelor" if match["kind"][0] in "bB" else "master"
+        if not programs[kind]:
+            # "Master of Science" without a field the rules can read
+            penalty += 0.3
+            break
+
+    if len(description) > LONG_DESCRIPTION_CHARS:
+        penalty += 0.2
+
+    # The first stated tenure is usually the overall requirement
+    tenure = TENURE_PATTERN.search(description)
+    if tenure:
+        tenure = int(tenure.group(1) or tenure.group(2))
+    requirements = JobRequirements(
+        is_required_master=bool(MASTER_PATTERN.search(description)),
+        is_required_bachelor=bool(BACHELOR_PATTERN.search(description)),
+        bachelor_program=programs["bachelor"],
+        master_program=programs["master"],
+        tenure=min(tenure, 60) if tenure else 0,
+    ).model_dump()
+    return requirements, max(0.0, 1.0 - penalty)
+
+
+def rule_based_requirements(description: str) -> Dict:
+    """Requirements from rule_based_extraction, whatever the confidence."""
+    return rule_based_extraction(description)[0]
+
+
+class JobExtractor:
+    """Extract job requirements with the LLM, one or many at a time.
+
+    Descriptions the rules extract with at least min_rule_confidence
+    never reach the LLM. For the rest, generation is constrained to JSON
+    and validated into JobRequirements. Malformed answers fall back to
+    the rules so they don't fail ingestion, while an unreachable LLM
+    still raises so the task is retried. Batches keep up to
+    max_concurrency requests in flight.
+    """
+
+    def __init__(
+        self,
+        llm_model: str = "llama3.2:1b",
+        max_concurrency: int = 4,
+        extraction_cache: Optional[ExtractionCache] = None,
+        host: Optional[str] = None,
+        min_rule_confidence: float = 0.8,
+    ):
+        self.llm_model = llm_model
+        self.max_concurrency = max_concurrency
+        self.extraction_cache = extraction_cache
+        # Above 1 every description goes to the LLM
+        self.min_rule_confidence = min_rule_confidence
+        self.host = host
+        self.client = ollama.Client(host=host)
+        # Async clients and semaphores belong to the loop they were made on
+        self.loop_state = weakref.WeakKeyDictionary()
+
+    def generate_options(self, description: str) -> Dict:
+        return {
+            "model": self.llm_model,
+            "prompt": PROMPT_JOB_DESCRIPTION.format(
+                job_description=description
+            ),
+            "format": "json",
+            "options": {"temperature": 0},
+        }
+
+    def cache_key(self, description: str) -> Optional[str]:
+        if self.extraction_cache is None:
+            return None
+        return self.extraction_cache.make_key(
+            description, PROMPT_JOB_DESCRIPTION, self.llm_model
+        )
+
+    def extract_with_rules(self, description: str) -> Optional[Dict]:
+        """Rule-based requirements when confident enough, otherwise None."""
+        if self.min_rule_confidence > 1:
+            return None
+        with timed("llm", "rules"):
+            requirements, confidence = rule_based_extraction(description)
+        if confidence < self.min_rule_confidence:
+            return None
+        extractions_total.inc(source="rules")
+        return requirements
+
+    @staticmethod
+    def validate(response: str) -> Optional[Dict]:
+        """Requirements from a JSON answer, None when malformed."""
+        try:
+            return JobRequirements.model_validate(
+                json.loads(response)
+            ).model_dump()
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    def extract(self, description: str) -> Dict:
+        """Requirements of one description."""
+        requirements = self.extract_with_rules(description)
+        if requirements is not None:
+            return requirements
+
+        cache_key = self.cache_key(description)
+        if cache_key is not None:
+            cached = self.extraction_cache.get(cache_key)
+            requirements = self.validate(cached) if cached else None
+            if requirements is not None:
+                extractions_total.inc(source="cache")
+                return requirements
+
+        with timed("llm", "generate"):
+            response = self.client.generate(
+                **self.generate_options(description)
+            )
+        return self.store(cache_key, response["response"], description)
+
+    def store(
+        self, cache_key: Optional[str], response: str, description: str
+    ) -> Dict:
+        """Validate an answer and cache it, or fall back to the rules."""
+        requirements = self.validate(response)
+        if requirements is None:
+            print(f"Malformed LLM extraction, using rules: {response[:200]}")
+            extractions_total.inc(source="fallback")
+            # Not cached, the next extraction asks the LLM again
+            return rule_based_requirements(description)
+
+        extractions_total.inc(source="llm")
+        if cache_key is not None:
+            self.extraction_cache.set(
+                cache_key, self.llm_model, json.dumps(requirements)
+            )
+        return requirements
+
+    def async_state(self):
+        """(client, semaphore) of the running event loop."""
+        loop = asyncio.get_running_loop()
+        state = self.loop_state.get(loop)
+        if state is None:
+            state = (
+                ollama.AsyncClient(host=self.host),
+                asyncio.Semaphore(self.max_concurrency),
+            )
+            self.loop_state[loop] = state
+        return state
+
+    async def extract_async(self, description: str) -> Dict:
+        """Async variant of extract, bounded by max_concurrency."""
+        requirements = self.extract_with_rules(description)
+        if requirements is not None:
+            return requirements
+
+        cache_key = self.cache_key(description)
+        if cache_key is not None:
+            cached = await asyncio.to_thread(
+                self.extraction_cache.get, cache_key
+            )
+            requirements = self.validate(cached) if cached else None
+            if requirements is not None:
+                extractions_total.inc(source="cache")
+                return requirements
+
+        client, semaphore = self.async_state()
+        async with semaphore:
+            with timed("llm", "generate"):
+                response = await client.generate(
+                    **self.generate_options(description)
+                )
+        return await asyncio.to_thread(
+            self.store, cache_key, response["response"], description
+        )
+
+    async def extract_many_async(self, descriptions: List[str]) -> List:
+        """Requirements of every description, extracted concurrently.
+
+        Returns:
+            One dict per description, or the exception it raised
+        """
+        # Identical descriptions share one request
+        unique = list(dict.fromkeys(descriptions))
+        results = await asyncio.gather(
+            *(self.extract_async(description) for description in unique),
+            return_exceptions=True,
+        )
+        by_description = dict(zip(unique, results))
+        return [by_description[description] for description in descriptions]
+
+    def extract_many(self, descriptions: List[str]) -> List:
+        """Sync entry point of extract_many_async, outside event loops."""
+        if not descriptions:
+            return []
+
+        async def run():
+            try:
+                return await self.extract_many_async(descriptions)
+            finally:
+                # The loop closes with asyncio.run, its client is dropped
+                # with it and collected, AsyncClient has no public close
+                self.loop_state.pop(asyncio.get_running_loop(), None)
+
+        return asyncio.run(run())
@@ -0,0 +1,160 @@
+from typing import List, Dict, Optional
+from uuid import UUID
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import bindparam, select, text
+from models.candidate_model import CandidateModel
+from utils.candidate_match import MAX_ANN_FETCH
+from utils.metrics import counted
+from utils.vector_index import HNSW_DEFAULT_EF_SEARCH, VectorIndex, to_numpy
+
+# Requirement filters run after the ANN scan of active jobs, which reads
+# this many rows per requested job before retrying deeper
+OVERFETCH_FACTOR = 4
+
+
+class JobMatch:
+    def __init__(self, database, vector_index: Optional[VectorIndex] = None):
+        self.database = database
+        self.vector_index = vector_index or VectorIndex()
+
+    async def get_jobs_by_candidate_async(
+        self,
+        candidate_id: UUID,
+        total_job: int,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> List[Dict]:
+        """Get active jobs a candidate qualifies for, most similar first.
+
+        Args:
+            candidate_id: UUID of the candidate
+            total_job: Number of top jobs to return
+            ef_search: HNSW candidate list size for this request
+            probes: IVFFlat lists to probe for this request
+
+        Returns:
+            List of jobs with similarity scores
+        """
+        with counted("match_jobs"):
+            return await self.database.run_async(
+                self.match_on_connection,
+                candidate_id,
+                total_job,
+                ef_search,
+                probes,
+            )
+
+    def match_on_connection(
+        self,
+        connection,
+        candidate_id: UUID,
+        total_job: int,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> List[Dict]:
+        """Filter and rank active jobs for the candidate on connection."""
+        # Get candidate
+        candidate = connection.execute(
+            select(
+                CandidateModel.candidate_tenure,
+                CandidateModel.has_bachelor,
+                CandidateModel.has_master,
+                CandidateModel.candidate_embedding,
+            ).where(CandidateModel.candidate_id == candidate_id)
+        ).first()
+
+        if not candidate:
+            raise ValueError(f"No candidate found with ID: {candidate_id}")
+
+        # Jobs asking for more than the candidate has are skipped
+        filters = [
+            "j.status = 'active'",
+            "COALESCE(j.tenure, 0) <= :tenure",
+        ]
+        if not candidate.has_bachelor:
+            filters.append("j.is_bachelor IS NOT TRUE")
+        if not candidate.has_master:
+            filters.append("j.is_master IS NOT TRUE")
+
+        self.vector_index.apply_tuning(
+            connection, ef_search=ef_search, probes=probes
+        )
+
+        params = {
+            "candidate_embedding": to_numpy(candidate.candidate_embedding),
+            "tenure": candidate.candidate_tenure or 0,
+            "total_job": total_job,
+        }
+        fetch_size = total_job * OVERFETCH_FACTOR
+        while True:
+            exact = fetch_size > MAX_ANN_FETCH
+            if not exact and self.vector_index.index_type == "hnsw":
+                # HNSW returns at most ef_search rows before the filters
+                self.vector_index.apply_tuning(
+                    connection,
+                    ef_search=max(
+                        ef_search or 0, HNSW_DEFAULT_EF_SEARCH, fetch_size
+                    ),
+                )
+            rows = connection.execute(
+                self.build_query(filters, exact), params
+            ).fetchall()
+            if exact or len(rows) >= total_job:
+                break
+
+            # Too few jobs passed the filters, scan deeper
+            fetch_size *= 2
+            if self.vector_index.index_type == "ivfflat":
+                probes = (probes or 1) * 2
+                self.vector_index.apply_tuning(connection, probes=probes)
+
+        jobs = []
+        for row in rows:
+            jobs.append(
+                {
+                    "job_id": str(row.job_id),
+                    "job_title": row.job_title,
+                    "company_name": row.company_name,
+                    "location": row.location,
+                    "similarity_score": self.vector_index.to_similarity(
+                        float(row.distance)
+                    ),
+                }
+            )
+
+        return jobs
+
+    def build_query(self, filters: List[str], exact: bool = False):
+        """Top jobs passing the filters, through the ANN index unless exact.
+
+        The exact query materializes the filtered jobs first, which keeps
+        the index out and sorts every qualifying job.
+        """
+        distance = self.vector_index.distance(
+            "j.job_embedding", "candidate_embedding"
+        )
+        sql = f"""
+            SELECT
+                j.job_id,
+                j.job_title,
+                j.company_name,
+                j.location,
+                {distance} AS distance
+            FROM
+                jobs j
+            WHERE
+                {" AND ".join(filters)}
+        """
+        if exact:
+            sql = f"""
+                WITH filtered AS MATERIALIZED ({sql})
+                SELECT * FROM filtered
+            """
+        sql += """
+            ORDER BY
+                distance
+            LIMIT :total_job
+        """
+        return text(sql).bindparams(
+            bindparam("candidate_embedding", type_=Vector(32))
+        )
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from models.cache_model import MatchVersionModel
+
+# Version scopes bumped by the writes that can change match results
+CANDIDATES_SCOPE = "candidates"
+JOBS_SCOPE = "jobs"
+
+
+def bump_version(session, scope: str) -> int:
+    """Increment a scope version inside the caller's transaction.
+
+    The version row stays locked until the transaction commits, so writers
+    of a scope commit in version order and a reader that sees version V
+    also sees every row written with a version up to V.
+
+    Returns:
+        The new version
+    """
+    statement = insert(MatchVersionModel).values(scope=scope, version=1)
+    return session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[MatchVersionModel.scope],
+            set_={"version": MatchVersionModel.version + 1},
+        ).returning(MatchVersionModel.version)
+    ).scalar()
+
+
+class MatchCacheEntry:
+    def __init__(
+        self,
+        candidates: List[Dict],
+        distances: List[float],
+        candidates_version: int,
+        jobs_version: int,
+    ):
+        self.candidates = candidates
+        self.distances = distances
+        self.candidates_version = candidates_version
+        self.jobs_version = jobs_version
+
+
+class MatchCache:
+    """In-process LRU of first-page match results.
+
+    Entries remember the match_versions they were computed at. A job
+    version change only retires old job rows, so the caller keeps the
+    entry and re-stamps it while its job is still active; load_job
+    raises for a retired id. A candidate version change lets the caller
+    merge only the candidates written since into the cached top-k.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.delta_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        job_id,
+        total_candidate: int,
+        ef_search=None,
+        probes=None,
+        rerank: bool = False,
+    ) -> Tuple:
+        return (str(job_id), total_candidate, ef_search, probes, rerank)
+
+    @staticmethod
+    def versions(connection) -> Dict[str, int]:
+        """Current version of every scope."""
+        rows = connection.execute(
+            select(MatchVersionModel.scope, MatchVersionModel.version)
+        )
+        return {row.scope: row.version for row in rows}
+
+    def get(self, key: Tuple) -> Optional[MatchCacheEntry]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Tuple, entry: MatchCacheEntry) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup as "hit", "delta" or "miss"."""
+        with self.lock:
+            if outcome == "hit":
+                self.hits += 1
+            elif outcome == "delta":
+                self.delta_hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict:
+        with self.lock:
+            total = self.hits + self.delta_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "delta_hits": self.delta_hits,
+                "misses": self.misses,
+                "hit_ratio": (
+                    (self.hits + self.delta_hits) / total if total else 0.0
+                ),
+            }
@@ -0,0 +1,271 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+
+from models.candidate_model import CandidateModel
+from utils.vector_index import to_numpy
+
+
+class InMemoryCandidateIndex:
+    """Candidate embeddings and match filters held in contiguous arrays.
+
+    Rows are packed in the first `size` slots; removing a candidate moves
+    the last row into its slot so scans never skip holes.
+    """
+
+    def __init__(
+        self, dim: int = 32, metric: str = "cosine", capacity: int = 1024
+    ):
+        if metric not in ("cosine", "ip", "l2"):
+            raise ValueError(f"Unsupported vector metric: {metric}")
+
+        self.dim = dim
+        self.metric = metric
+        self.lock = threading.RLock()
+        self.size = 0
+        self.slots = {}
+        # Highest candidates.change_version loaded so far
+        self.watermark = None
+
+        self.embeddings = np.zeros((capacity, dim), dtype=np.float32)
+        self.norms = np.zeros(capacity, dtype=np.float32)
+        self.tenure = np.zeros(capacity, dtype=np.int32)
+        self.has_bachelor = np.zeros(capacity, dtype=bool)
+        self.has_master = np.zeros(capacity, dtype=bool)
+        self.candidate_ids = [None] * capacity
+        self.profiles = [None] * capacity
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self) -> None:
+        capacity = len(self.candidate_ids) * 2
+        for name in (
+            "embeddings",
+            "norms",
+            "tenure",
+            "has_bachelor",
+            "has_master",
+        ):
+            current = getattr(self, name)
+            grown = np.zeros(
+                (capacity,) + current.shape[1:], dtype=current.dtype
+            )
+            grown[: self.size] = current[: self.size]
+            setattr(self, name, grown)
+        self.candidate_ids.extend([None] * (capacity - self.size))
+        self.profiles.extend([None] * (capacity - self.size))
+
+    def upsert(
+        self,
+        candidate_id: UUID,
+        embedding,
+        tenure: Optional[int],
+        has_bachelor: bool,
+        has_master: bool,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        email: Optional[str] = None,
+    ) -> None:
+        """Insert or replace a candidate."""
+        vector = to_numpy(embedding)[: self.dim]
+        norm = float(np.linalg.norm(vector))
+        if self.metric == "cosine" and norm > 0:
+            vector = vector / norm
+
+        with self.lock:
+            slot = self.slots.get(str(candidate_id))
+            if slot is None:
+                if self.size == len(self.candidate_ids):
+                    self._grow()
+                slot = self.size
+                self.size += 1
+                self.slots[str(candidate_id)] = slot
+
+            self.embeddings[slot] = vector
+            self.norms[slot] = norm
+            self.tenure[slot] = tenure or 0
+            self.has_bachelor[slot] = bool(has_bachelor)
+            self.has_master[slot] = bool(has_master)
+            self.candidate_ids[slot] = str(candidate_id)
+            self.profiles[slot] = (first_name, last_name, email)
+
+    def remove(self, candidate_id: UUID) -> None:
+        """Remove a candidate if present."""
+        with self.lock:
+            slot = self.slots.pop(str(candidate_id), None)
+            if slot is None:
+                return
+
+            last = self.size - 1
+            if slot != last:
+                self.embeddings[slot] = self.embeddings[last]
+                self.norms[slot] = self.norms[last]
+                self.tenure[slot] = self.tenure[last]
+                self.has_bachelor[slot] = self.has_bachelor[last]
+                self.has_master[slot] = self.has_master[last]
+                self.candidate_ids[slot] = self.candidate_ids[last]
+                self.profiles[slot] = self.profiles[last]
+                self.slots[self.candidate_ids[slot]] = slot
+
+            self.candidate_ids[last] = None
+            self.profiles[last] = None
+            self.size = last
+
+    def snapshot(self) -> "InMemoryCandidateIndex":
+        """Copy of the packed rows, scanned without holding the lock.
+
+        Upserts and removals write the arrays in place, so long scans work
+        on a copy instead of blocking every match and refresh.
+        """
+        with self.lock:
+            copy = InMemoryCandidateIndex(
+                dim=self.dim, metric=self.metric, capacity=max(self.size, 1)
+            )
+            for name in (
+                "embeddings",
+                "norms",
+                "tenure",
+                "has_bachelor",
+                "has_master",
+            ):
+                getattr(copy, name)[: self.size] = getattr(self, name)[
+                    : self.size
+                ]
+            copy.candidate_ids[: self.size] = self.candidate_ids[: self.size]
+            copy.profiles[: self.size] = self.profiles[: self.size]
+            copy.slots = dict(self.slots)
+            copy.size = self.size
+            copy.watermark = self.watermark
+            return copy
+
+    def scores(self, query) -> np.ndarray:
+        """Similarity of every packed row against a query vector.
+
+        Must be called with the lock held.
+        """
+        query = np.asarray(query, dtype=np.float32)[: self.dim]
+        embeddings = self.embeddings[: self.size]
+
+        if self.metric == "cosine":
+            norm = np.linalg.norm(query)
+            return embeddings @ (query / norm if norm > 0 else query)
+        if self.metric == "ip":
+            return embeddings @ query
+        # Negative euclidean distance from |x|^2 - 2x.q + |q|^2
+        squared = (
+            self.norms[: self.size] ** 2
+            - 2 * (embeddings @ query)
+            + float(query @ query)
+        )
+        return -np.sqrt(np.maximum(squared, 0))
+
+    def search(
+        self,
+        query,
+        total_candidate: int,
+        min_tenure: int = 0,
+        req_bachelor: bool = False,
+        req_master: bool = False,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> List[Dict]:
+        """Top candidates passing the tenure and degree filters.
+
+        Rows are ordered by (-similarity, candidate_id); `after` skips
+        everything up to and including that key for keyset pagination.
+        """
+        with self.lock:
+            if self.size == 0 or total_candidate <= 0:
+                return []
+
+            scores = self.scores(query)
+            mask = self.tenure[: self.size] >= min_tenure
+            if req_bachelor:
+                mask &= self.has_bachelor[: self.size]
+            if req_master:
+                mask &= self.has_master[: self.size]
+            if after is not None:
+                after_key, after_id = after
+                keys = -scores
+                mask &= keys >= after_key
+                # Ties on the cursor key continue by candidate_id
+                for slot in np.flatnonzero(mask & (keys == after_key)):
+                    if self.candidate_ids[slot] <= after_id:
+                        mask[slot] = False
+            scores[~mask] = -np.inf
+
+            k = min(total_candidate, int(mask.sum()))
+            if k == 0:
+                return []
+
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[
+                np.lexsort(
+                    (
+                        [self.candidate_ids[slot] for slot in top],
+                        -scores[top],
+                    )
+                )
+            ]
+
+            candidates = []
+            for slot in top:
+                first_name, last_name, email = self.profiles[slot]
+                candidates.append(
+                    {
+                        "candidate_id": self.candidate_ids[slot],
+                        "first_name": first_name,
+                        "last_name": last_name,
+                        "email": email,
+                        "similarity_score": float(scores[slot]),
+                    }
+                )
+            return candidates
+
+    def load(self, database, batch_size: int = 10000) -> int:
+        """Load candidates changed since the last load from the database.
+
+        Changes are found by change_version, assigned under the candidates
+        version lock so writers commit in version order: once a version is
+        seen, no row with a lower one can still appear.
+
+        Returns:
+            Number of candidates loaded
+        """
+        query = select(
+            CandidateModel.candidate_id,
+            CandidateModel.first_name,
+            CandidateModel.last_name,
+            CandidateModel.email,
+            CandidateModel.candidate_tenure,
+            CandidateModel.has_bachelor,
+            CandidateModel.has_master,
+            CandidateModel.candidate_embedding,
+            CandidateModel.change_version,
+        ).execution_options(yield_per=batch_size)
+        if self.watermark is not None:
+            query = query.where(CandidateModel.change_version > self.watermark)
+
+        loaded = 0
+        with database.get_session() as session:
+            for row in session.execute(query):
+                self.upsert(
+                    candidate_id=row.candidate_id,
+                    embedding=row.candidate_embedding,
+                    tenure=row.candidate_tenure,
+                    has_bachelor=row.has_bachelor,
+                    has_master=row.has_master,
+                    first_name=row.first_name,
+                    last_name=row.last_name,
+                    email=row.email,
+                )
+                if self.watermark is None or (
+                    row.change_version > self.watermark
+                ):
+                    self.watermark = row.change_version
+                loaded += 1
+
+        return loaded
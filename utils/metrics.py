@@ -0,0 +1,347 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+ROW_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self.lock:
+            values = sorted(self.values.items())
+        for key, value in values:
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}{labels} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # label values -> (per-bucket counts, sum, count)
+        self.values = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total, count = self.values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            counts[index] += 1
+            self.values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self.lock:
+            values = sorted(
+                (key, (list(counts), total, count))
+                for key, (counts, total, count) in self.values.items()
+            )
+        label_names = self.label_names + ("le",)
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                self.buckets + (float("inf"),), counts
+            ):
+                cumulative += bucket_count
+                labels = format_labels(
+                    label_names, key + (format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time.
+
+    The callback returns a number, or a dict of label value (or tuple of
+    label values) to number when the gauge has labels.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable,
+        label_names: Tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.label_names = tuple(label_names)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+        ]
+        try:
+            values = self.collect()
+        except Exception as e:
+            # One unavailable source (e.g. the database) keeps the rest
+            print(f"Error collecting metric {self.name}: {str(e)}")
+            return lines
+
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(
+            (key if isinstance(key, tuple) else (str(key),), value)
+            for key, value in values.items()
+        ):
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}{labels} {format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def register(self, metric):
+        with self.lock:
+            # Re-registering returns the existing metric, so modules can
+            # be imported twice (e.g. uvicorn reload) without clashing
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(
+        self, name: str, documentation: str, label_names: Tuple = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(
+            Histogram(name, documentation, label_names, buckets)
+        )
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable,
+        label_names: Tuple = (),
+    ) -> Gauge:
+        with self.lock:
+            # Gauges are bound to live objects, the latest one wins
+            self.metrics[name] = Gauge(
+                name, documentation, collect, label_names
+            )
+            return self.metrics[name]
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """Spans recorded while handling one request."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = []
+
+    def add(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.spans.append((name, seconds))
+
+    def server_timing(self) -> str:
+        """Spans as a Server-Timing header value, durations in ms."""
+        with self.lock:
+            spans = list(self.spans)
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.2f}" for name, seconds in spans
+        )
+
+
+registry = MetricsRegistry()
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+stage_seconds = registry.histogram(
+    "talent_stage_seconds",
+    "Time spent in one stage of an operation",
+    ("operation", "stage"),
+)
+errors_total = registry.counter(
+    "talent_errors_total", "Operations that raised an error", ("operation",)
+)
+encode_batch_size = registry.histogram(
+    "talent_encode_batch_size",
+    "Texts per model.encode call",
+    ("task",),
+    SIZE_BUCKETS,
+)
+match_rows = registry.histogram(
+    "talent_match_rows",
+    "Rows scanned and returned per candidate ranking",
+    ("strategy", "kind"),
+    ROW_BUCKETS,
+)
+request_seconds = registry.histogram(
+    "talent_request_seconds",
+    "HTTP request latency",
+    ("method", "route", "status"),
+)
+
+
+@contextmanager
+def start_trace():
+    """Collect the spans of timed() blocks run in this context."""
+    trace = Trace()
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+
+
+@contextmanager
+def counted(operation: str):
+    """Count and log errors raised by the block, then re-raise them.
+
+    ValueError marks a bad request, e.g. an unknown id, and isn't counted.
+    """
+    try:
+        yield
+    except ValueError:
+        raise
+    except Exception as e:
+        errors_total.inc(operation=operation)
+        print(f"Error in {operation}: {str(e)}")
+        raise
+
+
+@contextmanager
+def timed(operation: str, stage: str):
+    """Observe the block's duration and add it as a span to the trace."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        stage_seconds.observe(seconds, operation=operation, stage=stage)
+        trace: Optional[Trace] = current_trace.get()
+        if trace is not None:
+            trace.add(f"{operation}.{stage}", seconds)
+
+
+def serve_metrics(
+    port: int,
+    host: str = "0.0.0.0",
+    ready: Optional[Callable[[], bool]] = None,
+) -> ThreadingHTTPServer:
+    """Serve /metrics on a background thread, for processes without an API.
+
+    Args:
+        port: Port to listen on
+        host: Interface to listen on
+        ready: Answers /ready with 200 when true and 503 otherwise
+
+    Returns:
+        The running server, call shutdown() to stop it
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/ready" and ready is not None:
+                self.send_response(200 if ready() else 503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if path != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes every few seconds would flood stdout
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    return server
@@ -1,11 +1,11 @@
 PROMPT_JOB_DESCRIPTION = """Given job description:
 ```{job_description}```
-Extract requirement in form of json with following description:
-is_required_master: True if need master otherwise False
-is_required_bachelor: True if need bachelor otherwise False
-bachelor_program: list of program required bachelor program
-master_program: list of program required master program
-tenure: total tenure expected
+Extract requirement in form of a json object with following keys:
+is_required_master: true if need master otherwise false
+is_required_bachelor: true if need bachelor otherwise false
+bachelor_program: list of program required bachelor program, [] if none
+master_program: list of program required master program, [] if none
+tenure: minimum years of experience expected as an integer, 0 if none
 Only return expected json"""
 TEXT_JOB = """Looking for {role} with job description: {description}. required skills: {skills}."""
 ADDITIONAL_TENURE_TEXT_JOB = """with tenure {tenure}"""
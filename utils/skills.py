@@ -0,0 +1,37 @@
+import re
+from typing import Iterable, List, Union
+
+# Spellings folded onto one vocabulary term
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "golang": "go",
+    "postgres": "postgresql",
+    "k8s": "kubernetes",
+    "ml": "machine learning",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "scikit learn": "scikit-learn",
+    "sklearn": "scikit-learn",
+}
+
+
+def normalize_skill(skill: str) -> str:
+    """Lowercase a skill, collapse whitespace and fold known aliases."""
+    term = re.sub(r"\s+", " ", skill.strip().lower()).strip(" ,;")
+    return SKILL_ALIASES.get(term, term)
+
+
+def normalize_skills(skills: Union[str, Iterable[str], None]) -> List[str]:
+    """Sorted, deduplicated skill terms.
+
+    Accepts a list of skills or the comma-joined text stored in the
+    skills / required_skills columns.
+    """
+    if not skills:
+        return []
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    return sorted({normalize_skill(skill) for skill in skills} - {""})
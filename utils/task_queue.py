@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, insert, select, text, update
+
+from models.task_model import IngestionTaskModel
+
+QUEUED = "queued"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+
+class TaskQueue:
+    """Durable ingestion work queue stored in Postgres.
+
+    Workers claim tasks with FOR UPDATE SKIP LOCKED so several worker
+    processes can share the table without handing out a task twice.
+    Tasks left in processing longer than visibility_timeout (crashed
+    worker) become claimable again while they have attempts left, and are
+    marked failed otherwise.
+    """
+
+    def __init__(
+        self,
+        database,
+        max_attempts: int = 3,
+        visibility_timeout: int = 600,
+        retry_delay: int = 5,
+    ):
+        self.database = database
+        self.max_attempts = max_attempts
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+
+    def enqueue(
+        self, operation: str, entity_id: Optional[UUID], payload: Dict
+    ) -> UUID:
+        return self.enqueue_many(operation, [(entity_id, payload)])[0]
+
+    def enqueue_many(self, operation: str, items: List) -> List[UUID]:
+        """Queue (entity_id, payload) pairs in one insert."""
+        now = datetime.now()
+        rows = [
+            {
+                "task_id": uuid4(),
+                "operation": operation,
+                "entity_id": entity_id,
+                "payload": payload,
+                "status": QUEUED,
+                "attempts": 0,
+                "max_attempts": self.max_attempts,
+                "available_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for entity_id, payload in items
+        ]
+        with self.database.get_session() as session:
+            session.execute(insert(IngestionTaskModel), rows)
+        return [row["task_id"] for row in rows]
+
+    def claim(self, limit: int = 1) -> List:
+        """Mark up to limit ready tasks as processing and return them."""
+        # Tasks that crashed their worker on every attempt are given up,
+        # instead of taking a worker slot each visibility timeout
+        expire = text(
+            """
+            UPDATE ingestion_tasks
+            SET
+                status = 'failed',
+                last_error = COALESCE(last_error, 'Processing timed out'),
+                updated_at = now()
+            WHERE
+                status = 'processing' AND
+                attempts >= max_attempts AND
+                claimed_at < now() - make_interval(secs => :timeout)
+            """
+        )
+        query = text(
+            """
+            UPDATE ingestion_tasks t
+            SET
+                status = 'processing',
+                attempts = t.attempts + 1,
+                claimed_at = now(),
+                updated_at = now()
+            WHERE t.task_id IN (
+                SELECT task_id
+                FROM ingestion_tasks
+                WHERE
+                    (status = 'queued' AND available_at <= now()) OR
+                    (status = 'processing' AND
+                     attempts < max_attempts AND
+                     claimed_at < now() - make_interval(secs => :timeout))
+                ORDER BY created_at
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING
+                t.task_id, t.operation, t.entity_id, t.payload,
+                t.attempts, t.max_attempts
+            """
+        )
+        with self.database.get_session() as session:
+            session.execute(expire, {"timeout": self.visibility_timeout})
+            return session.execute(
+                query, {"timeout": self.visibility_timeout, "limit": limit}
+            ).fetchall()
+
+    def pending_counts(self) -> Dict[str, int]:
+        """Queued and processing tasks, read through the pending index."""
+        with self.database.get_connection() as connection:
+            rows = connection.execute(
+                select(IngestionTaskModel.status, func.count())
+                .where(IngestionTaskModel.status.in_([QUEUED, PROCESSING]))
+                .group_by(IngestionTaskModel.status)
+            )
+            counts = {QUEUED: 0, PROCESSING: 0}
+            counts.update({status: count for status, count in rows})
+            return counts
+
+    def complete(self, task_ids: List[UUID]) -> None:
+        with self.database.get_session() as session:
+            session.execute(
+                update(IngestionTaskModel)
+                .where(IngestionTaskModel.task_id.in_(task_ids))
+                .values(status=DONE, last_error=None, updated_at=datetime.now())
+            )
+
+    def fail(self, task, error: str) -> None:
+        """Requeue a task with backoff, or mark it failed when out of tries."""
+        now = datetime.now()
+        if task.attempts < task.max_attempts:
+            values = {
+                "status": QUEUED,
+                "available_at": now
+                + timedelta(seconds=self.retry_delay * 2 ** (task.attempts - 1)),
+            }
+        else:
+            values = {"status": FAILED}
+
+        with self.database.get_session() as session:
+            session.execute(
+                update(IngestionTaskModel)
+                .where(IngestionTaskModel.task_id == task.task_id)
+                .values(last_error=error, updated_at=now, **values)
+            )
+
+    async def get_status_async(
+        self, entity_id: UUID, connection=None
+    ) -> Optional[Dict]:
+        """Async variant of get_status on an async connection."""
+        if connection is None:
+            async with self.database.get_async_connection() as connection:
+                return await self.get_status_async(entity_id, connection)
+
+        return await connection.run_sync(
+            lambda sync_connection: self.get_status(entity_id, sync_connection)
+        )
+
+    def get_status(self, entity_id: UUID, connection=None) -> Optional[Dict]:
+        """State of the latest task for an entity, if any."""
+        if connection is None:
+            with self.database.get_connection() as connection:
+                return self.get_status(entity_id, connection)
+
+        task = connection.execute(
+            select(
+                IngestionTaskModel.task_id,
+                IngestionTaskModel.operation,
+                IngestionTaskModel.status,
+                IngestionTaskModel.attempts,
+                IngestionTaskModel.last_error,
+                IngestionTaskModel.created_at,
+                IngestionTaskModel.updated_at,
+            )
+            .where(IngestionTaskModel.entity_id == entity_id)
+            .order_by(IngestionTaskModel.created_at.desc())
+            .limit(1)
+        ).first()
+
+        if not task:
+            return None
+
+        return {
+            "task_id": str(task.task_id),
+            "operation": task.operation,
+            "status": task.status,
+            "attempts": task.attempts,
+            "error": task.last_error,
+            "created_at": task.created_at,
+            "updated_at": task.updated_at,
+        }
@@ -0,0 +1,150 @@
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import text
+
+# Dimension of the indexed recall embedding and of the re-rank embedding
+EMBEDDING_DIM = 32
+FULL_EMBEDDING_DIM = 256
+
+# pgvector distance operator and index operator class for each metric
+DISTANCE_OPERATORS = {"cosine": "<=>", "ip": "<#>", "l2": "<->"}
+OPERATOR_CLASSES = {
+    "cosine": "vector_cosine_ops",
+    "ip": "vector_ip_ops",
+    "l2": "vector_l2_ops",
+}
+INDEX_TYPES = ("hnsw", "ivfflat")
+# pgvector defaults, per-scan tuning never goes below them
+HNSW_DEFAULT_EF_SEARCH = 40
+# Iterative scan mode per index type, IVFFlat only supports relaxed order
+ITERATIVE_SCAN_MODES = {"hnsw": "strict_order", "ivfflat": "relaxed_order"}
+# How candidate embeddings are stored and indexed, see ddl.sql
+# - vector: float32 columns and index
+# - halfvec: float16 columns and index, half the size
+# - binary: float32 columns, index on the sign bits, rescored exactly
+STORAGE_TYPES = ("vector", "halfvec", "binary")
+
+
+def truncate_embedding(embedding, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Leading dimensions of a Matryoshka embedding, renormalized.
+
+    Unlike encode(truncate_dim=dim), which truncates without rescaling,
+    the result always has unit norm, whatever VECTOR_METRIC is. Rows
+    stored from encode(truncate_dim=32) must be normalized the same way
+    (see ddl.sql), otherwise ip and l2 scores of old and new rows differ.
+    Full re-rank embeddings go through it too, with dim=FULL_EMBEDDING_DIM.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)[:dim]
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+def to_numpy(embedding) -> np.ndarray:
+    """float32 array of an embedding read from a vector or halfvec column."""
+    if hasattr(embedding, "to_numpy"):
+        embedding = embedding.to_numpy()
+    return np.asarray(embedding, dtype=np.float32)
+
+
+class VectorIndex:
+    """Describe the ANN index that matching queries should hit.
+
+    The operator used in ORDER BY must match the operator class the index
+    was built with, otherwise Postgres falls back to a sequential scan.
+    """
+
+    def __init__(
+        self,
+        index_type: str = "hnsw",
+        metric: str = "cosine",
+        storage: str = "vector",
+        rescore_factor: int = 10,
+        iterative_scan: bool = False,
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported vector index type: {index_type}")
+        if metric not in DISTANCE_OPERATORS:
+            raise ValueError(f"Unsupported vector metric: {metric}")
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unsupported vector storage: {storage}")
+
+        self.index_type = index_type
+        self.metric = metric
+        self.storage = storage
+        # Binary scans fetch this many rows per requested row to rescore
+        self.rescore_factor = rescore_factor if storage == "binary" else 1
+        # Whether filtered scans may continue past ef_search / probes
+        self.iterative_scan = iterative_scan
+        self.operator = DISTANCE_OPERATORS[metric]
+        if storage == "binary":
+            self.operator_class = "bit_hamming_ops"
+        else:
+            self.operator_class = OPERATOR_CLASSES[metric].replace(
+                "vector", storage
+            )
+
+    def distance(self, column: str, param: str) -> str:
+        """SQL distance expression between a column and a bound vector."""
+        if self.storage == "halfvec":
+            return f"{column} {self.operator} CAST(:{param} AS halfvec)"
+        return f"{column} {self.operator} :{param}"
+
+    def index_distance(self, column: str, param: str) -> str:
+        """Ordering expression served by the ANN index.
+
+        Same as distance, except in binary storage where the index holds
+        binary_quantize(column) and ranks on Hamming distance.
+        """
+        if self.storage == "binary":
+            return (
+                f"binary_quantize({column})::bit({EMBEDDING_DIM}) <~> "
+                f"binary_quantize(CAST(:{param} AS vector))"
+                f"::bit({EMBEDDING_DIM})"
+            )
+        return self.distance(column, param)
+
+    def similarity(self, column: str, param: str) -> str:
+        """SQL expression of to_similarity over the distance."""
+        distance = self.distance(column, param)
+        if self.metric == "cosine":
+            return f"1 - ({distance})"
+        return f"-({distance})"
+
+    def to_similarity(self, distance: float) -> float:
+        """Convert a pgvector distance into a higher-is-better score."""
+        if self.metric == "cosine":
+            return 1 - distance
+        # <#> returns the negative inner product, <-> the euclidean distance
+        return -distance
+
+    def apply_tuning(
+        self,
+        connection,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        iterative: bool = False,
+    ) -> None:
+        """Set per-transaction search parameters for the index scan.
+
+        iterative keeps the scan going until enough rows pass the filters,
+        only when the index was created with iterative_scan.
+        """
+        if ef_search is not None:
+            connection.execute(
+                text("SELECT set_config('hnsw.ef_search', :value, true)"),
+                {"value": str(ef_search)},
+            )
+        if probes is not None:
+            connection.execute(
+                text("SELECT set_config('ivfflat.probes', :value, true)"),
+                {"value": str(probes)},
+            )
+        if iterative and self.iterative_scan:
+            connection.execute(
+                text(
+                    f"SELECT set_config('{self.index_type}.iterative_scan', "
+                    ":value, true)"
+                ),
+                {"value": ITERATIVE_SCAN_MODES[self.index_type]},
+            )
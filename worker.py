@@ -0,0 +1,46 @@
+import argparse
+
+from config import INGEST_BATCH_SIZE, MODEL_WARMUP, WORKER_METRICS_PORT
+from dependencies import (
+    candidate_service,
+    embedding_worker,
+    job_service,
+    model,
+    task_queue,
+)
+from utils.ingestion_worker import IngestionWorker
+from utils.metrics import serve_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ingestion worker")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=WORKER_METRICS_PORT,
+        help="Serve /metrics and /ready on this port, 0 disables it",
+    )
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port, ready=model.is_ready)
+    if MODEL_WARMUP:
+        model.load()
+    embedding_worker.start()
+    worker = IngestionWorker(
+        task_queue,
+        job_service,
+        candidate_service,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+    )
+    try:
+        worker.run_forever()
+    finally:
+        embedding_worker.stop()
+
+
+if __name__ == "__main__":
+    main()